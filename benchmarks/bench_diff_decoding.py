@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark diff decoding and formatting on very large diffs
+
+Compares the previous full-body path (decode the whole response text with
+base64.b64decode, split the diff into lines and join them again) with the
+streaming path (DiffStreamDecoder over raw chunks, write_commit_info into a
+sink), plus the bounded excerpt shown by default. All start from the raw
+base64 response body, split into network-sized chunks, so no HTTP is involved.
+
+Command line:
+    python bench_diff_decoding.py --size-mb 100 -o decoding.json
+    python bench_diff_decoding.py --size-mb 100 --memory
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_DIR), "src"))
+
+from get_chromium_commits import (  # noqa: E402
+    DEFAULT_MAX_DIFF_LINES,
+    DIFF_CHUNK_SIZE,
+    DiffStreamDecoder,
+    write_commit_info,
+)
+from run_benchmarks import RESULTS_VERSION, summarize  # noqa: E402
+
+DEFAULT_SIZE_MB = 100
+DEFAULT_ITERATIONS = 3
+COMMIT_INFO = {
+    "commit": "0" * 40,
+    "author": {"name": "Author", "email": "author@chromium.org"},
+    "committer": {"name": "Committer", "email": "c@chromium.org", "time": "Mon Oct 14 12:00:00 2024"},
+    "message": "Large generated change",
+}
+
+
+def make_response(size_mb: float) -> List[bytes]:
+    """Build a base64 ?format=TEXT body of about size_mb decoded megabytes, as network chunks"""
+    header = "diff --git a/gen/big.cc b/gen/big.cc\n--- a/gen/big.cc\n+++ b/gen/big.cc\n"
+    line = "+  static const char kGenerated[] = \"ünïcode padding padding padding\";\n"
+    count = int(size_mb * 1024 * 1024) // len(line.encode("utf-8"))
+    body = base64.b64encode((header + line * count).encode("utf-8"))
+    return [body[i : i + DIFF_CHUNK_SIZE] for i in range(0, len(body), DIFF_CHUNK_SIZE)]
+
+
+def legacy_path(chunks: List[bytes], sink) -> None:
+    """The previous implementation: whole body as text, b64decode, split and join lines"""
+    content = b"".join(chunks).decode("utf-8")
+    if content and not content.startswith("diff "):
+        content = base64.b64decode(content).decode("utf-8", errors="ignore")
+    result = ["=" * 80, f"Commit Hash: {COMMIT_INFO['commit']}"]
+    diff_lines = content.split("\n")
+    if len(diff_lines) > DEFAULT_MAX_DIFF_LINES:
+        for diff_line in diff_lines[:DEFAULT_MAX_DIFF_LINES]:
+            result.append(diff_line)
+        result.append(f"... (omitted {len(diff_lines) - DEFAULT_MAX_DIFF_LINES} lines)")
+    else:
+        for diff_line in diff_lines:
+            result.append(diff_line)
+    result.append("=" * 80)
+    sink.write("\n".join(result))
+
+
+def streaming_path(chunks: List[bytes], sink) -> None:
+    """The current implementation: chunked decoding on bytes, formatting into the sink"""
+    decoder = DiffStreamDecoder()
+    for chunk in chunks:
+        decoder.feed(chunk)
+    write_commit_info(sink, COMMIT_INFO, show_diff=True, commit_diff=decoder.finish().text)
+
+
+def streaming_excerpt(chunks: List[bytes], sink) -> None:
+    """Current bounded excerpt: stops reading at the default line budget"""
+    decoder = DiffStreamDecoder(DEFAULT_MAX_DIFF_LINES)
+    for chunk in chunks:
+        if decoder.feed(chunk):
+            break
+    write_commit_info(sink, COMMIT_INFO, show_diff=True, commit_diff=decoder.finish())
+
+
+class NullSink:
+    """Text sink that discards output, so only decoding and formatting are timed"""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def measure(run: Callable, chunks: List[bytes], iterations: int, memory: bool) -> Dict:
+    """Time a path and optionally record its peak traced memory"""
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run(chunks, NullSink())
+        durations.append(time.perf_counter() - start)
+    result = {"iterations": iterations, **summarize(durations)}
+    if memory:
+        # Separate run: tracing slows allocation down considerably
+        tracemalloc.start()
+        run(chunks, NullSink())
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def main():
+    """Run the decoding benchmark and write its results as JSON"""
+    parser = argparse.ArgumentParser(
+        description="Compare full-body and streaming diff decoding/formatting on a large diff",
+        epilog="Example: python bench_diff_decoding.py --size-mb 100 -o decoding.json",
+    )
+    parser.add_argument("--output", "-o", help="Write results to this JSON file (default: stdout)")
+    parser.add_argument(
+        "--size-mb",
+        type=float,
+        default=DEFAULT_SIZE_MB,
+        help=f"Decoded diff size in megabytes (default: {DEFAULT_SIZE_MB})",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=DEFAULT_ITERATIONS,
+        help=f"Measured runs per path (default: {DEFAULT_ITERATIONS})",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Also record the peak memory of each path with tracemalloc",
+    )
+    args = parser.parse_args()
+
+    chunks = make_response(args.size_mb)
+    paths = {
+        "legacy_full_diff": legacy_path,
+        "streaming_full_diff": streaming_path,
+        "streaming_excerpt": streaming_excerpt,
+    }
+    results = {}
+    for name, run in paths.items():
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = measure(run, chunks, args.iterations, args.memory)
+        print(f"  median {results[name]['median'] * 1000:.1f} ms", file=sys.stderr)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "size_mb": args.size_mb,
+            "response_bytes": sum(len(chunk) for chunk in chunks),
+        },
+        "benchmarks": results,
+    }
+    document = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(document + "\n")
+        print(f"Results saved to: {args.output}", file=sys.stderr)
+    else:
+        print(document)
+
+
+if __name__ == "__main__":
+    main()
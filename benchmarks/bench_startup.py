@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Benchmark MCP server start-up for both transports
+
+Every iteration starts a fresh server process, as stdio clients do for each
+session, with a cold cache and a local fake Gitiles (fake_gitiles.py), and
+measures from process launch to:
+- ready: the response to the MCP initialize request
+- first_tool: the response to a first get_chromium_latest_commit call
+
+Command line:
+    python bench_startup.py -o startup.json
+    python bench_startup.py --transport stdio --iterations 20
+    python bench_startup.py --compare baseline.json -o startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_SCRIPT = os.path.join(os.path.dirname(BENCHMARK_DIR), "src", "server.py")
+
+from fake_gitiles import FakeGitilesServer, SyntheticRepository  # noqa: E402
+from run_benchmarks import (  # noqa: E402
+    DEFAULT_REGRESSION_THRESHOLD,
+    RESULTS_VERSION,
+    compare,
+    git_revision,
+    summarize,
+)
+
+DEFAULT_ITERATIONS = 10
+TRANSPORTS = ("stdio", "http")
+# Seconds a server gets to answer before the iteration is abandoned
+STARTUP_TIMEOUT = 30
+PROTOCOL_VERSION = "2025-06-18"
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": PROTOCOL_VERSION,
+        "capabilities": {},
+        "clientInfo": {"name": "bench_startup", "version": "1"},
+    },
+}
+INITIALIZED = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+
+
+def tool_call(file_path: str) -> Dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": 2,
+        "method": "tools/call",
+        "params": {"name": "get_chromium_latest_commit", "arguments": {"file_path": file_path}},
+    }
+
+
+def server_env(gitiles_url: str, **extra: str) -> Dict[str, str]:
+    """Environment of a server process: fake Gitiles, no on-disk cache"""
+    env = dict(os.environ)
+    env.update(CHROMIUM_GITILES_URL=gitiles_url, CHROMIUM_COMMITS_CACHE_DIR="", **extra)
+    return env
+
+
+def run_stdio(gitiles_url: str, file_path: str) -> Tuple[float, float]:
+    """
+    Start a stdio server, initialize a session and call one tool
+
+    Returns:
+        Seconds from launch to the initialize response and to the tool response
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=server_env(gitiles_url, TRANSPORT="stdio"),
+    )
+
+    def send(message: Dict):
+        process.stdin.write(json.dumps(message).encode() + b"\n")
+        process.stdin.flush()
+
+    def wait_for(request_id: int):
+        # The fetchers print progress on stdout as well; skip anything that is not our response
+        while True:
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError("stdio server exited before answering")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(message, dict) and message.get("id") == request_id:
+                return message
+
+    try:
+        send(INITIALIZE)
+        wait_for(1)
+        ready = time.perf_counter() - start
+        send(INITIALIZED)
+        send(tool_call(file_path))
+        wait_for(2)
+        first_tool = time.perf_counter() - start
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=STARTUP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return ready, first_tool
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def read_response(response: httpx.Response) -> Dict:
+    """JSON-RPC message of a streamable HTTP response (JSON or a single SSE event)"""
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data:"):
+                return json.loads(line[5:])
+        raise RuntimeError("empty event stream")
+    return response.json()
+
+
+def run_http(gitiles_url: str, file_path: str) -> Tuple[float, float]:
+    """
+    Start an HTTP server, initialize a session and call one tool
+
+    Returns:
+        Seconds from launch to the initialize response and to the tool response
+    """
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/mcp"
+    headers = {"Accept": "application/json, text/event-stream"}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=server_env(gitiles_url, TRANSPORT="http", PORT=str(port), SERVER_WORKERS="1"),
+    )
+    try:
+        with httpx.Client(timeout=STARTUP_TIMEOUT) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError("HTTP server exited before answering")
+                if time.perf_counter() - start > STARTUP_TIMEOUT:
+                    raise RuntimeError("HTTP server did not start listening")
+                try:
+                    response = client.post(url, json=INITIALIZE, headers=headers)
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            read_response(response)
+            ready = time.perf_counter() - start
+
+            session_id = response.headers.get("mcp-session-id")
+            if session_id:
+                headers["mcp-session-id"] = session_id
+            headers["mcp-protocol-version"] = PROTOCOL_VERSION
+            client.post(url, json=INITIALIZED, headers=headers)
+            read_response(client.post(url, json=tool_call(file_path), headers=headers))
+            first_tool = time.perf_counter() - start
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=STARTUP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return ready, first_tool
+
+
+def bench_transport(transport: str, gitiles_url: str, file_path: str, iterations: int) -> Dict:
+    """Launch the server iterations times, after one warm-up launch"""
+    run = run_stdio if transport == "stdio" else run_http
+    run(gitiles_url, file_path)
+    ready: List[float] = []
+    first_tool: List[float] = []
+    for _ in range(iterations):
+        ready_seconds, first_tool_seconds = run(gitiles_url, file_path)
+        ready.append(ready_seconds)
+        first_tool.append(first_tool_seconds)
+    return {
+        f"{transport}_ready": {"iterations": iterations, **summarize(ready)},
+        f"{transport}_first_tool": {"iterations": iterations, **summarize(first_tool)},
+    }
+
+
+def main():
+    """Run the start-up benchmark and write its results as JSON"""
+    parser = argparse.ArgumentParser(
+        description="Measure MCP server start-up and time to first tool response",
+        epilog="Example: python bench_startup.py --iterations 20 -o startup.json",
+    )
+    parser.add_argument("--output", "-o", help="Write results to this JSON file (default: stdout)")
+    parser.add_argument(
+        "--transport",
+        action="append",
+        choices=TRANSPORTS,
+        help="Benchmark only this transport (repeatable)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=DEFAULT_ITERATIONS,
+        help=f"Measured server launches per transport (default: {DEFAULT_ITERATIONS})",
+    )
+    parser.add_argument("--compare", help="Baseline result file to compare medians with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Relative median slowdown reported as a regression (default: 0.10)",
+    )
+    args = parser.parse_args()
+
+    repository = SyntheticRepository()
+    file_path = repository.paths()[0]
+    gitiles = FakeGitilesServer(repository).start()
+    results = {}
+    try:
+        for transport in args.transport or TRANSPORTS:
+            print(f"Running {transport}...", file=sys.stderr)
+            results.update(bench_transport(transport, gitiles.url, file_path, args.iterations))
+            for name in (f"{transport}_ready", f"{transport}_first_tool"):
+                print(f"  {name} median {results[name]['median'] * 1000:.1f} ms", file=sys.stderr)
+    finally:
+        gitiles.stop()
+
+    report = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+    document = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(document + "\n")
+        print(f"Results saved to: {args.output}", file=sys.stderr)
+    else:
+        print(document)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Chromium Gitiles server used by the benchmarks
+
+Features:
+- Serves the Gitiles endpoints the fetchers use: +log (with paging, ranges
+  and name-status), +/<commit>?format=JSON, <commit>^!/?format=TEXT diffs and
+  recursive tree listings
+- Synthetic history with configurable size, diff length and giant diffs
+- Replays responses recorded from the real Gitiles with the record command
+- Configurable latency added to every response
+
+Command line:
+    python fake_gitiles.py serve --port 8765 --latency 0.05 --giant-diff-mb 100
+    python fake_gitiles.py record recording.json chrome/browser/ui/browser.cc
+    python fake_gitiles.py serve --recording recording.json
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+# Prefix Gitiles puts in front of JSON responses
+JSON_PREFIX = ")]}'\n"
+GITILES_URL = "https://chromium.googlesource.com/chromium/src"
+
+DEFAULT_COMMITS = 200
+DEFAULT_FILES_PER_COMMIT = 3
+DEFAULT_DIFF_LINES = 20
+DEFAULT_GIANT_DIFF_MB = 0
+# One commit in this many touches giant.cc when giant diffs are enabled
+GIANT_DIFF_EVERY = 25
+GIANT_DIFF_PATH = "third_party/giant/giant.cc"
+DIRECTORIES = (
+    "chrome/browser/ui",
+    "components/sync/service",
+    "content/browser",
+    "third_party/blink/renderer/core/dom",
+    "base",
+)
+
+
+def _commit_hash(index: int) -> str:
+    return hashlib.sha1(f"commit-{index}".encode()).hexdigest()
+
+
+class SyntheticRepository:
+    """Deterministic Gitiles-shaped history generated on the fly"""
+
+    def __init__(
+        self,
+        commits: int = DEFAULT_COMMITS,
+        files_per_commit: int = DEFAULT_FILES_PER_COMMIT,
+        diff_lines: int = DEFAULT_DIFF_LINES,
+        giant_diff_mb: float = DEFAULT_GIANT_DIFF_MB,
+    ):
+        """
+        Args:
+            commits: Number of commits in the history
+            files_per_commit: Files changed by each commit
+            diff_lines: Added lines per changed file
+            giant_diff_mb: Size of the diff of giant.cc in commits touching it (0 disables them)
+        """
+        self.diff_lines = diff_lines
+        self.giant_diff_bytes = int(giant_diff_mb * 1024 * 1024)
+        # Newest first, like +log
+        self.commits: List[Dict] = []
+        for index in range(commits, 0, -1):
+            files = [
+                f"{DIRECTORIES[(index + i) % len(DIRECTORIES)]}/file{(index * 7 + i) % 50}.cc"
+                for i in range(files_per_commit)
+            ]
+            if self.giant_diff_bytes and index % GIANT_DIFF_EVERY == 0:
+                files.append(GIANT_DIFF_PATH)
+            timestamp = time.strftime(
+                "%a %b %d %H:%M:%S %Y", time.gmtime(1700000000 + index * 600)
+            )
+            self.commits.append(
+                {
+                    "commit": _commit_hash(index),
+                    "tree": hashlib.sha1(f"tree-{index}".encode()).hexdigest(),
+                    "parents": [_commit_hash(index - 1)],
+                    "author": {
+                        "name": f"Author {index % 13}",
+                        "email": f"author{index % 13}@chromium.org",
+                        "time": timestamp,
+                    },
+                    "committer": {
+                        "name": "Chromium LUCI CQ",
+                        "email": "chromium-scoped@luci-project-accounts.iam.gserviceaccount.com",
+                        "time": timestamp,
+                    },
+                    "message": f"Change number {index}\n\nBug: {1000000 + index}\n"
+                    f"Change-Id: I{_commit_hash(-index)}\n",
+                    "files": files,
+                }
+            )
+        self._by_hash = {commit["commit"]: commit for commit in self.commits}
+        self._position = {commit["commit"]: i for i, commit in enumerate(self.commits)}
+        self._diff_cache: Dict[Tuple[str, Optional[str]], bytes] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def head(self) -> str:
+        return self.commits[0]["commit"]
+
+    def paths(self) -> List[str]:
+        """All file paths touched by the history, most recently changed first"""
+        seen = {}
+        for commit in self.commits:
+            for path in commit["files"]:
+                seen.setdefault(path, None)
+        return list(seen)
+
+    def _entry(self, commit: Dict, tree_diff: bool) -> Dict:
+        entry = {key: value for key, value in commit.items() if key != "files"}
+        if tree_diff:
+            entry["tree_diff"] = [
+                {
+                    "type": "modify",
+                    "old_id": "0" * 40,
+                    "old_mode": 33188,
+                    "old_path": path,
+                    "new_id": "1" * 40,
+                    "new_mode": 33188,
+                    "new_path": path,
+                }
+                for path in commit["files"]
+            ]
+        return entry
+
+    def _file_diff(self, path: str) -> str:
+        header = (
+            f"diff --git a/{path} b/{path}\nindex 0000000..1111111 100644\n"
+            f"--- a/{path}\n+++ b/{path}\n"
+        )
+        if path == GIANT_DIFF_PATH:
+            line = f"+// generated line of {path} padding padding padding padding\n"
+            count = max(1, self.giant_diff_bytes // len(line))
+        else:
+            line = f"+  int value = Compute(\"{path}\");\n"
+            count = self.diff_lines
+        return header + f"@@ -0,0 +1,{count} @@\n" + line * count
+
+    def log(
+        self, revision: str, path: str, query: Dict[str, List[str]]
+    ) -> Optional[Dict]:
+        """Answer +log/<revision>/<path>, or None for an unknown path"""
+        commits = self.commits
+        if path:
+            prefix = path.rstrip("/") + "/"
+            commits = [
+                commit
+                for commit in commits
+                if any(f == path or f.startswith(prefix) for f in commit["files"])
+            ]
+            if not commits:
+                return None
+
+        # <old>..<new> ranges exclude old and everything before it
+        old, _, new = revision.rpartition("..")
+        newest = self._position.get(new, 0)
+        oldest = self._position.get(old, len(self.commits))
+        commits = [
+            commit
+            for commit in commits
+            if newest <= self._position[commit["commit"]] < oldest
+        ]
+        hashes = [commit["commit"] for commit in commits]
+
+        start = hashes.index(query["s"][0]) if "s" in query and query["s"][0] in hashes else 0
+        count = int(query.get("n", ["100"])[0])
+        page = commits[start : start + count]
+        result = {"log": [self._entry(c, "name-status" in query) for c in page]}
+        if start + count < len(commits):
+            result["next"] = commits[start + count]["commit"]
+        return result
+
+    def commit(self, commit_hash: str) -> Optional[Dict]:
+        """Answer +/<commit>?format=JSON"""
+        if commit_hash == "HEAD":
+            commit_hash = self.head
+        commit = self._by_hash.get(commit_hash)
+        return self._entry(commit, True) if commit else None
+
+    def diff(self, commit_hash: str, path: Optional[str]) -> Optional[bytes]:
+        """Answer <commit>^!/<path>?format=TEXT with the base64 encoded diff"""
+        commit = self._by_hash.get(commit_hash)
+        if commit is None:
+            return None
+        key = (commit_hash, path)
+        with self._lock:
+            if key not in self._diff_cache:
+                text = "".join(
+                    self._file_diff(f)
+                    for f in commit["files"]
+                    if not path or f == path or f.startswith(path.rstrip("/") + "/")
+                )
+                self._diff_cache[key] = base64.b64encode(text.encode())
+            return self._diff_cache[key]
+
+    def tree(self, directory: str) -> Optional[Dict]:
+        """Answer +/HEAD/<directory>?format=JSON&recursive=1"""
+        prefix = directory.rstrip("/") + "/" if directory else ""
+        names = sorted(
+            path[len(prefix) :] for path in self.paths() if path.startswith(prefix)
+        )
+        if not names:
+            return None
+        return {
+            "id": "0" * 40,
+            "entries": [
+                {"mode": 33188, "type": "blob", "id": "1" * 40, "name": name}
+                for name in names
+            ],
+        }
+
+    def respond(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, str, bytes]:
+        """
+        Build the response to a Gitiles request
+
+        Returns:
+            Tuple of (status code, content type, body)
+        """
+        result = None
+        if path.startswith("/+log/"):
+            revision, _, file_path = path[len("/+log/") :].partition("/")
+            result = self.log(revision, file_path, query)
+        elif path.startswith("/+/") and "^!" in path:
+            commit_hash, _, file_path = path[len("/+/") :].partition("^!")
+            body = self.diff(commit_hash, file_path.strip("/") or None)
+            if body is not None:
+                return 200, "text/plain", body
+        elif path.startswith("/+/HEAD/") and "recursive" in query:
+            result = self.tree(path[len("/+/HEAD/") :])
+        elif path.startswith("/+/"):
+            result = self.commit(path[len("/+/") :].strip("/"))
+
+        if result is None:
+            return 404, "text/plain", b"Not Found"
+        return 200, "application/json", (JSON_PREFIX + json.dumps(result)).encode()
+
+
+class RecordedRepository:
+    """Responses captured from the real Gitiles, keyed by request path and query"""
+
+    def __init__(self, recording_path: str):
+        """
+        Args:
+            recording_path: JSON file written by the record command
+        """
+        with open(recording_path, "r", encoding="utf-8") as f:
+            recording = json.load(f)
+        self.head = recording.get("head")
+        self.paths_recorded: List[str] = recording.get("paths", [])
+        self.responses: Dict[str, Dict] = recording["responses"]
+
+    def paths(self) -> List[str]:
+        return list(self.paths_recorded)
+
+    def respond(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, str, bytes]:
+        response = self.responses.get(_request_key(path, query))
+        if response is None:
+            return 404, "text/plain", b"Not recorded"
+        return (
+            response["status"],
+            response["content_type"],
+            base64.b64decode(response["body"]),
+        )
+
+
+def _request_key(path: str, query: Dict[str, List[str]]) -> str:
+    """Normalize a request so equivalent URLs (quoting, parameter order) match"""
+    items = sorted((key, value) for key, values in query.items() for value in values)
+    return unquote(path) + "?" + "&".join(f"{key}={value}" for key, value in items)
+
+
+class FakeGitilesServer:
+    """Threaded HTTP server answering Gitiles requests from a repository object"""
+
+    def __init__(self, repository, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        """
+        Args:
+            repository: SyntheticRepository or RecordedRepository
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            latency: Seconds to wait before answering each request
+        """
+        self.repository = repository
+        self.latency = latency
+        self.request_count = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; avoid delayed-ACK stalls on keep-alive
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.request_count += 1
+                url = urlsplit(self.path)
+                status, content_type, body = server.repository.respond(
+                    unquote(url.path), parse_qs(url.query)
+                )
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Clients stop reading diffs once their budget is reached
+                    pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGitilesServer":
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+
+def record(output_path: str, file_paths: List[str], base_url: str = GITILES_URL):
+    """
+    Record the Gitiles responses needed to look up files
+
+    Captures HEAD, each file's pinned +log entry, the commit details and the
+    full diff, which is what a latest-commit lookup with diff requests.
+
+    Args:
+        output_path: JSON file to write
+        file_paths: Files to look up
+        base_url: Gitiles repository URL to record from
+    """
+    import requests
+
+    session = requests.Session()
+    responses: Dict[str, Dict] = {}
+
+    def fetch(path: str, query: str) -> Optional[str]:
+        response = session.get(f"{base_url}{path}?{query}", timeout=120)
+        print(f"{response.status_code} {path}?{query}")
+        responses[_request_key(path, parse_qs(query))] = {
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "text/plain"),
+            "body": base64.b64encode(response.content).decode("ascii"),
+        }
+        return response.text if response.ok else None
+
+    head_log = fetch("/+log/HEAD", "format=JSON&n=1")
+    head = json.loads(head_log[len(JSON_PREFIX) :])["log"][0]["commit"]
+    for file_path in file_paths:
+        log = fetch(f"/+log/{head}/{quote(file_path)}", "format=JSON&n=1")
+        if not log:
+            continue
+        commit_hash = json.loads(log[len(JSON_PREFIX) :])["log"][0]["commit"]
+        fetch(f"/+/{commit_hash}", "format=JSON")
+        fetch(f"/+/{commit_hash}^!/", "format=TEXT")
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"head": head, "paths": file_paths, "responses": responses}, f)
+    print(f"Recorded {len(responses)} responses to {output_path}")
+
+
+def add_repository_arguments(parser: argparse.ArgumentParser):
+    """Add options selecting and sizing the served repository"""
+    parser.add_argument(
+        "--recording", help="Replay responses from this file instead of synthetic history"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds added to every response (default: 0)",
+    )
+    parser.add_argument(
+        "--commits",
+        type=int,
+        default=DEFAULT_COMMITS,
+        help=f"Synthetic history length (default: {DEFAULT_COMMITS})",
+    )
+    parser.add_argument(
+        "--files-per-commit",
+        type=int,
+        default=DEFAULT_FILES_PER_COMMIT,
+        help=f"Files changed per synthetic commit (default: {DEFAULT_FILES_PER_COMMIT})",
+    )
+    parser.add_argument(
+        "--diff-lines",
+        type=int,
+        default=DEFAULT_DIFF_LINES,
+        help=f"Diff lines per changed file (default: {DEFAULT_DIFF_LINES})",
+    )
+    parser.add_argument(
+        "--giant-diff-mb",
+        type=float,
+        default=DEFAULT_GIANT_DIFF_MB,
+        help=f"Size of the giant diffs touching {GIANT_DIFF_PATH}, 0 to disable (default: 0)",
+    )
+
+
+def open_repository(args: argparse.Namespace):
+    """Create the repository selected by add_repository_arguments options"""
+    if args.recording:
+        return RecordedRepository(args.recording)
+    return SyntheticRepository(
+        args.commits, args.files_per_commit, args.diff_lines, args.giant_diff_mb
+    )
+
+
+def main():
+    """Serve a fake Gitiles or record responses from the real one"""
+    parser = argparse.ArgumentParser(
+        description="Local Gitiles stand-in for offline benchmarks",
+        epilog="Example: python fake_gitiles.py serve --latency 0.05",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser("serve", help="Serve synthetic or recorded responses")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    add_repository_arguments(serve)
+
+    recorder = subparsers.add_parser("record", help="Record responses from Gitiles")
+    recorder.add_argument("output", help="Recording file to write")
+    recorder.add_argument("paths", nargs="+", help="File paths to record lookups for")
+    recorder.add_argument("--base-url", default=GITILES_URL)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.output, args.paths, args.base_url)
+        return
+
+    server = FakeGitilesServer(open_repository(args), args.host, args.port, args.latency)
+    print(f"Serving fake Gitiles at {server.url}")
+    print(f"Use it with: CHROMIUM_GITILES_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks of the fetch and format pipeline
+
+Runs against a local fake Gitiles (fake_gitiles.py), so results do not depend
+on chromium.googlesource.com latency, and writes machine-readable JSON that
+can be compared between versions.
+
+Benchmarks:
+- single_lookup: latest commit, details and diff of one file (sync fetcher)
+- batch: batch_get_commits over many files with deduplication
+- mcp_concurrent: concurrent get_chromium_latest_commit tool calls through the MCP server
+- giant_diff: download and decode a whole giant diff without a line budget
+- format_large: format_commit_info with thousands of changed files and a huge diff
+
+Command line:
+    python run_benchmarks.py -o results.json
+    python run_benchmarks.py --latency 0.05 --giant-diff-mb 100 -o results.json
+    python run_benchmarks.py --compare baseline.json -o results.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_DIR), "src"))
+
+from fake_gitiles import (  # noqa: E402
+    GIANT_DIFF_PATH,
+    FakeGitilesServer,
+    add_repository_arguments,
+    open_repository,
+)
+
+RESULTS_VERSION = 1
+DEFAULT_ITERATIONS = 5
+DEFAULT_BATCH_FILES = 100
+DEFAULT_MCP_CALLS = 32
+# Relative slowdown of a median that --compare reports as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+BENCHMARKS = ("single_lookup", "batch", "mcp_concurrent", "giant_diff", "format_large")
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    """Reduce iteration durations (seconds) to summary statistics"""
+    ordered = sorted(durations)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "max": ordered[-1],
+    }
+
+
+def measure(run: Callable[[], object], iterations: int) -> Dict:
+    """
+    Time a benchmark body after one warm-up run
+
+    Progress messages are discarded (see main()). Request and byte
+    counters are averaged over the measured iterations.
+
+    Returns:
+        Summary statistics plus per-iteration request and byte counts
+    """
+    from metrics import METRICS
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+        METRICS.reset()
+        durations = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            run()
+            durations.append(time.perf_counter() - start)
+    counters = METRICS.snapshot()["counters"]
+    return {
+        "iterations": iterations,
+        **summarize(durations),
+        "requests": counters.get("requests", 0) / iterations,
+        "response_bytes": counters.get("response_bytes", 0) / iterations,
+    }
+
+
+def bench_single_lookup(paths: List[str], iterations: int) -> Dict:
+    from get_chromium_commits import ChromiumCommitFetcher
+
+    def run():
+        fetcher = ChromiumCommitFetcher(cache=None)
+        fetcher.get_file_commit_info(paths[0], detailed=True, show_diff=True)
+
+    return measure(run, iterations)
+
+
+def bench_batch(paths: List[str], iterations: int, files: int) -> Dict:
+    from batch_get_commits import iter_batch_results
+    from get_chromium_commits import ChromiumCommitFetcher
+
+    batch = (paths * (files // len(paths) + 1))[:files]
+
+    def run():
+        fetcher = ChromiumCommitFetcher(cache=None)
+        for _ in iter_batch_results(fetcher, batch):
+            pass
+
+    result = measure(run, iterations)
+    result["files"] = len(batch)
+    return result
+
+
+def bench_mcp_concurrent(paths: List[str], iterations: int, calls: int) -> Dict:
+    import server
+    from async_fetcher import AsyncChromiumCommitFetcher
+
+    requested = (paths * (calls // len(paths) + 1))[:calls]
+    loop = asyncio.new_event_loop()
+
+    async def call_tools():
+        # The server creates its fetcher on first use from the environment (disk
+        # cache, local clone, path index). Install a bare one per iteration instead,
+        # so every run starts cold and measures Gitiles requests like the other benchmarks
+        server.fetcher = AsyncChromiumCommitFetcher(cache=None)
+        try:
+            await asyncio.gather(
+                *(
+                    server.mcp.call_tool(
+                        "get_chromium_latest_commit", {"file_path": file_path}
+                    )
+                    for file_path in requested
+                )
+            )
+        finally:
+            await server.fetcher.aclose()
+            server.fetcher = None
+
+    try:
+        result = measure(lambda: loop.run_until_complete(call_tools()), iterations)
+    finally:
+        loop.close()
+    result["calls"] = calls
+    return result
+
+
+def bench_giant_diff(repository, iterations: int) -> Optional[Dict]:
+    from get_chromium_commits import ChromiumCommitFetcher
+
+    if GIANT_DIFF_PATH not in repository.paths():
+        return None
+    with contextlib.redirect_stdout(io.StringIO()):
+        commit_hash = ChromiumCommitFetcher(cache=None).get_file_latest_commit(
+            GIANT_DIFF_PATH
+        )["commit"]
+
+    def run():
+        fetcher = ChromiumCommitFetcher(cache=None)
+        fetcher.get_commit_diff_excerpt(commit_hash, None, None)
+
+    return measure(run, iterations)
+
+
+def bench_format_large(iterations: int) -> Dict:
+    from get_chromium_commits import DiffExcerpt, format_commit_info
+
+    files = 5000
+    commit_details = {
+        "tree_diff": [
+            {
+                "type": "modify",
+                "old_path": f"chrome/browser/generated/file{i}.cc",
+                "new_path": f"chrome/browser/generated/file{i}.cc",
+            }
+            for i in range(files)
+        ]
+    }
+    commit_info = {
+        "commit": "0" * 40,
+        "author": {"name": "Author", "email": "author@chromium.org", "time": "Mon Oct 14 12:00:00 2024"},
+        "committer": {"name": "Committer", "email": "c@chromium.org", "time": "Mon Oct 14 12:00:00 2024"},
+        "message": "Large change\n\n" + "Details.\n" * 200,
+    }
+    lines = 200000
+    diff = DiffExcerpt(
+        text="".join(f"+generated line {i}\n" for i in range(lines)), line_count=lines
+    )
+
+    def run():
+        format_commit_info(commit_info, commit_details, True, diff)
+
+    result = measure(run, iterations)
+    result["files"] = files
+    result["diff_lines"] = lines
+    return result
+
+
+def git_revision() -> Optional[str]:
+    """Commit of the benchmarked tree, if it is a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "-C", BENCHMARK_DIR, "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    Print median changes against a baseline result file
+
+    Returns:
+        Names of the benchmarks whose median slowed down by more than threshold
+    """
+    regressions = []
+    print(
+        f"{'Benchmark':<18}{'Baseline (ms)':>16}{'Current (ms)':>16}{'Change':>10}",
+        file=sys.stderr,
+    )
+    print("-" * 60, file=sys.stderr)
+    for name, result in current["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before:
+            print(
+                f"{name:<18}{'-':>16}{result['median'] * 1000:>16.2f}{'new':>10}",
+                file=sys.stderr,
+            )
+            continue
+        change = result["median"] / before["median"] - 1
+        print(
+            f"{name:<18}{before['median'] * 1000:>16.2f}"
+            f"{result['median'] * 1000:>16.2f}{change:>+10.1%}",
+            file=sys.stderr,
+        )
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    """Run the benchmarks and write their results as JSON"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Chromium commit fetch/format pipeline against a local fake Gitiles",
+        epilog="Example: python run_benchmarks.py --giant-diff-mb 100 -o results.json",
+    )
+    parser.add_argument("--output", "-o", help="Write results to this JSON file (default: stdout)")
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=BENCHMARKS,
+        help="Run only this benchmark (repeatable)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=DEFAULT_ITERATIONS,
+        help=f"Measured runs per benchmark (default: {DEFAULT_ITERATIONS})",
+    )
+    parser.add_argument(
+        "--batch-files",
+        type=int,
+        default=DEFAULT_BATCH_FILES,
+        help=f"Files per batch run (default: {DEFAULT_BATCH_FILES})",
+    )
+    parser.add_argument(
+        "--mcp-calls",
+        type=int,
+        default=DEFAULT_MCP_CALLS,
+        help=f"Concurrent tool calls per MCP run (default: {DEFAULT_MCP_CALLS})",
+    )
+    parser.add_argument("--compare", help="Baseline result file to compare medians with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Relative median slowdown reported as a regression (default: 0.10)",
+    )
+    add_repository_arguments(parser)
+    args = parser.parse_args()
+
+    repository = open_repository(args)
+    gitiles = FakeGitilesServer(repository, latency=args.latency).start()
+    # Both fetchers read the base URL when their module is imported
+    os.environ["CHROMIUM_GITILES_URL"] = gitiles.url
+    selected = args.only or BENCHMARKS
+    # The fetchers log every request and the MCP SDK enables httpx request
+    # logging; writing those lines would be measured along with the lookups
+    logging.disable(logging.INFO)
+    paths = [path for path in repository.paths() if path != GIANT_DIFF_PATH]
+
+    results = {}
+    try:
+        for name in selected:
+            print(f"Running {name}...", file=sys.stderr)
+            if name == "single_lookup":
+                result = bench_single_lookup(paths, args.iterations)
+            elif name == "batch":
+                result = bench_batch(paths, args.iterations, args.batch_files)
+            elif name == "mcp_concurrent":
+                result = bench_mcp_concurrent(paths, args.iterations, args.mcp_calls)
+            elif name == "giant_diff":
+                result = bench_giant_diff(repository, args.iterations)
+            else:
+                result = bench_format_large(args.iterations)
+            if result is None:
+                print(f"Skipped {name} (needs --giant-diff-mb)", file=sys.stderr)
+                continue
+            results[name] = result
+            print(f"  median {result['median'] * 1000:.2f} ms", file=sys.stderr)
+    finally:
+        gitiles.stop()
+
+    report = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "recording": args.recording,
+            "latency": args.latency,
+            "commits": args.commits,
+            "files_per_commit": args.files_per_commit,
+            "diff_lines": args.diff_lines,
+            "giant_diff_mb": args.giant_diff_mb,
+        },
+        "benchmarks": results,
+    }
+    document = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(document + "\n")
+        print(f"Results saved to: {args.output}", file=sys.stderr)
+    else:
+        print(document)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
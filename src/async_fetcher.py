@@ -0,0 +1,907 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Chromium commit information fetcher
+
+Non-blocking counterpart of ChromiumCommitFetcher for use inside an event loop
+(e.g. the MCP server). All requests share one httpx connection pool, and the
+details and diff requests for a commit run concurrently. Requests are built
+and read by CommitFetcherBase, shared with the blocking fetcher.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
+
+import httpx
+
+from batching import DEFAULT_CONCURRENCY, group_paths_by_commit
+from commit_cache import (
+    DEFAULT_HEAD_TTL,
+    DEFAULT_LOG_TTL,
+    PINNED_LOG_TTL,
+    is_immutable_commit,
+)
+from commit_records import CommitRecord, wants_field
+from get_chromium_commits import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_DIRECTORY_PAGE_SIZE,
+    DEFAULT_HEADERS,
+    DEFAULT_HISTORY_LIMIT,
+    DEFAULT_HISTORY_PAGE_SIZE,
+    DEFAULT_MAX_DIFF_LINES,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POOL_SIZE,
+    DIFF_CHUNK_SIZE,
+    MAX_INDEX_CATCH_UP_COMMITS,
+    RETRY_STATUS_CODES,
+    THROTTLED_STATUS,
+    CommitFetcherBase,
+    DiffExcerpt,
+    DirectoryCommitResolver,
+    GitilesError,
+    GitilesRequest,
+    as_diff_excerpt,
+    build_commit_record,
+    call_backend,
+    file_diff_paths,
+    format_commit_info,
+    history_page_commits,
+    index_changes,
+    parse_retry_after,
+    parse_since,
+    pinned_latest,
+    pinned_latest_entry,
+    previous_pinned_latest,
+    raw_body_size,
+    read_local_diff_excerpt,
+)
+from local_git import LocalGitBackend
+from memory_cache import AsyncSingleFlight
+from metrics import METRICS, count_request
+from path_index import PathIndex
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncChromiumCommitFetcher(CommitFetcherBase):
+    """Chromium repository commit information fetcher built on httpx.AsyncClient"""
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        rate_limit: Optional[float] = None,
+        cache: Optional[Any] = None,
+        log_ttl: float = DEFAULT_LOG_TTL,
+        head_ttl: float = DEFAULT_HEAD_TTL,
+        backend: Optional[LocalGitBackend] = None,
+        path_index: Optional[PathIndex] = None,
+    ):
+        """
+        Args:
+            client: Existing async HTTP client to share; a pooled client is created if omitted
+            pool_size: Maximum number of pooled connections
+            max_retries: Number of retries for connection errors and 429/5xx responses
+            backoff_factor: Exponential backoff factor between retries (seconds)
+            rate_limit: Maximum requests per second to each host (no cap until Gitiles
+                throttles us if None); lowered automatically while Gitiles answers 429
+            cache: Response cache providing get()/set(), e.g. CommitCache (no caching if None)
+            log_ttl: Seconds cached results that follow HEAD (history, listings) stay valid
+            head_ttl: Seconds a resolved HEAD commit is trusted before revalidating it
+            backend: Local clone answering latest-commit, details and diff queries
+                instead of Gitiles (history and directory listings still use Gitiles);
+                git runs in worker threads so it never blocks the event loop
+            path_index: Precomputed path to latest commit index consulted first
+        """
+        super().__init__(
+            max_retries,
+            backoff_factor,
+            rate_limit,
+            cache,
+            log_ttl,
+            head_ttl,
+            backend,
+            path_index,
+        )
+        self.client = client or httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+            follow_redirects=True,
+        )
+        # Concurrent requests for the same path or commit share one in-flight fetch
+        self._single_flight = AsyncSingleFlight()
+        # Held while the path index is brought up to HEAD
+        self._path_index_lock = asyncio.Lock()
+
+    async def aclose(self):
+        """Close the underlying HTTP client"""
+        await self.client.aclose()
+
+    async def _cache_get(self, key: str) -> Optional[Any]:
+        """Look up a cached response off the event loop, treating failures as misses"""
+        if self.cache is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.cache.get, key)
+        except Exception as e:
+            logger.warning("Cache read error: %s", e)
+            return None
+
+    async def _cache_set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a response in the cache off the event loop, ignoring failures"""
+        if self.cache is None or value is None:
+            return
+        try:
+            await asyncio.to_thread(self.cache.set, key, value, ttl)
+        except Exception as e:
+            logger.warning("Cache write error: %s", e)
+
+    async def _cached(
+        self,
+        cache_key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        cacheable: bool = True,
+        refresh: bool = False,
+    ) -> Any:
+        """Serve a response from the cache, or fetch it once for all concurrent callers"""
+        if cacheable and not refresh:
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug("Using cached response: %s", cache_key)
+                METRICS.count("cache_hits")
+                return cached
+            METRICS.count("cache_misses")
+
+        async def load():
+            # Another caller may have filled the cache while we waited for our turn
+            if cacheable and not refresh:
+                cached = await self._cache_get(cache_key)
+                if cached is not None:
+                    return cached
+            value = await fetch()
+            if cacheable:
+                await self._cache_set(cache_key, value, ttl)
+            return value
+
+        return await self._single_flight.do(cache_key, load)
+
+    async def _request(self, request: GitilesRequest, refresh: bool = False) -> Any:
+        """Answer a request from the cache, or send it once for all concurrent callers"""
+        return await self._cached(
+            request.cache_key,
+            lambda: self._send(request),
+            request.ttl,
+            request.cacheable,
+            refresh,
+        )
+
+    async def _send(self, request: GitilesRequest) -> Any:
+        """Send a request to Gitiles and read its result, wrapping failures in GitilesError"""
+        with METRICS.time(request.stage):
+            try:
+                logger.info(request.description)
+                response = await self._get(
+                    request.url, request.timeout, stream=request.decoder is not None
+                )
+                if request.decoder is None:
+                    if response.status_code == 404:
+                        return self._read_response(request, None)
+                    response.raise_for_status()
+                    return self._read_response(request, response.content)
+
+                try:
+                    if response.status_code == 404:
+                        return self._read_response(request, None)
+                    response.raise_for_status()
+                    decoder = request.decoder(raw_body_size(response.headers))
+                    async for chunk in response.aiter_bytes(DIFF_CHUNK_SIZE):
+                        METRICS.count("response_bytes", len(chunk))
+                        if decoder.feed(chunk):
+                            break
+                finally:
+                    # Stops the download if the budget was reached before the end
+                    await response.aclose()
+                # Converting a large diff to text is CPU bound, keep it off the event loop
+                return request.finish(await asyncio.to_thread(decoder.finish))
+
+            except Exception as e:
+                raise GitilesError(f"{request.error}: {e}") from e
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Seconds to wait before retry number `attempt`, honouring Retry-After"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after
+        return self.backoff_factor * (2**attempt)
+
+    async def _get(
+        self, url: str, timeout: float, stream: bool = False
+    ) -> httpx.Response:
+        """
+        Issue a GET request to Gitiles, retrying connection errors and 429/5xx responses
+
+        A 429 slows down the shared rate limiter, which then holds back every
+        request to the host until its Retry-After has passed.
+        Streamed responses must be closed by the caller with aclose().
+        """
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            delay = self.rate_limiter.reserve(host)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            count_request()
+            try:
+                request = self.client.build_request("GET", url, timeout=timeout)
+                with METRICS.in_flight():
+                    response = await self.client.send(request, stream=stream)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            else:
+                throttled = response.status_code == THROTTLED_STATUS
+                if throttled:
+                    METRICS.count("throttled")
+                    self.rate_limiter.throttled(
+                        host, parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                else:
+                    self.rate_limiter.succeeded(host)
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt >= self.max_retries
+                ):
+                    if not stream:
+                        METRICS.count("response_bytes", len(response.content))
+                    return response
+                await response.aclose()
+                if throttled:
+                    # The limiter already waits out the pause before the next attempt
+                    METRICS.count("retries")
+                    attempt += 1
+                    continue
+
+            METRICS.count("retries")
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def get_file_latest_commit(
+        self, file_path: str, refresh: bool = False
+    ) -> Optional[Dict]:
+        """
+        Get the latest commit information for the specified file
+
+        Args:
+            file_path: Relative path of the file, e.g. "components/sync/service/data_type_manager.cc"
+            refresh: Revalidate HEAD now instead of trusting a recently resolved one
+
+        Returns:
+            Dictionary containing commit information, or None if not found
+        """
+        # Normalize path format (use forward slashes)
+        normalized_path = file_path.replace("\\", "/")
+        if self.path_index is not None and await self._path_index_is_current(refresh):
+            entry = await asyncio.to_thread(self.path_index.lookup, normalized_path)
+            commit_info = await self._get_indexed_commit(entry[0]) if entry else None
+            if commit_info:
+                return commit_info
+        if self.backend is not None:
+            return await asyncio.to_thread(
+                call_backend, self.backend.get_file_latest_commit, normalized_path
+            )
+        head = await self.get_head_commit(refresh=refresh)
+        if head is None:
+            # HEAD could not be resolved; fall back to a short-lived unpinned lookup
+            return await self._request(
+                self._latest_commit_request(normalized_path), refresh=refresh
+            )
+        return await self._get_pinned_latest_commit(normalized_path, head)
+
+    async def _get_pinned_latest_commit(
+        self, normalized_path: str, head: str
+    ) -> Optional[Dict]:
+        """Get the latest commit of a path as of a resolved HEAD, carrying older answers forward"""
+        cache_key = f"latest:{normalized_path}"
+        latest = pinned_latest(await self._cache_get(cache_key), head)
+        if latest is not None:
+            logger.debug("Using cached response: %s", cache_key)
+            METRICS.count("cache_hits")
+            return latest
+        METRICS.count("cache_misses")
+
+        async def load():
+            entry = await self._cache_get(cache_key)
+            latest = pinned_latest(entry, head)
+            if latest is not None:
+                return latest
+            previous = previous_pinned_latest(entry)
+            if previous is not None:
+                latest = await self._send(
+                    self._latest_commit_request(normalized_path, head, previous)
+                )
+                if latest is not None:
+                    METRICS.count("revalidations")
+            if latest is None:
+                latest = await self._send(
+                    self._latest_commit_request(normalized_path, head)
+                )
+            if latest is not None:
+                await self._cache_set(
+                    cache_key, pinned_latest_entry(head, latest), PINNED_LOG_TTL
+                )
+            return latest
+
+        return await self._single_flight.do(f"{cache_key}@{head}", load)
+
+    async def get_head_commit(self, refresh: bool = False) -> Optional[str]:
+        """
+        Resolve HEAD to a commit hash, shared by all lookups for head_ttl seconds
+
+        Args:
+            refresh: Ask Gitiles even if a recently resolved hash is remembered
+
+        Returns:
+            Commit hash, or None if it could not be resolved
+        """
+        head = self._remembered(self._head)
+        if head is not None and not refresh:
+            return head
+        try:
+            return await self._request(self._head_request(), refresh=refresh)
+        except GitilesError as e:
+            logger.warning("%s", e)
+            return None
+
+    async def _path_index_is_current(self, refresh: bool = False) -> bool:
+        """Check that the path index reflects HEAD, updating it first if HEAD has moved"""
+        if self.backend is not None:
+            head = await self._get_clone_revision(refresh)
+        else:
+            head = await self.get_head_commit(refresh=refresh)
+        if head is None:
+            return False
+        indexed_head = await asyncio.to_thread(lambda: self.path_index.indexed_head)
+        if head == indexed_head:
+            return True
+        # One lookup updates the index, concurrent ones answer without it meanwhile
+        if head == self._path_index_stale_head or self._path_index_lock.locked():
+            return False
+        async with self._path_index_lock:
+            return await self._update_path_index(head)
+
+    async def _get_clone_revision(self, refresh: bool = False) -> Optional[str]:
+        """Resolve the local clone's revision, reused for head_ttl seconds"""
+        revision = self._remembered(self._revision)
+        if revision is None or refresh:
+            revision = await asyncio.to_thread(call_backend, self.backend.resolve_revision)
+            if revision:
+                self._revision = (revision, time.monotonic())
+        return revision
+
+    async def _update_path_index(self, head: str) -> bool:
+        """Bring the path index up to head incrementally, returning whether it got there"""
+        indexed_head = await asyncio.to_thread(lambda: self.path_index.indexed_head)
+        try:
+            if indexed_head == head:
+                count = 0
+            elif self.backend is not None:
+                # Rebuilding after a history rewrite takes too long for a lookup
+                count = await asyncio.to_thread(
+                    call_backend, self.path_index.update, self.backend, head, False
+                )
+            else:
+                count = await self._catch_up_path_index(indexed_head, head)
+        except (GitilesError, sqlite3.Error) as e:
+            logger.warning("Unable to update the path index: %s", e)
+            count = None
+        if await asyncio.to_thread(lambda: self.path_index.indexed_head) == head:
+            if count:
+                logger.info("Path index updated (%d paths) to %s", count, head)
+            return True
+        self._path_index_stale_head = head
+        return False
+
+    async def _catch_up_path_index(self, indexed_head: str, head: str) -> Optional[int]:
+        """Apply the commits between the indexed HEAD and head, read from the Gitiles log"""
+        commits = []
+        start = None
+        while True:
+            page = await self._send(self._index_catch_up_request(indexed_head, head, start))
+            if not page:
+                return None
+            commits.extend(index_changes(commit) for commit in page.get("log", []))
+            start = page.get("next")
+            if not start:
+                return await asyncio.to_thread(
+                    self.path_index.apply_commits, indexed_head, head, commits
+                )
+            if len(commits) >= MAX_INDEX_CATCH_UP_COMMITS:
+                logger.warning(
+                    "Path index is more than %d commits behind, run `path_index.py update`",
+                    MAX_INDEX_CATCH_UP_COMMITS,
+                )
+                return None
+
+    async def _get_indexed_commit(self, commit_hash: str) -> Optional[Dict]:
+        """Get the commit information of a path index hit (immutable, so cached forever)"""
+        if self.backend is not None:
+            return await self._cached(
+                f"commit:{commit_hash}",
+                lambda: asyncio.to_thread(
+                    call_backend, self.backend.get_commit, commit_hash
+                ),
+                cacheable=is_immutable_commit(commit_hash),
+            )
+        return await self.get_commit_details(commit_hash)
+
+    async def iter_file_history(
+        self,
+        file_path: str,
+        since: Optional[str] = None,
+        page_size: int = DEFAULT_HISTORY_PAGE_SIZE,
+        name_status: bool = False,
+    ) -> AsyncIterator[Dict]:
+        """
+        Lazily iterate over the commits that touched a file or directory, newest first
+
+        Args:
+            file_path: File or directory path
+            since: Only yield commits after this date (ISO format) or commit hash
+            page_size: Number of commits requested per page
+            name_status: Include each commit's changed files ("tree_diff")
+
+        Yields:
+            Commit information dictionaries as returned by the +log API
+        """
+        normalized_path = file_path.replace("\\", "/")
+        since_date, since_commit = parse_since(since)
+
+        start = None
+        while True:
+            page = await self._request(
+                self._log_page_request(
+                    normalized_path, page_size, start, since_commit, name_status
+                )
+            )
+            commits, start = history_page_commits(page, since_date)
+            for commit in commits:
+                yield commit
+            if not start:
+                return
+
+    async def get_file_history(
+        self,
+        file_path: str,
+        limit: int = DEFAULT_HISTORY_LIMIT,
+        since: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Get the last commits that touched a file or directory
+
+        Args:
+            file_path: File or directory path
+            limit: Maximum number of commits to return
+            since: Only return commits after this date (ISO format) or commit hash
+
+        Returns:
+            List of commit information dictionaries, newest first
+        """
+        commits = []
+        if limit <= 0:
+            return commits
+        history = self.iter_file_history(
+            file_path, since, page_size=min(limit, DEFAULT_HISTORY_PAGE_SIZE)
+        )
+        async for commit in history:
+            commits.append(commit)
+            if len(commits) >= limit:
+                break
+        await history.aclose()
+        return commits
+
+    async def list_directory_files(self, directory: str) -> Optional[List[str]]:
+        """
+        List all files below a directory at HEAD
+
+        Args:
+            directory: Directory path, e.g. "components/sync/"
+
+        Returns:
+            Full paths of the files (recursively), or None if the directory was not found
+        """
+        normalized_dir = directory.replace("\\", "/").strip("/")
+        return await self._request(self._directory_request(normalized_dir))
+
+    async def get_directory_latest_commits(
+        self,
+        directory: str,
+        page_size: int = DEFAULT_DIRECTORY_PAGE_SIZE,
+        max_commits: Optional[int] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> Optional[Dict[str, Union[Dict, GitilesError, None]]]:
+        """
+        Get the latest commit of every file below a directory in one pass over its log
+
+        Args:
+            directory: Directory path, e.g. "components/sync/"
+            page_size: Number of commits requested per log page
+            max_commits: Maximum number of directory commits to walk (unlimited if None)
+            concurrency: Maximum number of individual file lookups running at the same time
+
+        Returns:
+            Mapping of file path to its latest commit (None if not found, or the
+            GitilesError of a failed individual lookup) in listing order, or None
+            if the directory was not found
+        """
+        file_paths = await self.list_directory_files(directory)
+        if file_paths is None:
+            return None
+
+        resolver = DirectoryCommitResolver(file_paths)
+        if file_paths:
+            history = self.iter_file_history(
+                directory.replace("\\", "/").strip("/"),
+                page_size=page_size,
+                name_status=True,
+            )
+            walked = 0
+            async for commit in history:
+                if max_commits is not None and walked >= max_commits:
+                    break
+                walked += 1
+                if resolver.add(commit):
+                    break
+            await history.aclose()
+
+        # Files the log walk could not attribute are looked up concurrently
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def lookup(path: str) -> Optional[Dict]:
+            async with semaphore:
+                return await self.get_file_latest_commit(path)
+
+        pending = list(resolver.pending)
+        commits = await asyncio.gather(
+            *(lookup(path) for path in pending), return_exceptions=True
+        )
+        for path, commit in zip(pending, commits):
+            if isinstance(commit, BaseException) and not isinstance(commit, GitilesError):
+                raise commit
+            if commit:
+                resolver.latest[path] = commit
+
+        return resolver.results()
+
+    async def get_commit_details(self, commit_hash: str) -> Optional[Dict]:
+        """
+        Get detailed information for the specified commit, including all modified files
+
+        Args:
+            commit_hash: The commit hash value
+
+        Returns:
+            Dictionary containing detailed information, or None if not found
+        """
+        if self.backend is not None:
+            return await asyncio.to_thread(
+                call_backend, self.backend.get_commit_details, commit_hash
+            )
+        return await self._request(self._details_request(commit_hash))
+
+    async def get_commit_diff(self, commit_hash: str) -> Optional[str]:
+        """
+        Get complete diff information for the specified commit
+
+        Args:
+            commit_hash: The commit hash value
+
+        Returns:
+            Complete diff content, or None if not found
+        """
+        if self.backend is not None:
+            return await asyncio.to_thread(
+                call_backend, self.backend.get_commit_diff, commit_hash
+            )
+        return await self._request(self._diff_request(commit_hash))
+
+    async def get_commit_diff_excerpt(
+        self,
+        commit_hash: str,
+        max_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_bytes: Optional[int] = None,
+        paths: Optional[List[str]] = None,
+    ) -> Optional[DiffExcerpt]:
+        """
+        Stream the diff of the specified commit, stopping once a line/byte budget is reached
+
+        Args:
+            commit_hash: The commit hash value
+            max_lines: Maximum number of diff lines to read (unlimited if None)
+            max_bytes: Maximum number of decoded diff bytes to read (unlimited if None)
+            paths: Only include the diff of these files or directories (whole commit if None)
+
+        Returns:
+            DiffExcerpt with the leading part of the diff, or None if not found
+        """
+        if self.backend is not None:
+            return await asyncio.to_thread(
+                call_backend,
+                read_local_diff_excerpt,
+                self.backend,
+                commit_hash,
+                max_lines,
+                max_bytes,
+                paths,
+            )
+        return as_diff_excerpt(
+            await self._request(
+                self._diff_excerpt_request(commit_hash, max_lines, max_bytes, paths)
+            )
+        )
+
+    async def _get_commit_parts(
+        self,
+        commit_info: Dict,
+        details: bool,
+        diff: bool,
+        max_diff_lines: Optional[int],
+        max_diff_bytes: Optional[int],
+        diff_paths: Optional[List[str]],
+    ) -> Tuple[Optional[Dict], Optional[DiffExcerpt]]:
+        """Concurrently fetch the details and/or diff excerpt of an already resolved commit"""
+        commit_hash = commit_info.get("commit")
+        if not commit_hash:
+            return None, None
+        details_task = self.get_commit_details(commit_hash) if details else _none()
+        diff_task = (
+            self.get_commit_diff_excerpt(
+                commit_hash, max_diff_lines, max_diff_bytes, diff_paths
+            )
+            if diff
+            else _none()
+        )
+        commit_details, commit_diff = await asyncio.gather(details_task, diff_task)
+        return commit_details, commit_diff
+
+    async def get_file_commit_info(
+        self,
+        file_path: str,
+        detailed: bool = True,
+        show_diff: bool = False,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        file_diff_only: bool = False,
+        extra_diff_paths: Optional[List[str]] = None,
+    ) -> Optional[str]:
+        """
+        Get complete commit information for a file
+
+        Args:
+            file_path: File path
+            detailed: Whether to get detailed information (including all modified files)
+            show_diff: Whether to show diff code comparison
+            max_diff_lines: Maximum diff lines to download and show (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download and show (unlimited if None)
+            file_diff_only: Only show the diff of file_path instead of the whole commit
+            extra_diff_paths: Other files of the commit to include with file_diff_only
+
+        Returns:
+            Formatted commit information string
+        """
+        commit_info = await self.get_file_latest_commit(file_path)
+        if not commit_info:
+            return None
+
+        return await self.get_formatted_commit_info(
+            commit_info,
+            detailed,
+            show_diff,
+            max_diff_lines=max_diff_lines,
+            max_diff_bytes=max_diff_bytes,
+            diff_paths=file_diff_paths(
+                file_path.replace("\\", "/"), file_diff_only, extra_diff_paths
+            ),
+        )
+
+    async def get_formatted_commit_info(
+        self,
+        commit_info: Dict,
+        detailed: bool = True,
+        show_diff: bool = False,
+        requested_paths: Optional[List[str]] = None,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        diff_paths: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Fetch details and diff for an already resolved commit concurrently and format them
+
+        Args:
+            commit_info: Basic commit information, e.g. from get_file_latest_commit
+            detailed: Whether to get detailed information (including all modified files)
+            show_diff: Whether to show diff code comparison
+            requested_paths: Queried file paths whose latest change is this commit (optional)
+            max_diff_lines: Maximum diff lines to download and show (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download and show (unlimited if None)
+            diff_paths: Only show the diff of these files (whole commit if None)
+
+        Returns:
+            Formatted commit information string
+        """
+        commit_details, commit_diff = await self._get_commit_parts(
+            commit_info, detailed, show_diff, max_diff_lines, max_diff_bytes, diff_paths
+        )
+        return await asyncio.to_thread(
+            format_commit_info,
+            commit_info,
+            commit_details,
+            show_diff,
+            commit_diff,
+            requested_paths,
+        )
+
+    async def get_file_commit_record(
+        self,
+        file_path: str,
+        fields: Optional[List[str]] = None,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        file_diff_only: bool = False,
+        extra_diff_paths: Optional[List[str]] = None,
+    ) -> Optional[CommitRecord]:
+        """
+        Get the latest commit of a file as a structured record
+
+        Args:
+            file_path: File path
+            fields: Fields to include (all if None); leaving out "files" or "diff"
+                skips downloading the commit details or diff
+            max_diff_lines: Maximum diff lines to download (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download (unlimited if None)
+            file_diff_only: Only include the diff of file_path instead of the whole commit
+            extra_diff_paths: Other files of the commit to include with file_diff_only
+
+        Returns:
+            CommitRecord, or None if no commit was found
+        """
+        commit_info = await self.get_file_latest_commit(file_path)
+        if not commit_info:
+            return None
+
+        normalized_path = file_path.replace("\\", "/")
+        return await self.get_commit_record(
+            commit_info,
+            fields,
+            requested_paths=[normalized_path],
+            max_diff_lines=max_diff_lines,
+            max_diff_bytes=max_diff_bytes,
+            diff_paths=file_diff_paths(normalized_path, file_diff_only, extra_diff_paths),
+        )
+
+    async def get_commit_record(
+        self,
+        commit_info: Dict,
+        fields: Optional[List[str]] = None,
+        requested_paths: Optional[List[str]] = None,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        diff_paths: Optional[List[str]] = None,
+    ) -> CommitRecord:
+        """
+        Concurrently fetch what the selected fields need and build the commit's record
+
+        Args:
+            commit_info: Basic commit information, e.g. from get_file_latest_commit
+            fields: Fields to include (all if None)
+            requested_paths: Queried file paths whose latest change is this commit (optional)
+            max_diff_lines: Maximum diff lines to download (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download (unlimited if None)
+            diff_paths: Only include the diff of these files (whole commit if None)
+
+        Returns:
+            CommitRecord with only the selected fields set
+        """
+        commit_details, commit_diff = await self._get_commit_parts(
+            commit_info,
+            wants_field(fields, "files"),
+            wants_field(fields, "diff"),
+            max_diff_lines,
+            max_diff_bytes,
+            diff_paths,
+        )
+        return build_commit_record(
+            commit_info, commit_details, commit_diff, requested_paths, fields
+        )
+
+    async def get_files_commit_records(
+        self,
+        file_paths: List[str],
+        fields: Optional[List[str]] = None,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        file_diff_only: bool = True,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> List[Tuple[List[str], Union[CommitRecord, GitilesError, None]]]:
+        """
+        Resolve structured commit records for many files concurrently
+
+        Async counterpart of batch_get_commits.iter_batch_records: duplicate paths
+        are looked up once, and files whose latest change is the same commit share
+        one record and a single details/diff download.
+
+        Args:
+            file_paths: File paths to look up
+            fields: Record fields to include (all if None)
+            max_diff_lines: Maximum diff lines to download per commit (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download per commit (unlimited if None)
+            file_diff_only: Only include the diff of the requested files covered by each commit
+            concurrency: Maximum number of lookups or downloads running at the same time
+
+        Returns:
+            List of (file paths covered, CommitRecord, None if not found, or the
+            GitilesError that prevented the lookup) in order of first appearance
+            in file_paths; one failed request does not fail the others
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        unique_paths = list(dict.fromkeys(path.replace("\\", "/") for path in file_paths))
+
+        async def lookup(file_path: str) -> Union[Dict, GitilesError, None]:
+            async with semaphore:
+                try:
+                    return await self.get_file_latest_commit(file_path)
+                except GitilesError as e:
+                    return e
+
+        latest_commits = await asyncio.gather(*(lookup(path) for path in unique_paths))
+        groups = group_paths_by_commit(zip(unique_paths, latest_commits))
+
+        async def render(
+            commit_info: Union[Dict, GitilesError, None], paths: List[str]
+        ) -> Union[CommitRecord, GitilesError, None]:
+            if isinstance(commit_info, GitilesError):
+                return commit_info
+            if not commit_info:
+                return None
+            async with semaphore:
+                try:
+                    return await self.get_commit_record(
+                        commit_info,
+                        fields,
+                        requested_paths=paths,
+                        max_diff_lines=max_diff_lines,
+                        max_diff_bytes=max_diff_bytes,
+                        diff_paths=paths if file_diff_only else None,
+                    )
+                except GitilesError as e:
+                    return e
+
+        records = await asyncio.gather(
+            *(render(commit_info, paths) for commit_info, paths in groups)
+        )
+        return [(paths, record) for (_, paths), record in zip(groups, records)]
+
+
+async def _none() -> None:
+    """Placeholder coroutine for a request that is not needed"""
+    return None
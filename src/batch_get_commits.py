@@ -4,8 +4,300 @@ Batch get latest change information for multiple files in Chromium repository
 """
 
 import argparse
+import contextlib
+import logging
+import os
 import sys
-from get_chromium_commits import ChromiumCommitFetcher
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from batching import DEFAULT_CONCURRENCY, iter_paths_by_commit
+from commit_cache import add_cache_arguments, open_cache
+from commit_records import CommitRecord, RecordWriter, add_output_arguments
+from local_git import add_git_arguments, open_backend
+from metrics import add_stats_arguments, enable_stats_report
+from path_index import add_index_arguments, open_path_index
+from get_chromium_commits import (
+    DEFAULT_MAX_DIFF_LINES,
+    ChromiumCommitFetcher,
+    add_diff_arguments,
+    add_session_arguments,
+    setup_logging,
+)
+
+# Default cap on requests per second to googlesource in batch mode
+DEFAULT_BATCH_RATE_LIMIT = 10.0
+# Commit groups held back waiting for more files of their commit before being
+# rendered; a file of the same commit seen later is rendered in a group of its own
+GROUP_WINDOW = 64
+
+logger = logging.getLogger(__name__)
+
+
+def _ordered_map(
+    executor: ThreadPoolExecutor,
+    func: Callable,
+    items: Iterable,
+    window: int,
+) -> Iterator[Tuple[object, object]]:
+    """
+    Apply func to items on the executor and yield (item, result) in input order
+
+    At most `window` calls are queued ahead of the next result to be yielded, and
+    each result is yielded as soon as it and every result before it are done.
+    A call that raised yields its exception as the result.
+    """
+    pending = deque()
+    items = iter(items)
+    sentinel = object()
+
+    def submit_next() -> bool:
+        item = next(items, sentinel)
+        if item is sentinel:
+            return False
+        pending.append((item, executor.submit(func, item)))
+        return True
+
+    while len(pending) < window and submit_next():
+        pass
+
+    while pending:
+        item, future = pending.popleft()
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning("Error when processing %s: %s", item, e)
+            result = e
+        submit_next()
+        yield item, result
+
+
+def _iter_batch(
+    fetcher: ChromiumCommitFetcher,
+    file_paths: List[str],
+    render: Callable[[Dict, List[str]], object],
+    concurrency: int,
+    dedupe: bool,
+) -> Iterator[Tuple[List[str], object]]:
+    """
+    Resolve the latest commit of many files concurrently and render each group
+
+    Args:
+        fetcher: Fetcher shared by all worker threads
+        file_paths: File paths to look up
+        render: Called with (commit information, covered paths) on a worker thread
+        concurrency: Maximum number of requests in flight at the same time
+        dedupe: Whether to merge files that resolve to the same commit
+
+    Yields:
+        Tuples of (file paths covered, rendered result, None if no commit was found,
+        or the exception raised while looking it up or rendering it)
+    """
+    concurrency = max(1, concurrency)
+    window = concurrency * 2
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latest_commits = _ordered_map(
+            executor, fetcher.get_file_latest_commit, file_paths, window
+        )
+        # Lazy, so results are rendered and written while later lookups still run
+        if dedupe:
+            groups = iter_paths_by_commit(latest_commits, GROUP_WINDOW)
+        else:
+            groups = (
+                (commit_info, [file_path])
+                for file_path, commit_info in latest_commits
+            )
+
+        def render_group(group: Tuple[Union[Dict, Exception, None], List[str]]) -> object:
+            commit_info, paths = group
+            if isinstance(commit_info, Exception):
+                return commit_info
+            if not commit_info:
+                return None
+            return render(commit_info, paths)
+
+        for (_, paths), result in _ordered_map(executor, render_group, groups, window):
+            yield paths, result
+
+
+def _diff_paths(
+    paths: List[str], file_diff_only: bool, extra_diff_paths: Optional[List[str]]
+) -> Optional[List[str]]:
+    """Files whose diff is shown for a group (whole commit if None)"""
+    if not file_diff_only:
+        return None
+    return paths + list(extra_diff_paths or [])
+
+
+def iter_batch_results(
+    fetcher: ChromiumCommitFetcher,
+    file_paths: List[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    dedupe: bool = True,
+    max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+    max_diff_bytes: Optional[int] = None,
+    file_diff_only: bool = False,
+    extra_diff_paths: Optional[List[str]] = None,
+) -> Iterator[Tuple[List[str], Optional[str]]]:
+    """
+    Resolve commit information for many files concurrently
+
+    The latest commit of every file is resolved concurrently, and each block is
+    rendered while later lookups are still running. With dedupe enabled, files
+    whose latest change is the same commit share a single details/diff download
+    and a single formatted block listing all of them, as long as they are no
+    more than GROUP_WINDOW commits apart in file_paths. Blocks are yielded in
+    order of first appearance in file_paths, each one as soon as it and every
+    block before it have completed.
+
+    Args:
+        fetcher: Fetcher shared by all worker threads
+        file_paths: File paths to look up
+        concurrency: Maximum number of requests in flight at the same time
+        dedupe: Whether to merge files that resolve to the same commit
+        max_diff_lines: Maximum diff lines to download per commit (unlimited if None)
+        max_diff_bytes: Maximum diff bytes to download per commit (unlimited if None)
+        file_diff_only: Only show the diff of the requested files covered by each commit
+        extra_diff_paths: Other files to include in each diff with file_diff_only
+
+    Yields:
+        Tuples of (file paths covered, formatted commit information, None if not
+        found, or the GitilesError that prevented the lookup)
+    """
+
+    def render(commit_info: Dict, paths: List[str]) -> str:
+        # Get detailed information and diff by default
+        return fetcher.get_formatted_commit_info(
+            commit_info,
+            detailed=True,
+            show_diff=True,
+            requested_paths=paths if dedupe else None,
+            max_diff_lines=max_diff_lines,
+            max_diff_bytes=max_diff_bytes,
+            diff_paths=_diff_paths(paths, file_diff_only, extra_diff_paths),
+        )
+
+    return _iter_batch(fetcher, file_paths, render, concurrency, dedupe)
+
+
+def iter_batch_records(
+    fetcher: ChromiumCommitFetcher,
+    file_paths: List[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    dedupe: bool = True,
+    fields: Optional[List[str]] = None,
+    max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+    max_diff_bytes: Optional[int] = None,
+    file_diff_only: bool = False,
+    extra_diff_paths: Optional[List[str]] = None,
+) -> Iterator[Tuple[List[str], Optional[CommitRecord]]]:
+    """
+    Resolve structured commit records for many files concurrently
+
+    Works like iter_batch_results but yields CommitRecord objects, and only
+    downloads the commit details or diff when the selected fields need them.
+
+    Args:
+        fetcher: Fetcher shared by all worker threads
+        file_paths: File paths to look up
+        concurrency: Maximum number of requests in flight at the same time
+        dedupe: Whether to merge files that resolve to the same commit
+        fields: Record fields to include (all if None)
+        max_diff_lines: Maximum diff lines to download per commit (unlimited if None)
+        max_diff_bytes: Maximum diff bytes to download per commit (unlimited if None)
+        file_diff_only: Only include the diff of the requested files covered by each commit
+        extra_diff_paths: Other files to include in each diff with file_diff_only
+
+    Yields:
+        Tuples of (file paths covered, CommitRecord, None if not found, or the
+        GitilesError that prevented the lookup)
+    """
+
+    def render(commit_info: Dict, paths: List[str]) -> CommitRecord:
+        return fetcher.get_commit_record(
+            commit_info,
+            fields,
+            requested_paths=paths,
+            max_diff_lines=max_diff_lines,
+            max_diff_bytes=max_diff_bytes,
+            diff_paths=_diff_paths(paths, file_diff_only, extra_diff_paths),
+        )
+
+    return _iter_batch(fetcher, file_paths, render, concurrency, dedupe)
+
+
+def checkpoint_path(output_path: str) -> str:
+    """Path of the checkpoint file listing the files already written to output_path"""
+    return output_path + ".done"
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """
+    Read the file paths recorded in a checkpoint
+
+    Returns:
+        Set of completed file paths (empty if the checkpoint does not exist)
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+class BatchOutput:
+    """Write batch results as they complete and checkpoint the files they cover"""
+
+    def __init__(
+        self,
+        stream: IO[str],
+        output_format: str,
+        checkpoint: Optional[IO[str]] = None,
+        append: bool = False,
+    ):
+        """
+        Args:
+            stream: Text stream receiving the results
+            output_format: "text", "json" or "ndjson"
+            checkpoint: Text stream receiving one completed file path per line (optional)
+            append: Whether stream already holds results from an earlier run
+        """
+        self.stream = stream
+        self.output_format = output_format
+        self.checkpoint = checkpoint
+        self.records = RecordWriter(stream, output_format)
+        self.blocks = 1 if append else 0
+
+    def write(self, paths: List[str], result: object, done: bool = True):
+        """
+        Write the result for a group of files, then record the files as done
+
+        The result is flushed before the checkpoint, so an interrupted run never
+        marks a file as done without its result on disk. Files whose lookup
+        failed are written with done=False, so --resume tries them again.
+        """
+        if self.output_format == "text":
+            if self.blocks:
+                self.stream.write("\n\n")
+            self.stream.write(result)
+            self.blocks += 1
+        else:
+            self.records.write(result)
+        self.stream.flush()
+
+        if self.checkpoint and done:
+            for path in paths:
+                self.checkpoint.write(path + "\n")
+            self.checkpoint.flush()
+
+    def close(self):
+        """Finish the output document"""
+        if self.output_format == "text":
+            self.stream.write("\n")
+        else:
+            self.records.close()
+        self.stream.flush()
 
 
 def main():
@@ -19,8 +311,42 @@ def main():
         help="Text file containing list of file paths (one file path per line)",
     )
     parser.add_argument("--output", "-o", help="Save output to specified file")
+    parser.add_argument(
+        "--concurrency",
+        "-j",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Number of requests to run in parallel (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        help="Output one block per file instead of one block per distinct commit",
+    )
+    add_session_arguments(parser)
+    add_cache_arguments(parser)
+    add_diff_arguments(parser)
+    add_output_arguments(parser)
+    add_git_arguments(parser)
+    add_index_arguments(parser)
+    add_stats_arguments(parser)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to --output, skipping files recorded as done by an interrupted run",
+    )
+    parser.set_defaults(rate_limit=DEFAULT_BATCH_RATE_LIMIT)
 
     args = parser.parse_args()
+    setup_logging()
+    enable_stats_report(args.stats)
+    if args.resume and not args.output:
+        print("Error: --resume requires --output")
+        sys.exit(1)
+    if args.resume and args.format == "json":
+        print("Error: --resume cannot append to a JSON document, use --format ndjson")
+        sys.exit(1)
+
     # Read file list
     try:
         with open(args.file_list, "r", encoding="utf-8") as f:
@@ -38,43 +364,103 @@ def main():
         print("Error: File list is empty")
         sys.exit(1)
 
-    fetcher = ChromiumCommitFetcher()
-    results = []
+    append = False
+    if args.resume:
+        done = load_checkpoint(checkpoint_path(args.output))
+        remaining = [path for path in file_paths if path not in done]
+        print(f"Resuming: {len(file_paths) - len(remaining)} files already processed")
+        file_paths = remaining
+        append = os.path.exists(args.output) and os.path.getsize(args.output) > 0
+        if not file_paths:
+            print(f"Batch processing completed, results saved to: {args.output}")
+            return
+
+    backend = open_backend(args.git_dir, args.git_revision)
+    # Size the connection pool so every worker can keep its own connection alive
+    fetcher = ChromiumCommitFetcher(
+        pool_size=max(args.pool_size, args.concurrency),
+        max_retries=args.retries,
+        rate_limit=args.rate_limit,
+        cache=None if args.no_cache else open_cache(args.cache_dir, args.cache_size),
+        backend=backend,
+        path_index=open_path_index(args.path_index),
+    )
+    structured = args.format != "text"
+    batch_options = dict(
+        dedupe=not args.no_dedupe,
+        max_diff_lines=args.max_diff_lines or None,
+        max_diff_bytes=args.max_diff_bytes or None,
+        file_diff_only=args.file_diff_only,
+        extra_diff_paths=args.diff_path,
+    )
+
+    with contextlib.ExitStack() as stack:
+        if args.output:
+            mode = "a" if args.resume else "w"
+            try:
+                stream = stack.enter_context(open(args.output, mode, encoding="utf-8"))
+                checkpoint = stack.enter_context(
+                    open(checkpoint_path(args.output), mode, encoding="utf-8")
+                )
+            except OSError as e:
+                print(f"Error opening output file: {e}")
+                sys.exit(1)
+        else:
+            stream = sys.stdout
+            checkpoint = None
+        output = BatchOutput(stream, args.format, checkpoint, append)
 
-    print(f"Starting to process {len(file_paths)} files...")
-    print("-" * 80)
+        # Keep progress messages out of the results whenever those go to stdout
+        if structured or not args.output:
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
 
-    for i, file_path in enumerate(file_paths, 1):
-        print(f"[{i}/{len(file_paths)}] Processing file: {file_path}")
+        print(
+            f"Starting to process {len(file_paths)} files "
+            f"(concurrency: {args.concurrency})..."
+        )
+        print("-" * 80)
 
-        # Get detailed information and diff by default
-        result = fetcher.get_file_commit_info(file_path, detailed=True, show_diff=True)
-        if result:
-            results.append(result)
+        if structured:
+            batch = iter_batch_records(
+                fetcher, file_paths, args.concurrency, fields=args.fields, **batch_options
+            )
         else:
-            error_msg = f"File {file_path} commit information not found"
-            print(f"  ✗ {error_msg}")
-            results.append(f"Error: {error_msg}")
+            batch = iter_batch_results(
+                fetcher, file_paths, args.concurrency, **batch_options
+            )
 
-        print()
+        processed = 0
+        for paths, result in batch:
+            processed += len(paths)
+            print(f"[{processed}/{len(file_paths)}] Processed file: {', '.join(paths)}")
 
-    # Output results
-    final_output = "\n\n".join(results)
+            if isinstance(result, Exception):
+                error_msg = f"Gitiles request for {', '.join(paths)} failed: {result}"
+                print(f"  ✗ {error_msg}")
+                if structured:
+                    output.write(
+                        paths, {"requested_paths": paths, "error": error_msg}, done=False
+                    )
+                else:
+                    output.write(paths, f"Error: {error_msg}", done=False)
+            elif result:
+                output.write(paths, result.to_dict() if structured else result)
+            else:
+                error_msg = f"File {paths[0]} commit information not found"
+                print(f"  ✗ {error_msg}")
+                if structured:
+                    output.write(paths, {"requested_paths": paths, "error": error_msg})
+                else:
+                    output.write(paths, f"Error: {error_msg}")
 
-    if args.output:
-        try:
-            with open(args.output, "w", encoding="utf-8") as f:
-                f.write(final_output)
+            print()
+
+        output.close()
+
+        if args.output:
             print(f"Batch processing completed, results saved to: {args.output}")
-        except Exception as e:
-            print(f"Error saving file: {e}")
-            print("\n" + final_output)
-    else:
-        print("Batch processing completed\n")
-        print("=" * 80)
-        print("Summary Results")
-        print("=" * 80)
-        print(final_output)
+        else:
+            print("Batch processing completed")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the multi-file lookups
+
+Used by the batch command line tool, the async fetcher and the MCP server's
+multi-file tool: grouping files by the commit that last changed them, so each
+commit is downloaded and reported once.
+"""
+
+from collections import deque
+from collections.abc import Mapping
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Default number of files resolved in parallel
+DEFAULT_CONCURRENCY = 8
+
+
+def iter_paths_by_commit(
+    latest_commits: Iterable[Tuple[str, Union[Dict, Exception, None]]],
+    window: Optional[int] = None,
+) -> Iterator[Tuple[Union[Dict, Exception, None], List[str]]]:
+    """
+    Lazily group file paths by the hash of their latest commit
+
+    Groups are yielded in the order in which each commit was first seen. Paths
+    without a resolved commit each get their own group with a None commit, or
+    with the exception raised by their lookup. At most `window` groups are held
+    back waiting for more paths of their commit; once the oldest one is yielded,
+    a later path of the same commit starts a new group.
+
+    Args:
+        latest_commits: Tuples of (file path, latest commit information or None), or
+            (file path, exception) when the lookup failed
+        window: Maximum number of groups held back (unbounded if None)
+
+    Yields:
+        Pairs of (group commit, file paths), where the group commit is the commit
+        information, None if not found, or the exception raised by the lookup
+    """
+    pending: Deque[Tuple[Union[Dict, Exception, None], List[str]]] = deque()
+    open_groups: Dict[str, Tuple[Dict, List[str]]] = {}
+
+    for file_path, commit_info in latest_commits:
+        if isinstance(commit_info, Exception):
+            pending.append((commit_info, [file_path]))
+        else:
+            commit_hash = commit_info.get("commit") if commit_info else None
+            if not commit_hash:
+                pending.append((None, [file_path]))
+            elif commit_hash in open_groups:
+                open_groups[commit_hash][1].append(file_path)
+            else:
+                open_groups[commit_hash] = (commit_info, [file_path])
+                pending.append(open_groups[commit_hash])
+
+        while window is not None and len(pending) > window:
+            yield _close_group(pending.popleft(), open_groups)
+
+    while pending:
+        yield _close_group(pending.popleft(), open_groups)
+
+
+def _close_group(
+    group: Tuple[Union[Dict, Exception, None], List[str]],
+    open_groups: Dict[str, Tuple[Dict, List[str]]],
+) -> Tuple[Union[Dict, Exception, None], List[str]]:
+    """Stop adding paths to a group that is about to be yielded"""
+    commit_info = group[0]
+    # Commits served from the memory cache are Mappings rather than dicts
+    if isinstance(commit_info, Mapping):
+        open_groups.pop(commit_info.get("commit"), None)
+    return group
+
+
+def group_paths_by_commit(
+    latest_commits: Iterable[Tuple[str, Union[Dict, Exception, None]]],
+) -> List[Tuple[Union[Dict, Exception, None], List[str]]]:
+    """
+    Group file paths by the hash of their latest commit
+
+    Groups keep the order in which each commit was first seen. Paths without a
+    resolved commit each get their own group with a None commit, or with the
+    exception raised by their lookup.
+
+    Args:
+        latest_commits: Tuples of (file path, latest commit information or None), or
+            (file path, exception) when the lookup failed
+
+    Returns:
+        List of (group commit, file paths) pairs, where the group commit is the
+        commit information, None if not found, or the exception raised by the lookup
+    """
+    return list(iter_paths_by_commit(latest_commits))
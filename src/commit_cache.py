@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for Chromium Gitiles responses
+
+Features:
+- SQLite database of zlib-compressed JSON values keyed by request (e.g. "details:<hash>")
+- Entries for immutable objects (commit details and diffs) never expire
+- Entries for mutable results (e.g. +log/HEAD/<path>) expire after a TTL
+- Total size is capped, least recently used entries are evicted first
+- Safe to share between threads and between processes using the same file
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Optional, Tuple
+
+# Default cache location, can be overridden with CHROMIUM_COMMITS_CACHE_DIR
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "chromium-commits"
+)
+DEFAULT_CACHE_SIZE_MB = 512
+# Time-to-live for results that can change, e.g. the latest commit of a path
+DEFAULT_LOG_TTL = 300
+# How long HEAD, once resolved to a commit hash, is trusted before asking again
+DEFAULT_HEAD_TTL = 30
+# Latest-commit lookups pinned to a HEAD hash never change; once HEAD moves they are
+# revalidated against the new HEAD and replaced, so this only drops paths no longer asked for
+PINNED_LOG_TTL = 24 * 3600
+
+# Only full object ids are immutable; refs such as HEAD must never be cached forever
+_COMMIT_HASH_RE = re.compile(r"^[0-9a-f]{40}$")
+
+logger = logging.getLogger(__name__)
+
+
+def is_immutable_commit(commit_hash: str) -> bool:
+    """Check whether a revision is a full commit hash (and therefore immutable)"""
+    return bool(_COMMIT_HASH_RE.match(commit_hash or ""))
+
+
+class CommitCache:
+    """SQLite-backed size-capped LRU cache with optional per-entry TTL"""
+
+    def __init__(self, cache_dir: str, max_size_mb: float = DEFAULT_CACHE_SIZE_MB):
+        """
+        Args:
+            cache_dir: Directory holding the cache database (created if missing)
+            max_size_mb: Maximum total size of stored (compressed) values in megabytes
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "cache.sqlite3")
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        # WAL lets several processes read while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO meta (name, value)
+                SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries;
+            """
+        )
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        """
+        Get a cached value together with its expiry time
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, expires_at timestamp or None if it never expires),
+            or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+
+        return json.loads(zlib.decompress(value)), expires_at
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Seconds until the entry expires (never expires if None)
+        """
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                old_size = row[0] if row else 0
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), expires_at, now),
+                )
+                self._conn.execute(
+                    "UPDATE meta SET value = value + ? WHERE name = 'total_size'",
+                    (len(blob) - old_size,),
+                )
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones, until under the size cap"""
+        total = self._conn.execute(
+            "SELECT value FROM meta WHERE name = 'total_size'"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        freed = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE expires_at <= ?", (now,)
+        ).fetchone()[0]
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total -= freed
+
+        # Evict down to 90% of the cap so eviction does not run on every write
+        target = int(self.max_bytes * 0.9)
+        if total > target:
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at"
+            ).fetchall():
+                if total <= target:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+
+        self._conn.execute(
+            "UPDATE meta SET value = ? WHERE name = 'total_size'", (total,)
+        )
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser):
+    """Add on-disk cache options shared by the command line tools"""
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv("CHROMIUM_COMMITS_CACHE_DIR", DEFAULT_CACHE_DIR),
+        help=f"Directory of the persistent response cache (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=DEFAULT_CACHE_SIZE_MB,
+        help=f"Maximum cache size in megabytes (default: {DEFAULT_CACHE_SIZE_MB})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the persistent response cache",
+    )
+
+
+def open_cache(
+    cache_dir: Optional[str], max_size_mb: float = DEFAULT_CACHE_SIZE_MB
+) -> Optional[CommitCache]:
+    """
+    Open the persistent cache, falling back to no caching if it is unusable
+
+    Args:
+        cache_dir: Cache directory, or None/empty to disable caching
+        max_size_mb: Maximum cache size in megabytes
+
+    Returns:
+        CommitCache instance, or None if caching is disabled or unavailable
+    """
+    if not cache_dir:
+        return None
+    try:
+        return CommitCache(cache_dir, max_size_mb)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Cache disabled, unable to open %s: %s", cache_dir, e)
+        return None
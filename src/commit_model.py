@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory representation of Gitiles commits
+
+Commits parsed from Gitiles JSON are dictionaries holding fields nothing
+reads (tree, parents, blob ids and file modes of every changed file), each
+with its own copy of author emails, change types and paths. Caches that keep
+many commits store them as Commit objects instead:
+
+- Slotted, frozen dataclasses with only the fields the formatters use
+- Author/committer names and emails, change types and paths are interned,
+  so strings repeated across commits are stored once
+- Commit is a read-only Mapping with the Gitiles keys ("commit", "author",
+  "committer", "message", "tree_diff"); the nested dictionaries are built
+  only when read, so code written against the JSON dictionaries keeps working
+"""
+
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Memory of a Commit apart from its character data on 64-bit CPython: the
+# object, two signatures, the change tuple and the headers of its own strings
+COMMIT_OVERHEAD = 420
+# Memory of one FileChange and its tuple slot, and the header of a path string
+FILE_CHANGE_OVERHEAD = 64
+STR_OVERHEAD = 49
+
+
+def _intern(value: Any, default: Optional[str] = "") -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else default
+
+
+@dataclass(frozen=True, slots=True)
+class Signature:
+    """Author or committer of a commit"""
+
+    # None when the source had no such key, so formatters still print "N/A"
+    name: Optional[str]
+    email: Optional[str]
+    # Gitiles time string, e.g. "Mon Oct 14 12:00:50 2024 +0200"
+    time: Optional[str]
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Signature":
+        return cls(
+            _intern(data.get("name"), None),
+            _intern(data.get("email"), None),
+            data.get("time"),
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        fields = (("name", self.name), ("email", self.email), ("time", self.time))
+        return {key: value for key, value in fields if value is not None}
+
+
+@dataclass(frozen=True, slots=True)
+class FileChange:
+    """One entry of a commit's tree_diff"""
+
+    type: str
+    old_path: str
+    new_path: str
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FileChange":
+        return cls(
+            _intern(data.get("type", "unknown")),
+            _intern(data.get("old_path", "")),
+            _intern(data.get("new_path", "")),
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"type": self.type, "old_path": self.old_path, "new_path": self.new_path}
+
+
+@dataclass(frozen=True, slots=True)
+class Commit(Mapping):
+    """Commit information with the keys of a Gitiles commit dictionary"""
+
+    commit: str
+    author: Optional[Signature] = None
+    committer: Optional[Signature] = None
+    message: Optional[str] = None
+    # None when the source had no tree_diff (e.g. a +log entry without name-status)
+    changes: Optional[Tuple[FileChange, ...]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Commit":
+        """Keep the used fields of a Gitiles commit dictionary"""
+        author = data.get("author")
+        committer = data.get("committer")
+        tree_diff = data.get("tree_diff")
+        return cls(
+            data.get("commit", ""),
+            Signature.from_dict(author) if isinstance(author, dict) else None,
+            Signature.from_dict(committer) if isinstance(committer, dict) else None,
+            data.get("message"),
+            tuple(FileChange.from_dict(change) for change in tree_diff)
+            if isinstance(tree_diff, list)
+            else None,
+        )
+
+    def _keys(self) -> Iterator[str]:
+        yield "commit"
+        if self.author is not None:
+            yield "author"
+        if self.committer is not None:
+            yield "committer"
+        if self.message is not None:
+            yield "message"
+        if self.changes is not None:
+            yield "tree_diff"
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "commit":
+            return self.commit
+        if key == "author" and self.author is not None:
+            return self.author.to_dict()
+        if key == "committer" and self.committer is not None:
+            return self.committer.to_dict()
+        if key == "message" and self.message is not None:
+            return self.message
+        if key == "tree_diff" and self.changes is not None:
+            return [change.to_dict() for change in self.changes]
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in tuple(self._keys())
+
+    def __iter__(self) -> Iterator[str]:
+        return self._keys()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to a plain (JSON-serializable) Gitiles commit dictionary"""
+        return {key: self[key] for key in self._keys()}
+
+    def estimated_size(self) -> int:
+        """Rough memory held by this commit, for cache size accounting"""
+        # Interned names, emails and change types are shared between commits
+        # and not counted; paths are, since most appear in few commits
+        size = COMMIT_OVERHEAD + len(self.commit) + len(self.message or "")
+        for person in (self.author, self.committer):
+            if person is not None:
+                size += len(person.time or "")
+        for change in self.changes or ():
+            size += FILE_CHANGE_OVERHEAD + STR_OVERHEAD + len(change.new_path)
+            if change.old_path is not change.new_path:
+                size += STR_OVERHEAD + len(change.old_path)
+        return size
+
+
+def is_commit_dict(value: Any) -> bool:
+    """Check whether a value looks like a Gitiles commit dictionary"""
+    return isinstance(value, dict) and "commit" in value and "message" in value
+
+
+def compact_value(value: Any) -> Any:
+    """
+    Convert cached Gitiles commits to Commit objects, leaving other values alone
+
+    Handles single commits (commit details), pinned latest-commit lookups
+    ({"head": hash, "latest": commit}) and +log pages ({"log": [commits], "next": ...}).
+
+    Args:
+        value: Value about to be cached
+
+    Returns:
+        The compact equivalent of value, or value itself
+    """
+    if is_commit_dict(value):
+        return Commit.from_dict(value)
+    if isinstance(value, dict) and is_commit_dict(value.get("latest")):
+        return {**value, "latest": Commit.from_dict(value["latest"])}
+    if isinstance(value, dict) and isinstance(value.get("log"), list):
+        return {
+            **value,
+            "log": [Commit.from_dict(c) if is_commit_dict(c) else c for c in value["log"]],
+        }
+    return value
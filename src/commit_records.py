@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Structured commit records for machine consumers
+
+Features:
+- CommitRecord: typed commit information that serializes straight to JSON
+- Field selection so callers can skip expensive parts (file list, diff)
+- JSON and NDJSON writers, one record per line for streaming batch output
+- Compact text rendering of records grouped by commit for multi-file queries
+"""
+
+import argparse
+import json
+from dataclasses import dataclass, fields as dataclass_fields
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# Fields a record can carry, in output order; "commit" is always included
+RECORD_FIELDS = (
+    "commit",
+    "author",
+    "committer",
+    "time",
+    "message",
+    "requested_paths",
+    "files",
+    "diff",
+)
+OUTPUT_FORMATS = ("text", "json", "ndjson")
+# Record fields of each detail level of multi-file queries; "summary" and
+# "files" only keep the subject line of the message
+DETAIL_LEVELS = {
+    "summary": ["commit", "author", "time", "message", "requested_paths"],
+    "files": ["commit", "author", "time", "message", "requested_paths", "files"],
+    "full": [
+        "commit",
+        "author",
+        "committer",
+        "time",
+        "message",
+        "requested_paths",
+        "files",
+    ],
+}
+
+
+@dataclass
+class CommitRecord:
+    """Commit information as plain data; unselected fields stay None and are omitted"""
+
+    commit: str
+    author: Optional[Dict[str, str]] = None
+    committer: Optional[Dict[str, str]] = None
+    # Commit time in ISO 8601 (UTC)
+    time: Optional[str] = None
+    message: Optional[str] = None
+    requested_paths: Optional[List[str]] = None
+    # One {"type", "old_path", "new_path"} entry per changed file
+    files: Optional[List[Dict[str, str]]] = None
+    # {"text", "line_count", "truncated", "omitted_bytes", "paths"}
+    diff: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary without the unselected fields"""
+        # Not dataclasses.asdict(), which would deep-copy the diff text
+        return {
+            field.name: getattr(self, field.name)
+            for field in dataclass_fields(self)
+            if getattr(self, field.name) is not None
+        }
+
+
+def detail_fields(detail: str, show_diff: bool = False) -> List[str]:
+    """
+    Record fields selected by a detail level
+
+    Args:
+        detail: "summary", "files" or "full"
+        show_diff: Whether to include the diff as well
+
+    Returns:
+        List of field names
+
+    Raises:
+        ValueError: If the detail level is unknown
+    """
+    if detail not in DETAIL_LEVELS:
+        raise ValueError(
+            f"unknown detail level {detail}; choose from {', '.join(DETAIL_LEVELS)}"
+        )
+    return DETAIL_LEVELS[detail] + (["diff"] if show_diff else [])
+
+
+def format_record_groups(
+    groups: List[Tuple[List[str], Union[CommitRecord, Exception, None]]],
+) -> str:
+    """
+    Format the records of a multi-file query compactly, one block per commit
+
+    Each block starts with a single line (hash, time, author, subject) followed
+    by the requested files it covers and whatever else the records carry:
+    changed files, the rest of the message and the diff. Files without a
+    commit, then files whose lookup failed, are listed at the end.
+
+    Args:
+        groups: Tuples of (requested file paths, their latest commit record, None
+            if not found, or the exception that prevented the lookup)
+
+    Returns:
+        Formatted string
+    """
+    found = [(paths, record) for paths, record in groups if isinstance(record, CommitRecord)]
+    not_found = [path for paths, record in groups if record is None for path in paths]
+    failed = [(paths, record) for paths, record in groups if isinstance(record, Exception)]
+
+    result = []
+    result.append("=" * 80)
+    result.append(
+        f"CHROMIUM REPOSITORY LATEST CHANGES: {sum(len(paths) for paths, _ in groups)} "
+        f"files in {len(found)} commits"
+    )
+    result.append("=" * 80)
+
+    for i, (paths, record) in enumerate(found):
+        if i:
+            result.append("-" * 80)
+        commit_time = record.time or ""
+        try:
+            commit_time = datetime.fromisoformat(commit_time).strftime("%Y-%m-%d %H:%M")
+        except ValueError:
+            pass
+        author = (record.author or {}).get("email") or "N/A"
+        subject, _, body = (record.message or "").partition("\n")
+        result.append(f"{record.commit[:12]}  {commit_time}  {author}  {subject}")
+        result.append(f"  Requested: {', '.join(paths)}")
+        if record.committer:
+            result.append(f"  Committer: {record.committer.get('email') or 'N/A'}")
+        if body.strip():
+            result.extend(f"  {line}" for line in body.strip().split("\n"))
+        if record.files is not None:
+            result.append(f"  Changed files ({len(record.files)}):")
+            for changed in record.files:
+                if changed["type"] == "delete":
+                    path = changed["old_path"]
+                elif changed["type"] == "rename":
+                    path = f"{changed['old_path']} -> {changed['new_path']}"
+                else:
+                    path = changed["new_path"] or changed["old_path"]
+                result.append(f"    {changed['type']:<7} {path}")
+        if record.diff and record.diff["text"]:
+            result.append(record.diff["text"].rstrip("\n"))
+            if record.diff["truncated"]:
+                result.append(
+                    f"  ... (diff truncated after {record.diff['line_count']} lines)"
+                )
+
+    if not_found:
+        if found:
+            result.append("-" * 80)
+        result.append(f"No commit found: {', '.join(not_found)}")
+    if failed:
+        if found or not_found:
+            result.append("-" * 80)
+        # Unlike not found, these files may well have a commit: retry them later
+        result.append("Lookup failed:")
+        for paths, error in failed:
+            result.append(f"  {', '.join(paths)}: {error}")
+    result.append("=" * 80)
+    return "\n".join(result)
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated field selection
+
+    Args:
+        value: e.g. "commit,author,message", or None/empty for all fields
+
+    Returns:
+        List of field names, or None for all fields
+
+    Raises:
+        ValueError: If a field name is unknown
+    """
+    if not value:
+        return None
+    selected = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in RECORD_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"unknown field(s) {', '.join(unknown)}; choose from {', '.join(RECORD_FIELDS)}"
+        )
+    return selected
+
+
+def wants_field(selected: Optional[List[str]], name: str) -> bool:
+    """Check whether a field is selected (None selects every field)"""
+    return selected is None or name in selected
+
+
+class RecordWriter:
+    """Write records to a stream one at a time as a JSON array or as NDJSON"""
+
+    def __init__(self, stream: IO[str], output_format: str):
+        """
+        Args:
+            stream: Text stream to write to
+            output_format: "json" or "ndjson"
+        """
+        self.stream = stream
+        self.output_format = output_format
+        self.count = 0
+
+    def write(self, record: Dict[str, Any]):
+        """Serialize and write one record"""
+        if self.output_format == "json":
+            self.stream.write(",\n" if self.count else "[\n")
+        self.stream.write(json.dumps(record, ensure_ascii=False))
+        if self.output_format == "ndjson":
+            self.stream.write("\n")
+        self.count += 1
+
+    def close(self):
+        """Finish the document (closes the JSON array); the stream is left open"""
+        if self.output_format == "json":
+            self.stream.write("\n]\n" if self.count else "[]\n")
+
+
+def write_records(
+    records: Iterable[Dict[str, Any]], stream: IO[str], output_format: str
+):
+    """
+    Write records as a JSON array or as NDJSON (one JSON object per line)
+
+    Records are serialized one at a time, so NDJSON output never holds more
+    than one record in memory.
+
+    Args:
+        records: Record dictionaries, e.g. from CommitRecord.to_dict()
+        stream: Text stream to write to
+        output_format: "json" or "ndjson"
+    """
+    writer = RecordWriter(stream, output_format)
+    for record in records:
+        writer.write(record)
+    writer.close()
+
+
+def _fields_argument(value: str) -> Optional[List[str]]:
+    try:
+        return parse_fields(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_output_arguments(parser: argparse.ArgumentParser):
+    """Add structured output options shared by the command line tools"""
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="text",
+        help="Output format: readable text, a JSON document or NDJSON records (default: text)",
+    )
+    parser.add_argument(
+        "--fields",
+        type=_fields_argument,
+        help=f"Comma-separated fields to include in JSON output ({','.join(RECORD_FIELDS)}); "
+        "leaving out files or diff skips downloading them",
+    )
@@ -3,7 +3,7 @@
 Example script: Demonstrates how to use ChromiumCommitFetcher class in code
 """
 
-from get_chromium_commits import ChromiumCommitFetcher
+from get_chromium_commits import ChromiumCommitFetcher, GitilesError
 
 
 def demonstrate_chromium_commit_fetcher():
@@ -22,8 +22,13 @@ def demonstrate_chromium_commit_fetcher():
         print(f"Checking file: {file_path}")
         print("=" * 60)
 
-        # Get the latest commit info for the file (basic info)
-        latest_commit_info = commit_fetcher.get_file_latest_commit(file_path)
+        # Get the latest commit info for the file (basic info); None means the file
+        # has no history, GitilesError that Gitiles could not be queried
+        try:
+            latest_commit_info = commit_fetcher.get_file_latest_commit(file_path)
+        except GitilesError as e:
+            print(f"✗ Request failed, try again later: {e}")
+            continue
 
         if latest_commit_info:
             commit_hash = latest_commit_info.get("commit", "N/A")
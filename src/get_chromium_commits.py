@@ -8,246 +8,2068 @@ Features:
 - Support for displaying detailed diff code comparison
 """
 
-import requests
+import itertools
 import json
+import logging
 import sys
 import argparse
-import base64
-from typing import Dict, Optional
-from datetime import datetime
+import contextlib
+import binascii
+import hashlib
+import importlib.util
+import io
+import os
+import sqlite3
+import threading
+import time
+import re
+from dataclasses import asdict, dataclass
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlsplit
+from commit_cache import (
+    DEFAULT_HEAD_TTL,
+    DEFAULT_LOG_TTL,
+    PINNED_LOG_TTL,
+    add_cache_arguments,
+    is_immutable_commit,
+    open_cache,
+)
+from commit_records import (
+    CommitRecord,
+    add_output_arguments,
+    wants_field,
+    write_records,
+)
+from local_git import GitError, LocalGitBackend, add_git_arguments, open_backend
+from memory_cache import SingleFlight
+from metrics import METRICS, add_stats_arguments, count_request, enable_stats_report, timed
+from path_index import PathIndex, add_index_arguments, open_path_index
 
+logger = logging.getLogger(__name__)
 
-class ChromiumCommitFetcher:
-    """Chromium repository commit information fetcher"""
 
-    def __init__(self):
-        # Chromium Gitiles API base URL
-        self.base_url = "https://chromium.googlesource.com/chromium/src"
+def _lazy_import(name: str):
+    """Import a module on first attribute access instead of right away"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Only the synchronous fetcher needs requests; loading it on first use keeps it
+# out of the MCP server's startup, which runs on httpx
+requests = _lazy_import("requests")
+
+# Chromium Gitiles API base URL, overridable e.g. to point at a mirror or the benchmark stand-in
+GITILES_BASE_URL = os.getenv(
+    "CHROMIUM_GITILES_URL", "https://chromium.googlesource.com/chromium/src"
+).rstrip("/")
+
+# Connection pool and retry defaults for Gitiles requests
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Gitiles answers 429 when the client exceeds its quota
+THROTTLED_STATUS = 429
+# Adaptive rate limiting: a host that throttles us has its rate multiplied by
+# THROTTLE_BACKOFF (never below MIN_RATE_LIMIT) and is paused for its Retry-After,
+# or DEFAULT_THROTTLE_PAUSE seconds without one. Hosts without a configured cap
+# start from DEFAULT_THROTTLED_RATE and are uncapped again once they recover to it
+THROTTLE_BACKOFF = 0.5
+MIN_RATE_LIMIT = 0.5
+DEFAULT_THROTTLE_PAUSE = 1.0
+DEFAULT_THROTTLED_RATE = 10.0
+# Default budget for diffs shown in formatted output
+DEFAULT_MAX_DIFF_LINES = 1000
+# Size of network reads when streaming diffs
+DIFF_CHUNK_SIZE = 64 * 1024
+# Leading bytes of a diff response inspected to tell base64 from plain text
+ENCODING_SNIFF_SIZE = 256
+_BASE64_RE = re.compile(rb"[A-Za-z0-9+/=\r\n]+\Z")
+# Commits requested per +log page when walking history
+DEFAULT_HISTORY_PAGE_SIZE = 50
+DEFAULT_HISTORY_LIMIT = 10
+# Commits requested per +log page when resolving a whole directory
+DEFAULT_DIRECTORY_PAGE_SIZE = 100
+# Commits a path index is caught up by from the Gitiles log; larger gaps are
+# left to `path_index.py update` and lookups skip the index meanwhile
+MAX_INDEX_CATCH_UP_COMMITS = 1000
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip",
+    "Connection": "keep-alive",
+    "User-Agent": "chromium-commits-mcp",
+}
+
+
+def create_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+) -> "requests.Session":
+    """
+    Create a keep-alive HTTP session with a connection pool for Gitiles requests
+
+    Args:
+        pool_size: Maximum number of pooled connections per host
+        max_retries: Number of retries for connection errors and 5xx responses
+        backoff_factor: Exponential backoff factor between retries (seconds)
+
+    Returns:
+        Configured requests session
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class SessionRetry(Retry):
+        # 429 is handled by the fetcher so every caller backs off together; by
+        # default urllib3 would retry it on its own whenever it has a Retry-After
+        RETRY_AFTER_STATUS_CODES = Retry.RETRY_AFTER_STATUS_CODES - {THROTTLED_STATUS}
+
+    retry = SessionRetry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[code for code in RETRY_STATUS_CODES if code != THROTTLED_STATUS],
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
 
-    def get_file_latest_commit(self, file_path: str) -> Optional[Dict]:
-        """
-        Get the latest commit information for the specified file
 
+class GitilesError(Exception):
+    """A Gitiles request failed (network error, throttling, bad response), as opposed to finding nothing"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header
+
+    Args:
+        value: Delay in seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if missing or not understood
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class _HostBucket:
+    """Token bucket state of one host"""
+
+    __slots__ = ("rate", "tokens", "last", "paused_until")
+
+    def __init__(self, rate: Optional[float], tokens: float, now: float):
+        # Current requests per second (None: not limited)
+        self.rate = rate
+        self.tokens = tokens
+        # Time tokens were last refilled; in the future while the host is paused
+        self.last = now
+        self.paused_until = 0.0
+
+
+class RateLimiter:
+    """
+    Thread-safe adaptive token bucket that caps the request rate to each host
+
+    Shared by every caller of a fetcher, so backpressure applies to all of them:
+    when a host answers 429, throttled() pauses all requests to it for the
+    Retry-After period and halves its rate; every successful response then
+    raises the rate again a little (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None):
+        """
         Args:
-            file_path: Relative path of the file, e.g. "components/sync/service/data_type_manager.cc"
+            rate: Maximum sustained requests per second for each host (no cap until
+                the host throttles us if None)
+            burst: Number of requests allowed back to back (defaults to one second's worth)
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, _HostBucket] = {}
+
+    def _bucket(self, host: str, now: float) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _HostBucket(
+                self.rate, float(self._burst(self.rate)), now
+            )
+        return bucket
+
+    def _burst(self, rate: Optional[float]) -> int:
+        return self.burst or max(1, int(rate or 1))
+
+    def current_rate(self, host: str) -> Optional[float]:
+        """Requests per second currently allowed to the host (None if not limited)"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            return bucket.rate if bucket else self.rate
+
+    def reserve(self, host: str) -> float:
+        """
+        Reserve one request slot for the host
 
         Returns:
-            Dictionary containing commit information, or None if not found
+            Number of seconds the caller must wait before sending the request
         """
-        # Normalize path format (use forward slashes)
-        normalized_path = file_path.replace("\\", "/")
-        # Build API URL to get commit history for this file
-        url = f"{self.base_url}/+log/HEAD/{normalized_path}?format=JSON&n=1"
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            if bucket.rate is None:
+                return max(0.0, bucket.paused_until - now)
+            if now > bucket.last:
+                bucket.tokens = min(
+                    float(self._burst(bucket.rate)),
+                    bucket.tokens + (now - bucket.last) * bucket.rate,
+                )
+                bucket.last = now
+            # Tokens may go negative: later callers queue up behind earlier reservations
+            bucket.tokens -= 1
+            return (bucket.last - now) + max(0.0, -bucket.tokens / bucket.rate)
+
+    def acquire(self, host: str):
+        """Block until a request to the host is allowed"""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttled(self, host: str, retry_after: Optional[float] = None):
+        """
+        Slow down after the host answered 429
+
+        Responses to requests already in flight when the first 429 arrived only
+        extend the pause, so one burst of rejections halves the rate once.
+
+        Args:
+            host: Host that throttled the request
+            retry_after: Seconds the host asked us to wait (Retry-After), if any
+        """
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            if now >= bucket.paused_until:
+                rate = bucket.rate or DEFAULT_THROTTLED_RATE
+                bucket.rate = max(MIN_RATE_LIMIT, rate * THROTTLE_BACKOFF)
+            pause = DEFAULT_THROTTLE_PAUSE if retry_after is None else retry_after
+            bucket.paused_until = max(bucket.paused_until, now + pause)
+            # No tokens are refilled until the pause is over
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.last = max(bucket.last, bucket.paused_until)
+
+    def succeeded(self, host: str):
+        """Speed back up after a request to the host was not throttled"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None or bucket.rate is None:
+                return
+            # About one more request per second for every `rate` successful requests
+            bucket.rate += 1.0 / max(bucket.rate, 1.0)
+            if self.rate is not None:
+                bucket.rate = min(bucket.rate, self.rate)
+            elif bucket.rate >= DEFAULT_THROTTLED_RATE:
+                bucket.rate = None
+
+
+def parse_gitiles_json(content: Union[str, bytes]) -> Any:
+    """
+    Parse a Gitiles JSON response
+
+    Args:
+        content: Response body, possibly starting with the ")]}'" security prefix;
+            raw bytes are parsed as UTF-8 without decoding the body to text first
+
+    Returns:
+        Parsed JSON data
+    """
+    # Gitiles API returns JSON with a security prefix ")]}'" that needs to be removed
+    prefix = b")]}'" if isinstance(content, bytes) else ")]}'"
+    if content.startswith(prefix):
+        content = content[4:]
+    return json.loads(content)
+
+
+def is_base64_diff(head: bytes) -> bool:
+    """
+    Guess whether a ?format=TEXT response body is base64 encoded
 
+    Gitiles base64-encodes diffs, but mirrors and other endpoints may return
+    plain text. Plain diffs start with a header such as "diff --git" or
+    "From ..." that contains spaces, which never occur in base64.
+
+    Args:
+        head: Leading bytes of the body (ENCODING_SNIFF_SIZE bytes are enough)
+
+    Returns:
+        True if the body is base64
+    """
+    head = head[:ENCODING_SNIFF_SIZE]
+    return bool(head) and _BASE64_RE.match(head) is not None
+
+
+@timed("decode")
+def decode_diff_content(content: Union[str, bytes]) -> str:
+    """
+    Decode a ?format=TEXT diff response
+
+    Args:
+        content: Response body, usually base64 encoded
+
+    Returns:
+        Plain diff text
+    """
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    if is_base64_diff(data):
         try:
-            print(f"Querying file: {normalized_path}")
-            print(f"Request URL: {url}")
+            # Line breaks and other non-alphabet bytes are skipped by the decoder
+            data = binascii.a2b_base64(data)
+        except binascii.Error:
+            pass
+    return data.decode("utf-8", errors="ignore")
 
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
 
-            # Gitiles API returns JSON with a security prefix ")]}'" that needs to be removed
-            content = response.text
-            if content.startswith(")]}'"):
-                content = content[4:]
+@dataclass
+class DiffExcerpt:
+    """Leading part of a commit diff read within a line/byte budget"""
 
-            data = json.loads(content)
+    # Diff text that fit in the budget
+    text: str
+    # Number of lines in text
+    line_count: int
+    # Whether the diff continued past the budget
+    truncated: bool = False
+    # Approximate decoded size of the part that was not downloaded, if known
+    omitted_bytes: Optional[int] = None
+    # Files the diff was limited to (whole commit if None)
+    paths: Optional[List[str]] = None
 
-            if "log" not in data or not data["log"]:
-                print(f"Error: No commit history found for file {normalized_path}")
-                return None
 
-            # Get the latest commit
-            latest_commit = data["log"][0]
-            return latest_commit
+def is_diff_header_for(line: str, paths: List[str]) -> bool:
+    """Check whether a "diff --git a/<old> b/<new>" header touches one of the paths (files or directories)"""
+    old_path, _, new_path = line[len("diff --git a/") :].partition(" b/")
+    for path in paths:
+        directory = path.rstrip("/") + "/"
+        for changed in (old_path, new_path):
+            if changed == path or changed.startswith(directory):
+                return True
+    return False
 
-        except requests.exceptions.RequestException as e:
-            print(f"Network request error: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            return None
-        except Exception as e:
-            print(f"Unknown error: {e}")
-            return None
 
-    def get_commit_details(self, commit_hash: str) -> Optional[Dict]:
-        """
-        Get detailed information for the specified commit, including all modified files
+def build_diff_url(
+    base_url: str, commit_hash: str, paths: Optional[List[str]] = None
+) -> str:
+    """
+    Build the ?format=TEXT diff URL of a commit
+
+    A single path uses Gitiles' path-scoped diff so only that file is transferred;
+    several paths fetch the whole diff, which is filtered while streaming.
+    """
+    if paths and len(paths) == 1:
+        return f"{base_url}/+/{commit_hash}%5E%21/{quote(paths[0])}?format=TEXT"
+    return f"{base_url}/+/{commit_hash}%5E%21/?format=TEXT"
 
+
+def diff_excerpt_cache_key(
+    commit_hash: str,
+    max_lines: Optional[int],
+    max_bytes: Optional[int],
+    paths: Optional[List[str]] = None,
+) -> str:
+    """Build the cache key of a bounded (and optionally path-filtered) diff"""
+    key = f"diff:{commit_hash}:{max_lines}:{max_bytes}"
+    if paths:
+        key += ":" + hashlib.sha1("\n".join(paths).encode("utf-8")).hexdigest()
+    return key
+
+
+class DiffStreamDecoder:
+    """
+    Incrementally decode a ?format=TEXT diff stream within a line/byte budget
+
+    Feed raw response chunks until feed() returns True (budget reached) or the
+    stream ends, then call finish(). Only the budgeted part of the diff is kept
+    in memory. When paths are given, only the per-file sections of the diff
+    touching those paths are kept (and count towards the budget).
+
+    Decoding, filtering and budgeting work on bytes; the kept diff is converted
+    to text once, in finish().
+    """
+
+    def __init__(
+        self,
+        max_lines: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        total_size: Optional[int] = None,
+        paths: Optional[List[str]] = None,
+    ):
+        """
         Args:
-            commit_hash: The commit hash value
+            max_lines: Maximum number of diff lines to keep (unlimited if None)
+            max_bytes: Maximum number of decoded bytes to keep (unlimited if None)
+            total_size: Raw response size in bytes, if known, to estimate omitted bytes
+            paths: Only keep the diff sections of these files (whole diff if None)
+        """
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.total_size = total_size
+        self.paths = paths
+        self.truncated = False
+        # Partial last line and inclusion state of the current file section when filtering
+        self._partial_line = b""
+        self._in_selected_file = False
+        # None until enough input shows whether the body is base64 or plain text
+        self._is_base64: Optional[bool] = None
+        # Raw input not decoded yet: the sniffed prefix, then an incomplete base64 quantum
+        self._pending = b""
+        self._raw_consumed = 0
+        self._kept = bytearray()
+        self._kept_lines = 0
+        # Set once the budget is exactly filled; more input means truncation
+        self._full = False
+        # Decoded bytes that were downloaded but cut off by the budget
+        self._dropped_bytes = 0
+        # Time spent decoding so far, recorded as one "decode" observation by finish()
+        self._decode_seconds = 0.0
 
-        Returns:
-            Dictionary containing detailed information, or None if not found
+    def feed(self, chunk: bytes) -> bool:
         """
-        url = f"{self.base_url}/+/{commit_hash}?format=JSON"
+        Decode the next raw chunk
 
+        Returns:
+            True once the budget is reached and no more input is needed
+        """
+        start = time.perf_counter()
         try:
-            print(f"Getting commit details: {commit_hash}")
+            return self._feed(chunk)
+        finally:
+            self._decode_seconds += time.perf_counter() - start
 
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
+    def _feed(self, chunk: bytes) -> bool:
+        if self.truncated or not chunk:
+            return self.truncated
 
-            # Remove security prefix ")]}'" from Gitiles API response
-            content = response.text
-            if content.startswith(")]}'"):
-                content = content[4:]
+        self._raw_consumed += len(chunk)
+        if self._is_base64 is None:
+            # Wait for enough bytes to tell the encoding reliably
+            self._pending += chunk
+            if len(self._pending) < ENCODING_SNIFF_SIZE:
+                return False
+            self._is_base64 = is_base64_diff(self._pending)
+            chunk, self._pending = self._pending, b""
+
+        if self._is_base64:
+            decoded = self._decode_base64(chunk)
+        else:
+            decoded = chunk
+        return self._keep(self._select(decoded))
 
-            data = json.loads(content)
+    def _decode_base64(self, chunk: bytes) -> bytes:
+        """Decode the complete 4-byte base64 quanta of a chunk, carrying the rest over"""
+        if b"\n" in chunk or b"\r" in chunk:
+            chunk = chunk.translate(None, b"\r\n")
+        view = memoryview(chunk)
+        head = b""
+        if self._pending:
+            # Complete the quantum left over from the previous chunk
+            missing = 4 - len(self._pending)
+            quantum = self._pending + bytes(view[:missing])
+            view = view[missing:]
+            if len(quantum) < 4:
+                self._pending = quantum
+                return b""
+            head = binascii.a2b_base64(quantum)
+        usable = len(view) - len(view) % 4
+        self._pending = bytes(view[usable:])
+        body = binascii.a2b_base64(view[:usable]) if usable else b""
+        return head + body if head else body
+
+    def _select(self, data: bytes, final: bool = False) -> bytes:
+        """Drop the sections of files that were not requested"""
+        if self.paths is None:
             return data
 
-        except requests.exceptions.RequestException as e:
-            print(f"Network error when getting commit details: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"JSON error when parsing commit details: {e}")
-            return None
-        except Exception as e:
-            print(f"Unknown error when getting commit details: {e}")
+        if self._partial_line:
+            data = self._partial_line + data
+        if final:
+            self._partial_line = b""
+        else:
+            # Only whole lines can be matched against diff headers
+            cut = data.rfind(b"\n") + 1
+            data, self._partial_line = data[:cut], data[cut:]
+
+        # Jump from one file header to the next instead of visiting every line
+        selected = []
+        position = 0
+        while position < len(data):
+            if data.startswith(b"diff --git ", position):
+                line_end = data.find(b"\n", position)
+                header = data[position : line_end if line_end >= 0 else len(data)]
+                self._in_selected_file = is_diff_header_for(
+                    header.decode("utf-8", errors="ignore"), self.paths
+                )
+            next_header = data.find(b"\ndiff --git ", position)
+            end = len(data) if next_header < 0 else next_header + 1
+            if self._in_selected_file:
+                selected.append(data[position:end])
+            position = end
+        return b"".join(selected)
+
+    def _keep(self, data: bytes) -> bool:
+        """Append decoded bytes, cutting them at the line/byte budget"""
+        if not data:
+            return self.truncated
+        if self._full:
+            # Anything arriving after a filled budget is left out
+            self._dropped_bytes += len(data)
+            self.truncated = True
+            return True
+
+        if self.max_bytes is not None:
+            room = max(self.max_bytes - len(self._kept), 0)
+            if len(data) > room:
+                self._dropped_bytes += len(data) - room
+                data = data[:room]
+                self.truncated = True
+
+        if self.max_lines is not None:
+            # Keep data up to (not including) newline number max_lines
+            allowed = self.max_lines - 1 - self._kept_lines
+            position = -1
+            for _ in range(allowed + 1):
+                position = data.find(b"\n", position + 1)
+                if position < 0:
+                    break
+            if position >= 0:
+                if position + 1 < len(data):
+                    self.truncated = True
+                    self._dropped_bytes += len(data) - position
+                else:
+                    self._full = True
+                data = data[:position]
+
+        self._kept += data
+        self._kept_lines += data.count(b"\n")
+        if self.max_bytes is not None and len(self._kept) >= self.max_bytes:
+            self._full = True
+        return self.truncated
+
+    def finish(self) -> DiffExcerpt:
+        """Flush buffered input and return the decoded excerpt"""
+        start = time.perf_counter()
+        try:
+            return self._finish()
+        finally:
+            # The whole diff is one observation, however many chunks it came in
+            METRICS.observe("decode", self._decode_seconds + time.perf_counter() - start)
+
+    def _finish(self) -> DiffExcerpt:
+        if not self.truncated:
+            tail = b""
+            if self._is_base64 is None:
+                # Short body: all of it is still in the sniff buffer
+                body, self._pending = self._pending, b""
+                self._is_base64 = is_base64_diff(body)
+                tail = self._decode_base64(body) if self._is_base64 else body
+            if self._is_base64 and self._pending:
+                remainder, self._pending = self._pending, b""
+                try:
+                    tail += binascii.a2b_base64(remainder + b"=" * (-len(remainder) % 4))
+                except binascii.Error:
+                    pass
+            self._keep(self._select(tail, final=True))
+
+        # Cutting at the byte budget may split a character; drop the fragment
+        text = self._kept.decode("utf-8", errors="ignore")
+        omitted_bytes = None
+        # Filtered output cannot tell how much of the remaining input was selected
+        if self.truncated and self.total_size is not None and self.paths is None:
+            remaining = max(self.total_size - self._raw_consumed, 0)
+            if self._is_base64:
+                remaining = (remaining + len(self._pending)) * 3 // 4
+            omitted_bytes = self._dropped_bytes + remaining
+
+        return DiffExcerpt(
+            text=text,
+            line_count=self._kept_lines + 1 if self._kept else 0,
+            truncated=self.truncated,
+            omitted_bytes=omitted_bytes,
+            paths=self.paths,
+        )
+
+
+def read_local_diff_excerpt(
+    backend: LocalGitBackend,
+    commit_hash: str,
+    max_lines: Optional[int],
+    max_bytes: Optional[int],
+    paths: Optional[List[str]] = None,
+) -> Optional[DiffExcerpt]:
+    """Read a bounded part of a commit diff from a local git backend"""
+    with backend.open_commit_diff(commit_hash, paths) as chunks:
+        if chunks is None:
             return None
+        decoder = DiffStreamDecoder(max_lines, max_bytes, paths=paths)
+        for chunk in chunks:
+            if decoder.feed(chunk):
+                break
+    return decoder.finish()
 
-    def get_commit_diff(self, commit_hash: str) -> Optional[str]:
-        """
-        Get complete diff information for the specified commit
 
+def call_backend(func: Callable, *args) -> Any:
+    """Call a local git backend method, reporting failures like request errors"""
+    try:
+        return func(*args)
+    except (GitError, OSError) as e:
+        logger.warning("Local git error: %s", e)
+        return None
+
+
+def parse_gitiles_time(value: str) -> Optional[datetime]:
+    """
+    Parse a commit time from Gitiles JSON
+
+    Args:
+        value: Time such as "Mon Oct 14 12:00:50 2024 +0200" or an ISO 8601 string
+
+    Returns:
+        Timezone-aware datetime, or None if the format is not recognized
+    """
+    for fmt in ("%a %b %d %H:%M:%S %Y %z", "%a %b %d %H:%M:%S %Y"):
+        try:
+            dt = datetime.strptime(value, fmt)
+            return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+_REVISION_RE = re.compile(r"^[0-9a-f]{7,40}$")
+
+
+def parse_since(since: Optional[str]) -> Tuple[Optional[datetime], Optional[str]]:
+    """
+    Interpret a history lower bound given as a date or a commit hash
+
+    Args:
+        since: ISO date/time (e.g. "2024-10-01") or commit hash, or None
+
+    Returns:
+        Tuple of (since date or None, since commit hash or None)
+
+    Raises:
+        ValueError: If since is neither a date nor a commit hash
+    """
+    if not since:
+        return None, None
+    if _REVISION_RE.match(since):
+        return None, since
+    dt = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)), None
+
+
+def build_log_url(
+    base_url: str,
+    path: str,
+    page_size: int,
+    start: Optional[str] = None,
+    since_commit: Optional[str] = None,
+    name_status: bool = False,
+    until: str = "HEAD",
+) -> str:
+    """
+    Build the +log URL of a page of path history
+
+    Args:
+        base_url: Gitiles repository URL
+        path: File or directory path (empty for the whole repository)
+        page_size: Number of commits per page
+        start: Pagination cursor from the previous page's "next" field
+        since_commit: Only list commits after this one (exclusive)
+        name_status: Include each commit's changed files ("tree_diff")
+        until: Newest revision of the history
+    """
+    revision = f"{since_commit}..{until}" if since_commit else until
+    url = f"{base_url}/+log/{revision}/{path}?format=JSON&n={page_size}"
+    if name_status:
+        url += "&name-status=1"
+    if start:
+        url += f"&s={start}"
+    return url
+
+
+class DirectoryCommitResolver:
+    """
+    Assign each file of a directory the newest commit that touched it
+
+    Feed the directory's commits newest first (with "tree_diff" from a
+    name-status log) until add() reports that every file is resolved.
+    """
+
+    def __init__(self, file_paths: List[str]):
+        """
         Args:
-            commit_hash: The commit hash value
+            file_paths: Full paths of the files to resolve
+        """
+        self.file_paths = file_paths
+        self.pending = set(file_paths)
+        # Also holds the exception of a failed individual lookup
+        self.latest: Dict[str, Union[Dict, Exception]] = {}
+
+    def add(self, commit: Dict) -> bool:
+        """
+        Record a commit from the directory log
 
         Returns:
-            Complete diff content, or None if not found
+            True once every file has been resolved
         """
-        # Use formatted diff URL
-        url = f"{self.base_url}/+/{commit_hash}%5E%21/?format=TEXT"
+        summary = None
+        for change in commit.get("tree_diff", []):
+            path = change.get("new_path")
+            if path in self.pending:
+                if summary is None:
+                    # The file list is only needed for matching, drop it from the result
+                    summary = {k: v for k, v in commit.items() if k != "tree_diff"}
+                self.latest[path] = summary
+                self.pending.discard(path)
+        return not self.pending
+
+    def results(self) -> Dict[str, Union[Dict, Exception, None]]:
+        """Latest commit per file in listing order, None for unresolved files"""
+        return {path: self.latest.get(path) for path in self.file_paths}
+
+
+def format_directory_commits(
+    directory: str, latest_commits: Dict[str, Union[Dict, Exception, None]]
+) -> str:
+    """
+    Format the latest commit of every file in a directory, one line per file
+
+    Files whose lookup failed are listed together at the end.
+
+    Args:
+        directory: Queried directory path
+        latest_commits: Mapping of file path to its latest commit, None if not
+            found, or the exception that prevented the lookup
+
+    Returns:
+        Formatted string
+    """
+    result = []
+    result.append("=" * 80)
+    result.append(f"CHROMIUM REPOSITORY DIRECTORY LATEST CHANGES: {directory}")
+    result.append(f"Files: {len(latest_commits)}")
+    result.append("=" * 80)
+
+    failed = []
+    for path, commit in latest_commits.items():
+        if isinstance(commit, Exception):
+            failed.append((path, commit))
+            continue
+        if not commit:
+            result.append(f"{path}  (no commit found)")
+            continue
+        commit_time = commit.get("committer", {}).get("time", "")
+        dt = parse_gitiles_time(commit_time) if commit_time else None
+        if dt:
+            commit_time = dt.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M")
+        author = commit.get("author", {}).get("email", "N/A")
+        subject = commit.get("message", "").strip().split("\n")[0]
+        result.append(
+            f"{path}  {commit.get('commit', 'N/A')[:12]}  {commit_time}  {author}  {subject}"
+        )
+
+    if failed:
+        # Unlike "no commit found", these files may well have a commit: retry them later
+        result.append("-" * 80)
+        result.append("Lookup failed:")
+        for path, error in failed:
+            result.append(f"  {path}: {error}")
+    result.append("=" * 80)
+    return "\n".join(result)
+
+
+def format_history(file_path: str, commits: List[Dict]) -> str:
+    """
+    Format a list of commits into a compact one-line-per-commit history
+
+    Args:
+        file_path: Queried file or directory path
+        commits: Commits as returned by the +log API, newest first
+
+    Returns:
+        Formatted string
+    """
+    result = []
+    result.append("=" * 80)
+    result.append(f"CHROMIUM REPOSITORY HISTORY: {file_path}")
+    result.append("=" * 80)
+
+    if not commits:
+        result.append("No commits found")
+    for commit in commits:
+        commit_time = commit.get("committer", {}).get("time", "")
+        dt = parse_gitiles_time(commit_time) if commit_time else None
+        if dt:
+            commit_time = dt.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M")
+        author = commit.get("author", {}).get("email", "N/A")
+        subject = commit.get("message", "").strip().split("\n")[0]
+        result.append(
+            f"{commit.get('commit', 'N/A')[:12]}  {commit_time}  {author}  {subject}"
+        )
+
+    result.append("=" * 80)
+    return "\n".join(result)
+
+
+@timed("format")
+def write_commit_info(
+    sink: IO[str],
+    commit_info: Dict,
+    commit_details: Optional[Dict] = None,
+    show_diff: bool = False,
+    commit_diff: Optional[Union[str, DiffExcerpt]] = None,
+    requested_paths: Optional[List[str]] = None,
+):
+    """
+    Write readable commit information to a text stream
 
+    The diff is written as one piece instead of being split into lines and
+    joined again, so large diffs are not copied while formatting.
+
+    Args:
+        sink: Text stream to write to, e.g. a file or io.StringIO
+        commit_info: Basic commit information
+        commit_details: Detailed commit information (optional)
+        show_diff: Whether to show diff content
+        commit_diff: Commit diff content, full text or a bounded excerpt (optional)
+        requested_paths: Queried file paths whose latest change is this commit (optional)
+    """
+
+    def line(text: str):
+        sink.write(text)
+        sink.write("\n")
+
+    line("=" * 80)
+    line("CHROMIUM REPOSITORY FILE LATEST CHANGE INFORMATION")
+    line("=" * 80)
+
+    # Basic information
+    line(f"Commit Hash: {commit_info.get('commit', 'N/A')}")
+
+    author_info = commit_info.get("author", {})
+    author_name = author_info.get("name", "N/A")
+    author_email = author_info.get("email", "N/A")
+    line(f"Author: {author_name} <{author_email}>")
+
+    committer_info = commit_info.get("committer", {})
+    committer_name = committer_info.get("name", "N/A")
+    committer_email = committer_info.get("email", "N/A")
+    line(f"Committer: {committer_name} <{committer_email}>")
+
+    # Time information
+    if "committer" in commit_info and "time" in commit_info["committer"]:
+        commit_time = commit_info["committer"]["time"]
         try:
-            print(f"Getting commit diff: {commit_hash}")
-            response = requests.get(
-                url, timeout=120
-            )  # Diff may be large, increase timeout to 120 seconds
-            if response.status_code == 404:
-                return None
-            response.raise_for_status()
+            # Parse timestamp
+            dt = datetime.fromisoformat(commit_time.replace("Z", "+00:00"))
+            line(f"Commit Time: {dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+        except:
+            line(f"Commit Time: {commit_time}")
 
-            # If returned content is base64 encoded, decode it
-            content = response.text
-            if content and not content.startswith("diff "):
-                try:
-                    content = base64.b64decode(content).decode("utf-8", errors="ignore")
-                except:
-                    pass
+    # Files from the query that resolved to this commit
+    if requested_paths:
+        line(f"\nRequested files covered by this commit (Total: {len(requested_paths)}):")
+        line("-" * 40)
+        for path in requested_paths:
+            line(f"  {path}")
 
-            return content
+    # Commit message
+    message = commit_info.get("message", "N/A").strip()
+    line(f"\nCommit Message:")
+    line("-" * 40)
+    for message_line in message.split("\n"):
+        line(f"  {message_line}")
 
-        except requests.exceptions.RequestException as e:
-            print(f"Network error when getting diff: {e}")
-            return None
-        except Exception as e:
-            print(f"Unknown error when getting diff: {e}")
+    # If detailed information is available, show all modified files
+    if commit_details and "tree_diff" in commit_details:
+        line(f"\nAll files modified in this commit:")
+        line("-" * 40)
+
+        for diff in commit_details["tree_diff"]:
+            old_path = diff.get("old_path", "")
+            new_path = diff.get("new_path", "")
+            change_type = diff.get("type", "unknown")
+
+            if change_type == "add":
+                line(f"  [ADDED] {new_path}")
+            elif change_type == "delete":
+                line(f"  [DELETED] {old_path}")
+            elif change_type == "modify":
+                line(f"  [MODIFIED] {new_path}")
+            elif change_type == "rename":
+                line(f"  [RENAMED] {old_path} -> {new_path}")
+            else:
+                path = new_path or old_path
+                line(f"  [{change_type}] {path}")
+
+    # If diff content needs to be displayed
+    if show_diff and isinstance(commit_diff, DiffExcerpt):
+        line(f"\nCode Change Details (DIFF):")
+        line("=" * 80)
+        if commit_diff.paths:
+            line(f"Note: Showing diff only for: {', '.join(commit_diff.paths)}")
+            line("-" * 40)
+        if commit_diff.truncated:
+            line(
+                f"Note: Diff content is too long, showing only first {commit_diff.line_count} lines"
+            )
+            line("-" * 40)
+            line(commit_diff.text)
+            line("-" * 40)
+            if commit_diff.omitted_bytes is not None:
+                line(f"... (omitted about {commit_diff.omitted_bytes} bytes of diff)")
+            else:
+                line("... (remaining diff omitted)")
+        else:
+            line(commit_diff.text)
+    elif show_diff and commit_diff:
+        line(f"\nCode Change Details (DIFF):")
+        line("=" * 80)
+        # Limit diff length to avoid overly long output
+        max_lines = DEFAULT_MAX_DIFF_LINES  # Show maximum 1000 lines of diff
+        cut = -1
+        for _ in range(max_lines):
+            cut = commit_diff.find("\n", cut + 1)
+            if cut < 0:
+                break
+
+        if cut >= 0:
+            omitted_lines = commit_diff.count("\n", cut)
+            line(f"Note: Diff content is too long, showing only first {max_lines} lines")
+            line("-" * 40)
+            line(commit_diff[:cut])
+            line("-" * 40)
+            line(f"... (omitted {omitted_lines} lines)")
+        else:
+            line(commit_diff)
+
+    sink.write("=" * 80)
+
+
+def format_commit_info(
+    commit_info: Dict,
+    commit_details: Optional[Dict] = None,
+    show_diff: bool = False,
+    commit_diff: Optional[Union[str, DiffExcerpt]] = None,
+    requested_paths: Optional[List[str]] = None,
+) -> str:
+    """
+    Format commit information into a readable string
+
+    Args:
+        commit_info: Basic commit information
+        commit_details: Detailed commit information (optional)
+        show_diff: Whether to show diff content
+        commit_diff: Commit diff content, full text or a bounded excerpt (optional)
+        requested_paths: Queried file paths whose latest change is this commit (optional)
+
+    Returns:
+        Formatted string
+    """
+    sink = io.StringIO()
+    write_commit_info(
+        sink, commit_info, commit_details, show_diff, commit_diff, requested_paths
+    )
+    return sink.getvalue()
+
+
+@timed("format")
+def build_commit_record(
+    commit_info: Dict,
+    commit_details: Optional[Dict] = None,
+    commit_diff: Optional[Union[str, DiffExcerpt]] = None,
+    requested_paths: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None,
+) -> CommitRecord:
+    """
+    Build a structured record from commit information, the counterpart of format_commit_info
+
+    Args:
+        commit_info: Basic commit information
+        commit_details: Detailed commit information (optional)
+        commit_diff: Commit diff content, full text or a bounded excerpt (optional)
+        requested_paths: Queried file paths whose latest change is this commit (optional)
+        fields: Fields to include (all if None); "commit" is always included
+
+    Returns:
+        CommitRecord with only the selected fields set
+    """
+    record = CommitRecord(commit=commit_info.get("commit", ""))
+
+    for role in ("author", "committer"):
+        if wants_field(fields, role) and role in commit_info:
+            person = commit_info[role]
+            setattr(
+                record, role, {"name": person.get("name"), "email": person.get("email")}
+            )
+
+    if wants_field(fields, "time"):
+        commit_time = commit_info.get("committer", {}).get("time")
+        dt = parse_gitiles_time(commit_time) if commit_time else None
+        record.time = dt.astimezone(timezone.utc).isoformat() if dt else commit_time
+
+    if wants_field(fields, "message"):
+        record.message = commit_info.get("message", "").strip()
+
+    if wants_field(fields, "requested_paths") and requested_paths:
+        record.requested_paths = list(requested_paths)
+
+    if wants_field(fields, "files") and commit_details and "tree_diff" in commit_details:
+        record.files = [
+            {
+                "type": diff.get("type", "unknown"),
+                "old_path": diff.get("old_path", ""),
+                "new_path": diff.get("new_path", ""),
+            }
+            for diff in commit_details["tree_diff"]
+        ]
+
+    if wants_field(fields, "diff") and commit_diff is not None:
+        if isinstance(commit_diff, DiffExcerpt):
+            record.diff = {
+                "text": commit_diff.text,
+                "line_count": commit_diff.line_count,
+                "truncated": commit_diff.truncated,
+                "omitted_bytes": commit_diff.omitted_bytes,
+                "paths": commit_diff.paths,
+            }
+        else:
+            record.diff = {
+                "text": commit_diff,
+                "line_count": commit_diff.count("\n") + 1,
+                "truncated": False,
+                "omitted_bytes": None,
+                "paths": None,
+            }
+
+    return record
+
+
+def parse_log_head(content: Union[str, bytes]) -> Optional[Dict]:
+    """
+    Get the newest commit of a +log JSON response
+
+    Args:
+        content: Response body of a +log request with ?format=JSON
+
+    Returns:
+        Commit information dictionary, or None if the log is empty
+    """
+    log = parse_gitiles_json(content).get("log")
+    return log[0] if log else None
+
+
+def parse_tree_files(content: Union[str, bytes], normalized_dir: str) -> List[str]:
+    """
+    Get the full file paths of a recursive tree listing
+
+    Args:
+        content: Response body of a +/HEAD/<dir>?format=JSON&recursive=1 request
+        normalized_dir: Listed directory without surrounding slashes
+
+    Returns:
+        Paths of the blobs in the listing
+    """
+    data = parse_gitiles_json(content)
+    prefix = f"{normalized_dir}/" if normalized_dir else ""
+    # Submodules ("commit" entries) have no history in this repository
+    return [
+        prefix + entry["name"]
+        for entry in data.get("entries", [])
+        if entry.get("type") == "blob"
+    ]
+
+
+def raw_body_size(headers: Any) -> Optional[int]:
+    """Size of a response body as sent, if known, from its (case-insensitive) headers"""
+    # The remaining size can only be estimated from an uncompressed length
+    if "Content-Encoding" in headers:
+        return None
+    return int(headers.get("Content-Length", 0)) or None
+
+
+def history_page_commits(
+    page: Optional[Dict], since_date: Optional[datetime] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Select the commits of a +log page that belong to a history walk
+
+    Args:
+        page: Parsed +log page, or None if the path was not found
+        since_date: Stop at the first commit older than this date (optional)
+
+    Returns:
+        Tuple of (commits to yield, cursor of the next page or None once the walk is over)
+    """
+    if not page:
+        return [], None
+    commits = []
+    for commit in page.get("log", []):
+        if since_date:
+            commit_time = parse_gitiles_time(commit.get("committer", {}).get("time", ""))
+            if commit_time and commit_time < since_date:
+                return commits, None
+        commits.append(commit)
+    return commits, page.get("next")
+
+
+def index_changes(commit: Dict) -> Tuple[str, int, List[Tuple[str, str]]]:
+    """
+    Convert a +log entry with name-status to the commit form PathIndex.apply_commits() reads
+
+    Args:
+        commit: Commit of a +log page requested with name-status=1
+
+    Returns:
+        Tuple of (commit hash, commit timestamp, [(status letter, path)]), renames
+        and copies reported like `git log --no-renames`
+    """
+    commit_time = parse_gitiles_time(commit.get("committer", {}).get("time", ""))
+    changes = []
+    for change in commit.get("tree_diff", []):
+        change_type = change.get("type")
+        if change_type in ("delete", "rename"):
+            changes.append(("D", change["old_path"]))
+        if change_type != "delete":
+            changes.append(("M" if change_type == "modify" else "A", change["new_path"]))
+    return commit["commit"], int(commit_time.timestamp()) if commit_time else 0, changes
+
+
+def file_diff_paths(
+    normalized_path: str,
+    file_diff_only: bool,
+    extra_diff_paths: Optional[List[str]] = None,
+) -> Optional[List[str]]:
+    """Files a single-file lookup limits its diff to (whole commit if None)"""
+    if not file_diff_only:
+        return None
+    return [normalized_path] + list(extra_diff_paths or [])
+
+
+def as_diff_excerpt(value: Optional[Union[Dict, DiffExcerpt]]) -> Optional[DiffExcerpt]:
+    """Restore a diff excerpt from its cached form"""
+    # Cached excerpts are stored as plain dictionaries
+    return DiffExcerpt(**value) if isinstance(value, dict) else value
+
+
+def pinned_latest_entry(head: str, latest: Dict) -> Dict:
+    """Cache entry recording the latest commit of a path as of a HEAD hash"""
+    # Commits served from the memory cache are compact Mappings; store a plain copy
+    return {"head": head, "latest": dict(latest)}
+
+
+def pinned_latest(entry: Any, head: str) -> Optional[Dict]:
+    """Latest commit of a cached pinned entry if it was resolved at head"""
+    if isinstance(entry, dict) and entry.get("head") == head:
+        return entry.get("latest")
+    return None
+
+
+def previous_pinned_latest(entry: Any) -> Optional[Tuple[str, Dict]]:
+    """(HEAD hash, latest commit) of a cached pinned entry, to revalidate it against a newer HEAD"""
+    if isinstance(entry, dict) and entry.get("head") and entry.get("latest"):
+        return entry["head"], entry["latest"]
+    return None
+
+
+@dataclass(frozen=True)
+class GitilesRequest:
+    """
+    A Gitiles request together with how its response is read and cached
+
+    Requests are built by CommitFetcherBase for both fetchers; only sending
+    them differs between the blocking and the asyncio transport.
+    """
+
+    # Key of the result in the response cache, also shared by concurrent identical requests
+    cache_key: str
+    url: str
+    # Stage the request is timed as
+    stage: str
+    # Progress message logged before sending
+    description: str
+    # Start of the GitilesError message when the request fails
+    error: str
+    # Turns a successful response body into the result
+    parse: Optional[Callable[[bytes], Any]] = None
+    # Streamed diffs: creates the decoder from the raw body size, if known
+    decoder: Optional[Callable[[Optional[int]], DiffStreamDecoder]] = None
+    # Streamed diffs: turns the decoded excerpt into the result
+    finish: Optional[Callable[[DiffExcerpt], Any]] = None
+    # Logged when nothing is found (404 or a None result)
+    not_found: Optional[str] = None
+    timeout: float = 30
+    # Seconds the result stays cached (never expires if None)
+    ttl: Optional[float] = None
+    cacheable: bool = True
+
+
+class CommitFetcherBase:
+    """
+    Gitiles request building, response reading and settings shared by both fetchers
+
+    ChromiumCommitFetcher and AsyncChromiumCommitFetcher only add a transport
+    (requests or httpx) and the control flow around it.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        rate_limit: Optional[float] = None,
+        cache: Optional[Any] = None,
+        log_ttl: float = DEFAULT_LOG_TTL,
+        head_ttl: float = DEFAULT_HEAD_TTL,
+        backend: Optional[LocalGitBackend] = None,
+        path_index: Optional[PathIndex] = None,
+    ):
+        """
+        Args:
+            max_retries: Number of retries for connection errors and 429/5xx responses
+            backoff_factor: Exponential backoff factor between retries (seconds)
+            rate_limit: Maximum requests per second to each host (no cap until Gitiles
+                throttles us if None); lowered automatically while Gitiles answers 429
+            cache: Response cache providing get()/set(), e.g. CommitCache (no caching if None)
+            log_ttl: Seconds cached results that follow HEAD (history, listings) stay valid
+            head_ttl: Seconds a resolved HEAD commit is trusted before revalidating it
+            backend: Local clone answering latest-commit, details and diff queries
+                instead of Gitiles (history and directory listings still use Gitiles)
+            path_index: Precomputed path to latest commit index consulted first
+        """
+        self.base_url = GITILES_BASE_URL
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        # Shared by every caller of this fetcher so concurrent callers respect one
+        # cap and all back off together when Gitiles throttles us
+        self.rate_limiter = RateLimiter(rate_limit or None)
+        self.cache = cache
+        self.log_ttl = log_ttl
+        self.head_ttl = head_ttl
+        # Local lookups are cheap and reflect the clone's own HEAD, so they bypass the cache
+        self.backend = backend
+        self.path_index = path_index
+        # HEAD hash last resolved from Gitiles and when, reused for head_ttl seconds
+        # whether or not a response cache is configured
+        self._head: Optional[Tuple[str, float]] = None
+        # Same for the revision of the local clone
+        self._revision: Optional[Tuple[str, float]] = None
+        # HEAD the path index could not be brought up to; not retried until HEAD moves
+        self._path_index_stale_head: Optional[str] = None
+
+    def _remembered(self, resolved: Optional[Tuple[str, float]]) -> Optional[str]:
+        """Commit hash of a (hash, time resolved) pair if it is less than head_ttl seconds old"""
+        if resolved is None:
             return None
+        commit_hash, resolved_at = resolved
+        return commit_hash if time.monotonic() - resolved_at < self.head_ttl else None
+
+    def _parse_head(self, content: bytes) -> Optional[str]:
+        """Read the hash of a HEAD lookup and remember it for head_ttl seconds"""
+        head = (parse_log_head(content) or {}).get("commit")
+        if head:
+            self._head = (head, time.monotonic())
+        return head
+
+    def _read_response(self, request: GitilesRequest, content: Optional[bytes]) -> Any:
+        """Turn a response body (None for 404) into the result of a JSON request"""
+        result = request.parse(content) if content is not None else None
+        if result is None and request.not_found:
+            logger.info(request.not_found)
+        return result
+
+    def _head_request(self) -> GitilesRequest:
+        """Resolve the commit HEAD points to (one small +log entry)"""
+        url = f"{self.base_url}/+log/HEAD?format=JSON&n=1"
+        return GitilesRequest(
+            cache_key="head",
+            url=url,
+            stage="head",
+            description=f"Resolving HEAD: {url}",
+            error="Unable to resolve HEAD",
+            parse=self._parse_head,
+            ttl=self.head_ttl,
+        )
+
+    def _latest_commit_request(
+        self,
+        normalized_path: str,
+        head: Optional[str] = None,
+        previous: Optional[Tuple[str, Dict]] = None,
+    ) -> GitilesRequest:
+        """
+        Get the latest commit touching a path as of a resolved HEAD (HEAD itself if None)
+
+        Args:
+            normalized_path: File path with forward slashes
+            head: Commit hash HEAD was resolved to
+            previous: Older HEAD hash and the latest commit as of it; only the
+                commits in between are asked for, and the previous latest commit
+                is the result if none of them touches the path
+        """
+        revision = head or "HEAD"
+        if previous is None:
+            url = f"{self.base_url}/+log/{revision}/{normalized_path}?format=JSON&n=1"
+            parse = parse_log_head
+            not_found = f"No commit history found for file {normalized_path}"
+        else:
+            old_head, old_latest = previous
+            url = f"{self.base_url}/+log/{old_head}..{revision}/{normalized_path}?format=JSON&n=1"
+
+            def parse(content: bytes) -> Dict:
+                return parse_log_head(content) or old_latest
+
+            # A 404 (e.g. the old HEAD is gone) falls back to a full lookup
+            not_found = None
+        return GitilesRequest(
+            # Pinned lookups are stored as pinned_latest_entry() by the fetchers
+            cache_key=f"latest:{normalized_path}" if head else f"log:{normalized_path}",
+            url=url,
+            stage="log",
+            description=f"Querying file: {normalized_path} ({url})",
+            error=f"Unable to get the latest commit of {normalized_path}",
+            parse=parse,
+            not_found=not_found,
+            ttl=PINNED_LOG_TTL if head else self.log_ttl,
+        )
+
+    def _index_catch_up_request(
+        self, indexed_head: str, head: str, start: Optional[str] = None
+    ) -> GitilesRequest:
+        """Get one page of the files changed by the commits a path index is missing"""
+        url = build_log_url(
+            self.base_url,
+            "",
+            DEFAULT_DIRECTORY_PAGE_SIZE,
+            start,
+            indexed_head,
+            name_status=True,
+            until=head,
+        )
+        return GitilesRequest(
+            cache_key=f"logpage:{url[len(self.base_url):]}",
+            url=url,
+            stage="history",
+            description=f"Updating path index: {url}",
+            error=f"Unable to update the path index to {head}",
+            parse=parse_gitiles_json,
+            cacheable=False,
+        )
+
+    def _log_page_request(
+        self,
+        normalized_path: str,
+        page_size: int,
+        start: Optional[str] = None,
+        since_commit: Optional[str] = None,
+        name_status: bool = False,
+    ) -> GitilesRequest:
+        """Get one page of path history, cached like the latest-commit lookup"""
+        url = build_log_url(
+            self.base_url, normalized_path, page_size, start, since_commit, name_status
+        )
+        return GitilesRequest(
+            cache_key=f"logpage:{url[len(self.base_url):]}",
+            url=url,
+            stage="history",
+            description=f"Request URL: {url}",
+            error=f"Unable to get history page {url}",
+            parse=parse_gitiles_json,
+            # Pages starting at an explicit commit never change; the first page follows HEAD
+            ttl=None if start and is_immutable_commit(start) else self.log_ttl,
+        )
+
+    def _directory_request(self, normalized_dir: str) -> GitilesRequest:
+        """List all files below a directory at HEAD"""
+        return GitilesRequest(
+            cache_key=f"tree:{normalized_dir}",
+            url=f"{self.base_url}/+/HEAD/{normalized_dir}?format=JSON&recursive=1",
+            stage="tree",
+            description=f"Listing directory: {normalized_dir}",
+            error=f"Unable to list directory {normalized_dir}",
+            parse=lambda content: parse_tree_files(content, normalized_dir),
+            not_found=f"Directory {normalized_dir} not found",
+            timeout=60,
+            ttl=self.log_ttl,
+        )
+
+    def _details_request(self, commit_hash: str) -> GitilesRequest:
+        """Get the details of a commit, including all modified files"""
+        return GitilesRequest(
+            cache_key=f"details:{commit_hash}",
+            url=f"{self.base_url}/+/{commit_hash}?format=JSON",
+            stage="details",
+            description=f"Getting commit details: {commit_hash}",
+            error=f"Unable to get commit details of {commit_hash}",
+            parse=parse_gitiles_json,
+            cacheable=is_immutable_commit(commit_hash),
+        )
+
+    def _diff_request(self, commit_hash: str) -> GitilesRequest:
+        """Get the complete diff of a commit"""
+        return GitilesRequest(
+            cache_key=f"diff:{commit_hash}",
+            url=build_diff_url(self.base_url, commit_hash),
+            stage="diff",
+            description=f"Getting commit diff: {commit_hash}",
+            error=f"Unable to get the diff of {commit_hash}",
+            # Decode while downloading instead of holding the encoded body too
+            decoder=lambda total_size: DiffStreamDecoder(),
+            finish=lambda excerpt: excerpt.text,
+            # Diff may be large, increase timeout to 120 seconds
+            timeout=120,
+            cacheable=is_immutable_commit(commit_hash),
+        )
+
+    def _diff_excerpt_request(
+        self,
+        commit_hash: str,
+        max_lines: Optional[int],
+        max_bytes: Optional[int],
+        paths: Optional[List[str]] = None,
+    ) -> GitilesRequest:
+        """Stream a bounded (and optionally path-filtered) part of a commit diff"""
+        return GitilesRequest(
+            cache_key=diff_excerpt_cache_key(commit_hash, max_lines, max_bytes, paths),
+            url=build_diff_url(self.base_url, commit_hash, paths),
+            stage="diff",
+            description=f"Streaming commit diff: {commit_hash}",
+            error=f"Unable to get the diff of {commit_hash}",
+            decoder=lambda total_size: DiffStreamDecoder(
+                max_lines, max_bytes, total_size, paths
+            ),
+            finish=asdict,
+            timeout=120,
+            cacheable=is_immutable_commit(commit_hash),
+        )
 
     def format_commit_info(
         self,
         commit_info: Dict,
         commit_details: Optional[Dict] = None,
         show_diff: bool = False,
-        commit_diff: Optional[str] = None,
+        commit_diff: Optional[Union[str, DiffExcerpt]] = None,
+        requested_paths: Optional[List[str]] = None,
     ) -> str:
+        """Format commit information into a readable string (see format_commit_info())"""
+        return format_commit_info(
+            commit_info, commit_details, show_diff, commit_diff, requested_paths
+        )
+
+
+class ChromiumCommitFetcher(CommitFetcherBase):
+    """Chromium repository commit information fetcher"""
+
+    def __init__(
+        self,
+        session: Optional["requests.Session"] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        rate_limit: Optional[float] = None,
+        cache: Optional[Any] = None,
+        log_ttl: float = DEFAULT_LOG_TTL,
+        head_ttl: float = DEFAULT_HEAD_TTL,
+        backend: Optional[LocalGitBackend] = None,
+        path_index: Optional[PathIndex] = None,
+    ):
         """
-        Format commit information into a readable string
+        Args:
+            session: Existing HTTP session to share; a pooled session is created if omitted
+            pool_size: Maximum number of pooled connections per host
+            max_retries: Number of retries for connection errors and 429/5xx responses
+            backoff_factor: Exponential backoff factor between retries (seconds)
+            rate_limit: Maximum requests per second to each host (no cap until Gitiles
+                throttles us if None); lowered automatically while Gitiles answers 429
+            cache: Response cache providing get()/set(), e.g. CommitCache (no caching if None)
+            log_ttl: Seconds cached results that follow HEAD (history, listings) stay valid
+            head_ttl: Seconds a resolved HEAD commit is trusted before revalidating it
+            backend: Local clone answering latest-commit, details and diff queries
+                instead of Gitiles (history and directory listings still use Gitiles)
+            path_index: Precomputed path to latest commit index consulted first
+        """
+        super().__init__(
+            max_retries,
+            backoff_factor,
+            rate_limit,
+            cache,
+            log_ttl,
+            head_ttl,
+            backend,
+            path_index,
+        )
+        # Every Gitiles call goes through this session so TCP/TLS connections are reused
+        self.session = session or create_session(pool_size, max_retries, backoff_factor)
+        # Concurrent requests for the same path or commit share one in-flight fetch
+        self._single_flight = SingleFlight()
+        # Held while the path index is brought up to HEAD
+        self._path_index_lock = threading.Lock()
+
+    def _cache_get(self, key: str) -> Optional[Any]:
+        """Look up a cached response, treating cache failures as misses"""
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning("Cache read error: %s", e)
+            return None
+
+    def _cache_set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a response in the cache, ignoring cache failures"""
+        if self.cache is None or value is None:
+            return
+        try:
+            self.cache.set(key, value, ttl)
+        except Exception as e:
+            logger.warning("Cache write error: %s", e)
+
+    def _cached(
+        self,
+        cache_key: str,
+        fetch: Callable[[], Any],
+        ttl: Optional[float] = None,
+        cacheable: bool = True,
+        refresh: bool = False,
+    ) -> Any:
+        """
+        Serve a response from the cache, or fetch it once for all concurrent callers
 
         Args:
-            commit_info: Basic commit information
-            commit_details: Detailed commit information (optional)
-            show_diff: Whether to show diff content
-            commit_diff: Commit diff content (optional)
+            cache_key: Key identifying the response
+            fetch: Function performing the network request
+            ttl: Seconds the response stays valid (never expires if None)
+            cacheable: Whether the response may be cached at all
+            refresh: Fetch even if cached, replacing the cached response
 
         Returns:
-            Formatted string
+            Cached or freshly fetched response (None responses are not cached)
         """
-        result = []
-        result.append("=" * 80)
-        result.append("CHROMIUM REPOSITORY FILE LATEST CHANGE INFORMATION")
-        result.append("=" * 80)
+        if cacheable and not refresh:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug("Using cached response: %s", cache_key)
+                METRICS.count("cache_hits")
+                return cached
+            METRICS.count("cache_misses")
 
-        # Basic information
-        result.append(f"Commit Hash: {commit_info.get('commit', 'N/A')}")
+        def load():
+            # Another caller may have filled the cache while we waited for our turn
+            if cacheable and not refresh:
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    return cached
+            value = fetch()
+            if cacheable:
+                self._cache_set(cache_key, value, ttl)
+            return value
 
-        author_info = commit_info.get("author", {})
-        author_name = author_info.get("name", "N/A")
-        author_email = author_info.get("email", "N/A")
-        result.append(f"Author: {author_name} <{author_email}>")
+        return self._single_flight.do(cache_key, load)
 
-        committer_info = commit_info.get("committer", {})
-        committer_name = committer_info.get("name", "N/A")
-        committer_email = committer_info.get("email", "N/A")
-        result.append(f"Committer: {committer_name} <{committer_email}>")
+    def _request(self, request: GitilesRequest, refresh: bool = False) -> Any:
+        """Answer a request from the cache, or send it once for all concurrent callers"""
+        return self._cached(
+            request.cache_key,
+            lambda: self._send(request),
+            request.ttl,
+            request.cacheable,
+            refresh,
+        )
 
-        # Time information
-        if "committer" in commit_info and "time" in commit_info["committer"]:
-            commit_time = commit_info["committer"]["time"]
+    def _send(self, request: GitilesRequest) -> Any:
+        """Send a request to Gitiles and read its result, wrapping failures in GitilesError"""
+        with METRICS.time(request.stage):
             try:
-                # Parse timestamp
-                dt = datetime.fromisoformat(commit_time.replace("Z", "+00:00"))
-                result.append(f"Commit Time: {dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            except:
-                result.append(f"Commit Time: {commit_time}")
-
-        # Commit message
-        message = commit_info.get("message", "N/A").strip()
-        result.append(f"\nCommit Message:")
-        result.append("-" * 40)
-        for line in message.split("\n"):
-            result.append(f"  {line}")
-
-        # If detailed information is available, show all modified files
-        if commit_details and "tree_diff" in commit_details:
-            result.append(f"\nAll files modified in this commit:")
-            result.append("-" * 40)
-
-            for diff in commit_details["tree_diff"]:
-                old_path = diff.get("old_path", "")
-                new_path = diff.get("new_path", "")
-                change_type = diff.get("type", "unknown")
-
-                if change_type == "add":
-                    result.append(f"  [ADDED] {new_path}")
-                elif change_type == "delete":
-                    result.append(f"  [DELETED] {old_path}")
-                elif change_type == "modify":
-                    result.append(f"  [MODIFIED] {new_path}")
-                elif change_type == "rename":
-                    result.append(f"  [RENAMED] {old_path} -> {new_path}")
-                else:
-                    path = new_path or old_path
-                    result.append(f"  [{change_type}] {path}")
-
-        # If diff content needs to be displayed
-        if show_diff and commit_diff:
-            result.append(f"\nCode Change Details (DIFF):")
-            result.append("=" * 80)
-            # Limit diff length to avoid overly long output
-            diff_lines = commit_diff.split("\n")
-            max_lines = 1000  # Show maximum 1000 lines of diff
-
-            if len(diff_lines) > max_lines:
-                result.append(
-                    f"Note: Diff content is too long, showing only first {max_lines} lines"
+                logger.info(request.description)
+                if request.decoder is None:
+                    response = self._get(request.url, timeout=request.timeout)
+                    if response.status_code == 404:
+                        return self._read_response(request, None)
+                    response.raise_for_status()
+                    return self._read_response(request, response.content)
+
+                response = self._get(request.url, timeout=request.timeout, stream=True)
+                try:
+                    if response.status_code == 404:
+                        return self._read_response(request, None)
+                    response.raise_for_status()
+                    decoder = request.decoder(raw_body_size(response.headers))
+                    for chunk in response.iter_content(DIFF_CHUNK_SIZE):
+                        METRICS.count("response_bytes", len(chunk))
+                        if decoder.feed(chunk):
+                            break
+                finally:
+                    # Stops the download if the budget was reached before the end
+                    response.close()
+                return request.finish(decoder.finish())
+
+            except Exception as e:
+                raise GitilesError(f"{request.error}: {e}") from e
+
+    def _get(
+        self, url: str, timeout: float, stream: bool = False
+    ) -> "requests.Response":
+        """
+        Issue a GET request to Gitiles through the pooled session
+
+        Connection errors and 5xx responses are retried by urllib3; 429 responses
+        are retried here after the shared rate limiter has slowed down.
+        """
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(host)
+            with METRICS.in_flight():
+                response = self.session.get(url, timeout=timeout, stream=stream)
+            count_request()
+            # urllib3 records the retries it made for this request
+            retries = getattr(response.raw, "retries", None)
+            if retries is not None and retries.history:
+                METRICS.count("retries", len(retries.history))
+
+            if response.status_code != THROTTLED_STATUS:
+                self.rate_limiter.succeeded(host)
+                if not stream:
+                    METRICS.count("response_bytes", len(response.content))
+                return response
+
+            METRICS.count("throttled")
+            self.rate_limiter.throttled(
+                host, parse_retry_after(response.headers.get("Retry-After"))
+            )
+            if attempt >= self.max_retries:
+                # Callers turn the 429 into a GitilesError
+                return response
+            response.close()
+            METRICS.count("retries")
+            attempt += 1
+
+    def get_file_latest_commit(
+        self, file_path: str, refresh: bool = False
+    ) -> Optional[Dict]:
+        """
+        Get the latest commit information for the specified file
+
+        Args:
+            file_path: Relative path of the file, e.g. "components/sync/service/data_type_manager.cc"
+            refresh: Revalidate HEAD now instead of trusting a recently resolved one
+
+        Returns:
+            Dictionary containing commit information, or None if not found
+        """
+        # Normalize path format (use forward slashes)
+        normalized_path = file_path.replace("\\", "/")
+        if self.path_index is not None and self._path_index_is_current(refresh):
+            entry = self.path_index.lookup(normalized_path)
+            commit_info = self._get_indexed_commit(entry[0]) if entry else None
+            if commit_info:
+                return commit_info
+        if self.backend is not None:
+            return call_backend(self.backend.get_file_latest_commit, normalized_path)
+        head = self.get_head_commit(refresh=refresh)
+        if head is None:
+            # HEAD could not be resolved; fall back to a short-lived unpinned lookup
+            return self._request(self._latest_commit_request(normalized_path), refresh=refresh)
+        return self._get_pinned_latest_commit(normalized_path, head)
+
+    def _get_pinned_latest_commit(self, normalized_path: str, head: str) -> Optional[Dict]:
+        """
+        Get the latest commit of a path as of a resolved HEAD
+
+        Each path has one cache entry recording the HEAD it was resolved at. While
+        HEAD has not moved it answers every lookup; once HEAD moves, only the
+        commits added since are asked for and an unchanged path keeps its answer.
+        The entry is then replaced, so superseded HEADs leave nothing behind.
+        """
+        cache_key = f"latest:{normalized_path}"
+        latest = pinned_latest(self._cache_get(cache_key), head)
+        if latest is not None:
+            logger.debug("Using cached response: %s", cache_key)
+            METRICS.count("cache_hits")
+            return latest
+        METRICS.count("cache_misses")
+
+        def load():
+            entry = self._cache_get(cache_key)
+            latest = pinned_latest(entry, head)
+            if latest is not None:
+                return latest
+            previous = previous_pinned_latest(entry)
+            if previous is not None:
+                latest = self._send(
+                    self._latest_commit_request(normalized_path, head, previous)
                 )
-                result.append("-" * 40)
-                for line in diff_lines[:max_lines]:
-                    result.append(line)
-                result.append("-" * 40)
-                result.append(f"... (omitted {len(diff_lines) - max_lines} lines)")
+                if latest is not None:
+                    METRICS.count("revalidations")
+            if latest is None:
+                latest = self._send(self._latest_commit_request(normalized_path, head))
+            if latest is not None:
+                self._cache_set(cache_key, pinned_latest_entry(head, latest), PINNED_LOG_TTL)
+            return latest
+
+        return self._single_flight.do(f"{cache_key}@{head}", load)
+
+    def get_head_commit(self, refresh: bool = False) -> Optional[str]:
+        """
+        Resolve HEAD to a commit hash, shared by all lookups for head_ttl seconds
+
+        Args:
+            refresh: Ask Gitiles even if a recently resolved hash is remembered
+
+        Returns:
+            Commit hash, or None if it could not be resolved
+        """
+        head = self._remembered(self._head)
+        if head is not None and not refresh:
+            return head
+        try:
+            return self._request(self._head_request(), refresh=refresh)
+        except GitilesError as e:
+            logger.warning("%s", e)
+            return None
+
+    def _path_index_is_current(self, refresh: bool = False) -> bool:
+        """
+        Check that the path index reflects the HEAD lookups would otherwise query
+
+        An index built at an older commit may miss newer changes of any file, so
+        it is only used at the clone's revision, or the Gitiles HEAD without a
+        local backend. When that has moved, one lookup brings the index up to it
+        while concurrent lookups answer without the index.
+        """
+        if self.backend is not None:
+            head = self._get_clone_revision(refresh)
+        else:
+            head = self.get_head_commit(refresh=refresh)
+        if head is None:
+            return False
+        if head == self.path_index.indexed_head:
+            return True
+        if head == self._path_index_stale_head or not self._path_index_lock.acquire(
+            blocking=False
+        ):
+            return False
+        try:
+            return self._update_path_index(head)
+        finally:
+            self._path_index_lock.release()
+
+    def _get_clone_revision(self, refresh: bool = False) -> Optional[str]:
+        """Resolve the local clone's revision, reused for head_ttl seconds"""
+        revision = self._remembered(self._revision)
+        if revision is None or refresh:
+            revision = call_backend(self.backend.resolve_revision)
+            if revision:
+                self._revision = (revision, time.monotonic())
+        return revision
+
+    def _update_path_index(self, head: str) -> bool:
+        """Bring the path index up to head incrementally, returning whether it got there"""
+        indexed_head = self.path_index.indexed_head
+        try:
+            if indexed_head == head:
+                count = 0
+            elif self.backend is not None:
+                # Rebuilding after a history rewrite takes too long for a lookup
+                count = call_backend(self.path_index.update, self.backend, head, False)
             else:
-                for line in diff_lines:
-                    result.append(line)
+                count = self._catch_up_path_index(indexed_head, head)
+        except (GitilesError, sqlite3.Error) as e:
+            logger.warning("Unable to update the path index: %s", e)
+            count = None
+        if self.path_index.indexed_head == head:
+            if count:
+                logger.info("Path index updated (%d paths) to %s", count, head)
+            return True
+        self._path_index_stale_head = head
+        return False
 
-        result.append("=" * 80)
-        return "\n".join(result)
+    def _catch_up_path_index(self, indexed_head: str, head: str) -> Optional[int]:
+        """Apply the commits between the indexed HEAD and head, read from the Gitiles log"""
+        commits = []
+        start = None
+        while True:
+            page = self._send(self._index_catch_up_request(indexed_head, head, start))
+            if not page:
+                return None
+            commits.extend(index_changes(commit) for commit in page.get("log", []))
+            start = page.get("next")
+            if not start:
+                return self.path_index.apply_commits(indexed_head, head, commits)
+            if len(commits) >= MAX_INDEX_CATCH_UP_COMMITS:
+                logger.warning(
+                    "Path index is more than %d commits behind, run `path_index.py update`",
+                    MAX_INDEX_CATCH_UP_COMMITS,
+                )
+                return None
+
+    def _get_indexed_commit(self, commit_hash: str) -> Optional[Dict]:
+        """Get the commit information of a path index hit (immutable, so cached forever)"""
+        if self.backend is not None:
+            return self._cached(
+                f"commit:{commit_hash}",
+                lambda: call_backend(self.backend.get_commit, commit_hash),
+                cacheable=is_immutable_commit(commit_hash),
+            )
+        return self.get_commit_details(commit_hash)
+
+    def iter_file_history(
+        self,
+        file_path: str,
+        since: Optional[str] = None,
+        page_size: int = DEFAULT_HISTORY_PAGE_SIZE,
+        name_status: bool = False,
+    ) -> Iterator[Dict]:
+        """
+        Lazily iterate over the commits that touched a file or directory, newest first
+
+        Pages are requested from Gitiles only as the caller consumes them, following
+        the "next" cursor, so stopping early avoids fetching further pages.
+
+        Args:
+            file_path: File or directory path
+            since: Only yield commits after this date (ISO format) or commit hash
+            page_size: Number of commits requested per page
+            name_status: Include each commit's changed files ("tree_diff")
+
+        Yields:
+            Commit information dictionaries as returned by the +log API
+        """
+        normalized_path = file_path.replace("\\", "/")
+        since_date, since_commit = parse_since(since)
+
+        start = None
+        while True:
+            page = self._request(
+                self._log_page_request(
+                    normalized_path, page_size, start, since_commit, name_status
+                )
+            )
+            commits, start = history_page_commits(page, since_date)
+            yield from commits
+            if not start:
+                return
+
+    def get_file_history(
+        self,
+        file_path: str,
+        limit: int = DEFAULT_HISTORY_LIMIT,
+        since: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Get the last commits that touched a file or directory
+
+        Args:
+            file_path: File or directory path
+            limit: Maximum number of commits to return
+            since: Only return commits after this date (ISO format) or commit hash
+
+        Returns:
+            List of commit information dictionaries, newest first
+        """
+        history = self.iter_file_history(
+            file_path, since, page_size=min(limit, DEFAULT_HISTORY_PAGE_SIZE)
+        )
+        return list(itertools.islice(history, limit))
+
+    def list_directory_files(self, directory: str) -> Optional[List[str]]:
+        """
+        List all files below a directory at HEAD
+
+        Args:
+            directory: Directory path, e.g. "components/sync/"
+
+        Returns:
+            Full paths of the files (recursively), or None if the directory was not found
+        """
+        normalized_dir = directory.replace("\\", "/").strip("/")
+        return self._request(self._directory_request(normalized_dir))
+
+    def get_directory_latest_commits(
+        self,
+        directory: str,
+        page_size: int = DEFAULT_DIRECTORY_PAGE_SIZE,
+        max_commits: Optional[int] = None,
+    ) -> Optional[Dict[str, Union[Dict, GitilesError, None]]]:
+        """
+        Get the latest commit of every file below a directory in one pass over its log
+
+        The directory's +log is walked newest first with changed-file lists, and
+        only as many pages are requested as needed to resolve every file. Files
+        still unresolved when the log (or max_commits) runs out are looked up
+        individually.
+
+        Args:
+            directory: Directory path, e.g. "components/sync/"
+            page_size: Number of commits requested per log page
+            max_commits: Maximum number of directory commits to walk (unlimited if None)
+
+        Returns:
+            Mapping of file path to its latest commit (None if not found, or the
+            GitilesError of a failed individual lookup) in listing order, or None
+            if the directory was not found
+        """
+        file_paths = self.list_directory_files(directory)
+        if file_paths is None:
+            return None
+
+        resolver = DirectoryCommitResolver(file_paths)
+        if file_paths:
+            history = self.iter_file_history(
+                directory.replace("\\", "/").strip("/"),
+                page_size=page_size,
+                name_status=True,
+            )
+            for commit in itertools.islice(history, max_commits):
+                if resolver.add(commit):
+                    break
+
+        for path in list(resolver.pending):
+            try:
+                commit = self.get_file_latest_commit(path)
+            except GitilesError as e:
+                # Reported with the other files instead of failing the whole listing
+                commit = e
+            if commit:
+                resolver.latest[path] = commit
+
+        return resolver.results()
+
+    def get_commit_details(self, commit_hash: str) -> Optional[Dict]:
+        """
+        Get detailed information for the specified commit, including all modified files
+
+        Args:
+            commit_hash: The commit hash value
+
+        Returns:
+            Dictionary containing detailed information, or None if not found
+        """
+        if self.backend is not None:
+            return call_backend(self.backend.get_commit_details, commit_hash)
+        return self._request(self._details_request(commit_hash))
+
+    def get_commit_diff(self, commit_hash: str) -> Optional[str]:
+        """
+        Get complete diff information for the specified commit
+
+        Args:
+            commit_hash: The commit hash value
+
+        Returns:
+            Complete diff content, or None if not found
+        """
+        if self.backend is not None:
+            return call_backend(self.backend.get_commit_diff, commit_hash)
+        return self._request(self._diff_request(commit_hash))
+
+    def get_commit_diff_excerpt(
+        self,
+        commit_hash: str,
+        max_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_bytes: Optional[int] = None,
+        paths: Optional[List[str]] = None,
+    ) -> Optional[DiffExcerpt]:
+        """
+        Stream the diff of the specified commit, stopping once a line/byte budget is reached
+
+        Args:
+            commit_hash: The commit hash value
+            max_lines: Maximum number of diff lines to read (unlimited if None)
+            max_bytes: Maximum number of decoded diff bytes to read (unlimited if None)
+            paths: Only include the diff of these files or directories (whole commit if None)
+
+        Returns:
+            DiffExcerpt with the leading part of the diff, or None if not found
+        """
+        if self.backend is not None:
+            return call_backend(
+                read_local_diff_excerpt,
+                self.backend,
+                commit_hash,
+                max_lines,
+                max_bytes,
+                paths,
+            )
+        return as_diff_excerpt(
+            self._request(
+                self._diff_excerpt_request(commit_hash, max_lines, max_bytes, paths)
+            )
+        )
+
+    def _get_commit_parts(
+        self,
+        commit_info: Dict,
+        details: bool,
+        diff: bool,
+        max_diff_lines: Optional[int],
+        max_diff_bytes: Optional[int],
+        diff_paths: Optional[List[str]],
+    ) -> Tuple[Optional[Dict], Optional[DiffExcerpt]]:
+        """Fetch the details and/or diff excerpt of an already resolved commit"""
+        commit_details = None
+        commit_diff = None
+
+        commit_hash = commit_info.get("commit")
+        if commit_hash:
+            if details:
+                commit_details = self.get_commit_details(commit_hash)
+            if diff:
+                commit_diff = self.get_commit_diff_excerpt(
+                    commit_hash, max_diff_lines, max_diff_bytes, diff_paths
+                )
+        return commit_details, commit_diff
 
     def get_file_commit_info(
-        self, file_path: str, detailed: bool = True, show_diff: bool = False
+        self,
+        file_path: str,
+        detailed: bool = True,
+        show_diff: bool = False,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        file_diff_only: bool = False,
+        extra_diff_paths: Optional[List[str]] = None,
     ) -> Optional[str]:
         """
         Get complete commit information for a file
@@ -256,6 +2078,10 @@ class ChromiumCommitFetcher:
             file_path: File path
             detailed: Whether to get detailed information (including all modified files)
             show_diff: Whether to show diff code comparison
+            max_diff_lines: Maximum diff lines to download and show (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download and show (unlimited if None)
+            file_diff_only: Only show the diff of file_path instead of the whole commit
+            extra_diff_paths: Other files of the commit to include with file_diff_only
 
         Returns:
             Formatted commit information string
@@ -265,19 +2091,176 @@ class ChromiumCommitFetcher:
         if not commit_info:
             return None
 
-        commit_details = None
-        commit_diff = None
+        return self.get_formatted_commit_info(
+            commit_info,
+            detailed,
+            show_diff,
+            max_diff_lines=max_diff_lines,
+            max_diff_bytes=max_diff_bytes,
+            diff_paths=file_diff_paths(
+                file_path.replace("\\", "/"), file_diff_only, extra_diff_paths
+            ),
+        )
 
-        commit_hash = commit_info.get("commit")
-        if commit_hash:
-            if detailed:
-                commit_details = self.get_commit_details(commit_hash)
-            if show_diff:
-                commit_diff = self.get_commit_diff(commit_hash)
+    def get_formatted_commit_info(
+        self,
+        commit_info: Dict,
+        detailed: bool = True,
+        show_diff: bool = False,
+        requested_paths: Optional[List[str]] = None,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        diff_paths: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Fetch details and diff for an already resolved commit and format them
+
+        Args:
+            commit_info: Basic commit information, e.g. from get_file_latest_commit
+            detailed: Whether to get detailed information (including all modified files)
+            show_diff: Whether to show diff code comparison
+            requested_paths: Queried file paths whose latest change is this commit (optional)
+            max_diff_lines: Maximum diff lines to download and show (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download and show (unlimited if None)
+            diff_paths: Only show the diff of these files (whole commit if None)
 
+        Returns:
+            Formatted commit information string
+        """
+        commit_details, commit_diff = self._get_commit_parts(
+            commit_info, detailed, show_diff, max_diff_lines, max_diff_bytes, diff_paths
+        )
         return self.format_commit_info(
-            commit_info, commit_details, show_diff, commit_diff
+            commit_info, commit_details, show_diff, commit_diff, requested_paths
+        )
+
+    def get_file_commit_record(
+        self,
+        file_path: str,
+        fields: Optional[List[str]] = None,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        file_diff_only: bool = False,
+        extra_diff_paths: Optional[List[str]] = None,
+    ) -> Optional[CommitRecord]:
+        """
+        Get the latest commit of a file as a structured record
+
+        Args:
+            file_path: File path
+            fields: Fields to include (all if None); leaving out "files" or "diff"
+                skips downloading the commit details or diff
+            max_diff_lines: Maximum diff lines to download (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download (unlimited if None)
+            file_diff_only: Only include the diff of file_path instead of the whole commit
+            extra_diff_paths: Other files of the commit to include with file_diff_only
+
+        Returns:
+            CommitRecord, or None if no commit was found
+        """
+        commit_info = self.get_file_latest_commit(file_path)
+        if not commit_info:
+            return None
+
+        normalized_path = file_path.replace("\\", "/")
+        return self.get_commit_record(
+            commit_info,
+            fields,
+            requested_paths=[normalized_path],
+            max_diff_lines=max_diff_lines,
+            max_diff_bytes=max_diff_bytes,
+            diff_paths=file_diff_paths(normalized_path, file_diff_only, extra_diff_paths),
+        )
+
+    def get_commit_record(
+        self,
+        commit_info: Dict,
+        fields: Optional[List[str]] = None,
+        requested_paths: Optional[List[str]] = None,
+        max_diff_lines: Optional[int] = DEFAULT_MAX_DIFF_LINES,
+        max_diff_bytes: Optional[int] = None,
+        diff_paths: Optional[List[str]] = None,
+    ) -> CommitRecord:
+        """
+        Fetch what the selected fields need for an already resolved commit and build its record
+
+        Args:
+            commit_info: Basic commit information, e.g. from get_file_latest_commit
+            fields: Fields to include (all if None)
+            requested_paths: Queried file paths whose latest change is this commit (optional)
+            max_diff_lines: Maximum diff lines to download (unlimited if None)
+            max_diff_bytes: Maximum diff bytes to download (unlimited if None)
+            diff_paths: Only include the diff of these files (whole commit if None)
+
+        Returns:
+            CommitRecord with only the selected fields set
+        """
+        commit_details, commit_diff = self._get_commit_parts(
+            commit_info,
+            wants_field(fields, "files"),
+            wants_field(fields, "diff"),
+            max_diff_lines,
+            max_diff_bytes,
+            diff_paths,
         )
+        return build_commit_record(
+            commit_info, commit_details, commit_diff, requested_paths, fields
+        )
+
+
+def setup_logging():
+    """Send progress and diagnostic messages to stderr, keeping stdout for results"""
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+
+
+def add_session_arguments(parser: argparse.ArgumentParser):
+    """Add HTTP session tuning options shared by the command line tools"""
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help=f"Maximum pooled connections per host (default: {DEFAULT_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries for connection errors and 429/5xx responses (default: {DEFAULT_MAX_RETRIES})",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Maximum requests per second to Gitiles, lowered automatically while "
+        "Gitiles answers 429 (default: no cap until throttled)",
+    )
+
+
+def add_diff_arguments(parser: argparse.ArgumentParser):
+    """Add diff size budget options shared by the command line tools"""
+    parser.add_argument(
+        "--max-diff-lines",
+        type=int,
+        default=DEFAULT_MAX_DIFF_LINES,
+        help=f"Stop downloading a diff after this many lines, 0 for no limit (default: {DEFAULT_MAX_DIFF_LINES})",
+    )
+    parser.add_argument(
+        "--max-diff-bytes",
+        type=int,
+        default=0,
+        help="Stop downloading a diff after this many bytes, 0 for no limit (default: 0)",
+    )
+    parser.add_argument(
+        "--file-diff-only",
+        action="store_true",
+        help="Only show the diff of the requested file(s) instead of the whole commit",
+    )
+    parser.add_argument(
+        "--diff-path",
+        action="append",
+        default=[],
+        help="Additional file of the commit to include with --file-diff-only (repeatable)",
+    )
 
 
 def main():
@@ -288,12 +2271,106 @@ def main():
     )
     parser.add_argument("file_path", help="Relative path of the file")
     parser.add_argument("--output", "-o", help="Save output to specified file")
+    parser.add_argument(
+        "--history",
+        type=int,
+        metavar="N",
+        help="List the last N commits that touched the path instead of the latest commit details",
+    )
+    parser.add_argument(
+        "--directory",
+        action="store_true",
+        help="Treat the path as a directory and list the latest commit of every file in it",
+    )
+    parser.add_argument(
+        "--since",
+        help="With --history, only list commits after this date (YYYY-MM-DD) or commit hash",
+    )
+    add_session_arguments(parser)
+    add_cache_arguments(parser)
+    add_diff_arguments(parser)
+    add_output_arguments(parser)
+    add_git_arguments(parser)
+    add_index_arguments(parser)
+    add_stats_arguments(parser)
 
     args = parser.parse_args()
-    fetcher = ChromiumCommitFetcher()
+    setup_logging()
+    enable_stats_report(args.stats)
+    backend = open_backend(args.git_dir, args.git_revision)
+    fetcher = ChromiumCommitFetcher(
+        pool_size=args.pool_size,
+        max_retries=args.retries,
+        rate_limit=args.rate_limit,
+        cache=None if args.no_cache else open_cache(args.cache_dir, args.cache_size),
+        backend=backend,
+        path_index=open_path_index(args.path_index),
+    )
+
+    structured = args.format != "text"
+    result = None
+    # Only set for structured output, rendered after fetching
+    records = None
+    # Keep progress messages out of structured output on stdout
+    with contextlib.redirect_stdout(sys.stderr) if structured else contextlib.nullcontext():
+        try:
+            if args.directory:
+                latest_commits = fetcher.get_directory_latest_commits(args.file_path)
+                if latest_commits and structured:
+                    records = [
+                        build_commit_record(
+                            commit, requested_paths=[path], fields=args.fields
+                        ).to_dict()
+                        for path, commit in latest_commits.items()
+                        if commit and not isinstance(commit, GitilesError)
+                    ]
+                elif latest_commits:
+                    result = format_directory_commits(args.file_path, latest_commits)
+            elif args.history:
+                try:
+                    commits = fetcher.get_file_history(
+                        args.file_path, args.history, args.since
+                    )
+                except ValueError as e:
+                    print(f"Invalid --since value: {e}")
+                    sys.exit(1)
+                if commits and structured:
+                    records = [
+                        build_commit_record(commit, fields=args.fields).to_dict()
+                        for commit in commits
+                    ]
+                elif commits:
+                    result = format_history(args.file_path, commits)
+            elif structured:
+                record = fetcher.get_file_commit_record(
+                    args.file_path,
+                    args.fields,
+                    max_diff_lines=args.max_diff_lines or None,
+                    max_diff_bytes=args.max_diff_bytes or None,
+                    file_diff_only=args.file_diff_only,
+                    extra_diff_paths=args.diff_path,
+                )
+                records = [record.to_dict()] if record else None
+            else:
+                # Get commit information, show diff by default
+                result = fetcher.get_file_commit_info(
+                    args.file_path,
+                    detailed=True,
+                    show_diff=True,
+                    max_diff_lines=args.max_diff_lines or None,
+                    max_diff_bytes=args.max_diff_bytes or None,
+                    file_diff_only=args.file_diff_only,
+                    extra_diff_paths=args.diff_path,
+                )
+        except GitilesError as e:
+            # Not the same as a file without history: the answer is unknown
+            print(f"Error: {e}")
+            sys.exit(1)
 
-    # Get commit information, show diff by default
-    result = fetcher.get_file_commit_info(args.file_path, detailed=True, show_diff=True)
+    if records:
+        output = io.StringIO()
+        write_records(records, output, args.format)
+        result = output.getvalue()
 
     if result:
         if args.output:
@@ -304,6 +2381,8 @@ def main():
             except Exception as e:
                 print(f"Error saving file: {e}")
                 print("\n" + result)
+        elif structured:
+            sys.stdout.write(result)
         else:
             print("\n" + result)
     else:
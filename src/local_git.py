@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Local git backend answering commit queries from a clone of chromium/src
+
+Features:
+- Latest commit of a path, commit details with "tree_diff" and commit diffs,
+  in the same shape as the Gitiles JSON responses
+- Works with bare, partial (--filter=blob:none) and regular clones; a partial
+  clone downloads the blobs a diff needs on first use
+- Diffs are streamed from git, so a line/byte budget stops reading early
+- No network access needed; lookups take milliseconds instead of HTTP round trips
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Commit fields separated by NUL bytes; the message (%B) comes last as it may contain anything
+_COMMIT_FORMAT = "%H%x00%T%x00%P%x00%an%x00%ae%x00%ad%x00%cn%x00%ce%x00%cd%x00%B"
+_COMMIT_FIELD_COUNT = 10
+
+# git diff-tree --raw status letters to Gitiles tree_diff types
+_CHANGE_TYPES = {
+    "A": "add",
+    "D": "delete",
+    "M": "modify",
+    "T": "modify",
+    "R": "rename",
+    "C": "copy",
+}
+DIFF_READ_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class GitError(Exception):
+    """Raised when a git command fails"""
+
+
+class LocalGitBackend:
+    """Answer commit queries with git commands on a local clone"""
+
+    def __init__(self, git_dir: str, revision: str = "HEAD", git: str = "git"):
+        """
+        Args:
+            git_dir: Path of the clone (its work tree or the bare repository)
+            revision: Revision treated as the tip of the branch, e.g. "origin/main"
+            git: git executable
+        """
+        if not os.path.isdir(git_dir):
+            raise GitError(f"{git_dir} is not a directory")
+        self.git_dir = git_dir
+        self.revision = revision
+        self.git = git
+        # Fails early if git_dir is not a repository
+        self._run("rev-parse", "--git-dir")
+
+    def _command(self, *args: str) -> List[str]:
+        return [self.git, "-C", self.git_dir, "--no-pager", *args]
+
+    def _run(self, *args: str) -> str:
+        """Run a git command and return its standard output"""
+        result = subprocess.run(
+            self._command(*args),
+            capture_output=True,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+        if result.returncode != 0:
+            raise GitError(
+                result.stderr.decode("utf-8", errors="replace").strip()
+                or f"git {args[0]} failed"
+            )
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def _parse_commit(self, output: str) -> Optional[Dict]:
+        """Convert _COMMIT_FORMAT output to a Gitiles-style commit dictionary"""
+        fields = output.split("\0", _COMMIT_FIELD_COUNT - 1)
+        if len(fields) < _COMMIT_FIELD_COUNT:
+            return None
+        (
+            commit,
+            tree,
+            parents,
+            author_name,
+            author_email,
+            author_time,
+            committer_name,
+            committer_email,
+            committer_time,
+            message,
+        ) = fields
+        return {
+            "commit": commit,
+            "tree": tree,
+            "parents": parents.split(),
+            "author": {"name": author_name, "email": author_email, "time": author_time},
+            "committer": {
+                "name": committer_name,
+                "email": committer_email,
+                "time": committer_time,
+            },
+            "message": message,
+        }
+
+    def _diff_tree_args(self, commit: Dict) -> List[str]:
+        """Compare a commit with its first parent, like Gitiles' <commit>^! diffs"""
+        if commit["parents"]:
+            return [commit["parents"][0], commit["commit"]]
+        return ["--root", commit["commit"]]
+
+    def get_file_latest_commit(self, normalized_path: str) -> Optional[Dict]:
+        """
+        Get the latest commit touching a path
+
+        Args:
+            normalized_path: File or directory path with forward slashes
+
+        Returns:
+            Commit dictionary as returned by Gitiles +log, or None if not found
+        """
+        logger.info("Querying file (local): %s", normalized_path)
+        output = self._run(
+            "log",
+            "-1",
+            f"--format={_COMMIT_FORMAT}",
+            "--date=default",
+            self.revision,
+            "--",
+            normalized_path,
+        )
+        if not output:
+            logger.info("No commit history found for file %s", normalized_path)
+            return None
+        return self._parse_commit(output.rstrip("\n"))
+
+    def get_commit(self, commit_hash: str) -> Optional[Dict]:
+        """Get a commit's metadata without its changed files"""
+        try:
+            output = self._run(
+                "show",
+                "-s",
+                f"--format={_COMMIT_FORMAT}",
+                "--date=default",
+                f"{commit_hash}^{{commit}}",
+            )
+        except GitError:
+            return None
+        return self._parse_commit(output.rstrip("\n"))
+
+    def get_commit_details(self, commit_hash: str) -> Optional[Dict]:
+        """
+        Get a commit with the files it changed
+
+        Args:
+            commit_hash: Commit hash or revision
+
+        Returns:
+            Commit dictionary with "tree_diff", as returned by Gitiles +/<commit>, or None if not found
+        """
+        logger.info("Getting commit details (local): %s", commit_hash)
+        commit = self.get_commit(commit_hash)
+        if commit is None:
+            return None
+
+        output = self._run(
+            "diff-tree", "-r", "-z", "-M", "--no-commit-id", *self._diff_tree_args(commit)
+        )
+        commit["tree_diff"] = _parse_raw_diff(output)
+        return commit
+
+    def get_commit_diff(self, commit_hash: str) -> Optional[str]:
+        """
+        Get the complete diff of a commit against its first parent
+
+        Returns:
+            Diff text, or None if the commit was not found
+        """
+        logger.info("Getting commit diff (local): %s", commit_hash)
+        commit = self.get_commit(commit_hash)
+        if commit is None:
+            return None
+        return self._run(
+            "diff-tree", "-p", "-M", "--no-commit-id", *self._diff_tree_args(commit)
+        )
+
+    @contextmanager
+    def open_commit_diff(
+        self, commit_hash: str, paths: Optional[List[str]] = None
+    ) -> Iterator[Optional[Iterator[bytes]]]:
+        """
+        Stream the diff of a commit against its first parent
+
+        Leaving the context stops git, so readers can quit as soon as they have
+        read enough.
+
+        Args:
+            commit_hash: Commit hash or revision
+            paths: Only diff these files or directories (whole commit if None)
+
+        Yields:
+            Iterator of raw diff chunks, or None if the commit was not found
+        """
+        logger.info("Streaming commit diff (local): %s", commit_hash)
+        commit = self.get_commit(commit_hash)
+        if commit is None:
+            yield None
+            return
+
+        args = ["diff-tree", "-p", "-M", "--no-commit-id", *self._diff_tree_args(commit)]
+        if paths:
+            args += ["--", *paths]
+        process = subprocess.Popen(
+            self._command(*args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+        try:
+            yield iter(lambda: process.stdout.read(DIFF_READ_SIZE), b"")
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+    def resolve_revision(self, revision: Optional[str] = None) -> str:
+        """Resolve a revision (the configured tip by default) to a full commit hash"""
+        return self._run(
+            "rev-parse", "--verify", f"{revision or self.revision}^{{commit}}"
+        ).strip()
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        """Check whether one commit is reachable from another"""
+        try:
+            self._run("merge-base", "--is-ancestor", ancestor, descendant)
+            return True
+        except GitError:
+            return False
+
+    def list_files(self, revision: str) -> List[str]:
+        """List every file path in the tree of a revision"""
+        output = self._run(
+            "ls-tree", "-r", "-z", "--name-only", "--full-tree", revision
+        )
+        return [path for path in output.split("\0") if path]
+
+    @contextmanager
+    def open_log(
+        self, revision_range: str
+    ) -> Iterator[Iterator[Tuple[str, int, List[Tuple[str, str]]]]]:
+        """
+        Stream the changed files of every commit in a range, newest first
+
+        Renames are reported as a delete plus an add. Leaving the context stops git.
+
+        Args:
+            revision_range: e.g. "HEAD" for all history or "<old>..<new>"
+
+        Yields:
+            Iterator of (commit hash, commit timestamp, [(status letter, path)]) tuples
+        """
+        process = subprocess.Popen(
+            [
+                self.git,
+                "-C",
+                self.git_dir,
+                "-c",
+                "core.quotePath=false",
+                "log",
+                "--no-renames",
+                "--name-status",
+                "--format=%x01%H %ct",
+                revision_range,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            errors="replace",
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+        try:
+            yield _parse_log(process.stdout)
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+
+def _parse_log(lines: Iterator[str]) -> Iterator[Tuple[str, int, List[Tuple[str, str]]]]:
+    """Parse `git log --name-status --format=%x01%H %ct` output into commits"""
+    commit = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("\x01"):
+            if commit:
+                yield commit
+            commit_hash, timestamp = line[1:].split(" ")
+            commit = (commit_hash, int(timestamp), [])
+        elif "\t" in line and commit:
+            status, path = line.split("\t", 1)
+            commit[2].append((status, path))
+    if commit:
+        yield commit
+
+
+def _parse_raw_diff(output: str) -> List[Dict]:
+    """
+    Parse `git diff-tree -r -z` raw output into Gitiles tree_diff entries
+
+    Each entry is ":<old mode> <new mode> <old id> <new id> <status>" followed by
+    one path, or two for renames and copies, all NUL-terminated.
+    """
+    entries = []
+    fields = output.split("\0")
+    i = 0
+    while i < len(fields) and fields[i].startswith(":"):
+        old_mode, new_mode, old_id, new_id, status = fields[i][1:].split(" ")
+        change_type = _CHANGE_TYPES.get(status[0], status[0].lower())
+        if status[0] in ("R", "C"):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            i += 3
+        else:
+            old_path = new_path = fields[i + 1]
+            i += 2
+
+        # Gitiles uses /dev/null for the missing side of adds and deletes
+        if change_type == "add":
+            old_path = "/dev/null"
+        elif change_type == "delete":
+            new_path = "/dev/null"
+        entries.append(
+            {
+                "type": change_type,
+                "old_id": old_id,
+                "old_mode": int(old_mode, 8),
+                "old_path": old_path,
+                "new_id": new_id,
+                "new_mode": int(new_mode, 8),
+                "new_path": new_path,
+            }
+        )
+    return entries
+
+
+def add_git_arguments(parser: argparse.ArgumentParser):
+    """Add local git backend options shared by the command line tools"""
+    parser.add_argument(
+        "--git-dir",
+        default=os.getenv("CHROMIUM_GIT_DIR"),
+        help="Answer queries from this local chromium/src clone instead of Gitiles "
+        "(default: $CHROMIUM_GIT_DIR)",
+    )
+    parser.add_argument(
+        "--git-revision",
+        default=os.getenv("CHROMIUM_GIT_REVISION", "HEAD"),
+        help="Revision of the local clone treated as the branch tip (default: HEAD)",
+    )
+
+
+def open_backend(
+    git_dir: Optional[str], revision: str = "HEAD"
+) -> Optional[LocalGitBackend]:
+    """
+    Open the local git backend, falling back to Gitiles if it is unusable
+
+    Args:
+        git_dir: Path of a local clone, or None/empty to use Gitiles
+        revision: Revision treated as the branch tip
+
+    Returns:
+        LocalGitBackend instance, or None if not configured or unavailable
+    """
+    if not git_dir:
+        return None
+    if shutil.which("git") is None:
+        logger.warning("Local git backend disabled, git is not installed")
+        return None
+    try:
+        return LocalGitBackend(git_dir, revision)
+    except (OSError, GitError) as e:
+        logger.warning("Local git backend disabled, unable to open %s: %s", git_dir, e)
+        return None
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+In-process caching helpers for Chromium Gitiles responses
+
+Features:
+- MemoryCache: thread-safe LRU cache with TTL expiry and a memory bound
+- TieredCache: checks several caches in order (e.g. memory, then disk)
+- SingleFlight: coalesces concurrent loads of the same key into one call
+- AsyncSingleFlight: the same for coroutines running on one event loop
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+DEFAULT_MEMORY_CACHE_SIZE_MB = 64
+# Upper bound on how long any entry stays in memory, even immutable ones
+DEFAULT_MEMORY_CACHE_TTL = 3600
+
+
+def _to_json(value: Any) -> Any:
+    """Serialize objects that provide to_dict(), e.g. compact commits"""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _estimate_size(value: Any) -> int:
+    """Roughly estimate the memory held by a cached value"""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if hasattr(value, "estimated_size"):
+        return value.estimated_size()
+    return len(json.dumps(value, default=_to_json))
+
+
+class MemoryCache:
+    """Thread-safe LRU cache with per-entry TTL and a total size bound"""
+
+    def __init__(
+        self,
+        max_size_mb: float = DEFAULT_MEMORY_CACHE_SIZE_MB,
+        max_ttl: float = DEFAULT_MEMORY_CACHE_TTL,
+        compact: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        Args:
+            max_size_mb: Maximum estimated size of all values in megabytes
+            max_ttl: Maximum seconds an entry is kept, applied to entries without a TTL too
+            compact: Converts values to a smaller in-memory form before they are
+                stored, e.g. commit_model.compact_value (values are kept as given if None)
+        """
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_ttl = max_ttl
+        self.compact = compact
+        self._lock = threading.Lock()
+        # key -> (value, size, expires_at), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._total_size = 0
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Get a cached value together with its expiry time
+
+        Returns:
+            Tuple of (value, expires_at timestamp), or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._total_size -= size
+                return None
+            self._entries.move_to_end(key)
+            return value, expires_at
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Seconds until the entry expires (capped at max_ttl)
+        """
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        if ttl <= 0:
+            return
+        if self.compact is not None:
+            value = self.compact(value)
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_size -= old[1]
+            self._entries[key] = (value, size, time.time() + ttl)
+            self._total_size += size
+            while self._total_size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._total_size -= evicted_size
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._total_size = 0
+
+
+class TieredCache:
+    """Look up several caches in order, copying hits into the faster tiers"""
+
+    def __init__(self, *tiers):
+        """
+        Args:
+            tiers: Caches ordered fastest first; each must provide get_entry() and set()
+        """
+        self.tiers = [tier for tier in tiers if tier is not None]
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        """Get a value and its expiry time (None if it never expires) from the first tier that has it"""
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get_entry(key)
+            if entry is None:
+                continue
+            value, expires_at = entry
+            ttl = None if expires_at is None else expires_at - time.time()
+            for faster in self.tiers[:i]:
+                faster.set(key, value, ttl)
+            return entry
+        return None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value from the first tier that has it"""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value in every tier"""
+        for tier in self.tiers:
+            tier.set(key, value, ttl)
+
+    def close(self):
+        """Close the tiers that hold resources, e.g. the on-disk cache"""
+        for tier in self.tiers:
+            if hasattr(tier, "close"):
+                tier.close()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> (completion event, result holder)
+        self._calls: Dict[str, Tuple[threading.Event, dict]] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Run func for key, or wait for the call already in flight for the same key
+
+        Args:
+            key: Identity of the work, e.g. a cache key
+            func: Function producing the value
+
+        Returns:
+            The value produced by whichever caller ran func
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = (threading.Event(), {})
+                self._calls[key] = call
+
+        event, outcome = call
+        if not leader:
+            event.wait()
+            if "error" in outcome:
+                raise outcome["error"]
+            return outcome["value"]
+
+        try:
+            outcome["value"] = func()
+            return outcome["value"]
+        except BaseException as e:
+            outcome["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            event.set()
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls for the same key into a single execution"""
+
+    def __init__(self):
+        # key -> future resolved by the leading call
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await func() for key, or wait for the call already in flight for the same key
+
+        Args:
+            key: Identity of the work, e.g. a cache key
+            func: Coroutine function producing the value
+
+        Returns:
+            The value produced by whichever caller ran func
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            # Shield so one waiter being cancelled does not cancel the shared result
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the outcome as retrieved even when nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+        try:
+            value = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._calls[key]
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Lightweight latency and throughput instrumentation
+
+Features:
+- Per-stage timing histograms (log, details, diff, decode, format, ...)
+- Counters for response bytes, cache hits/misses, retries, throttled (429)
+  responses and requests
+- Gauge of HTTP requests in flight
+- Prometheus text exposition for the server's /metrics endpoint and a
+  readable summary for the command line tools' --stats option
+- Worker processes can share their numbers through a directory of metrics
+  files, so any worker reports the totals of all of them
+
+Everything is recorded in the process-wide METRICS registry.
+"""
+
+import argparse
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+METRIC_PREFIX = "chromium_commits"
+
+
+class _Histogram:
+    """Cumulative latency histogram of one stage"""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class Metrics:
+    """Thread-safe registry of stage timings, counters and gauges"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._in_flight = 0
+
+    def observe(self, stage: str, seconds: float):
+        """Record the duration of one execution of a stage"""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = _Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        """Time the enclosed block as one execution of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count(self, name: str, amount: float = 1):
+        """Increase a counter, e.g. "cache_hits" or "response_bytes" """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def in_flight(self):
+        """Track the enclosed block as one request in flight"""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Copy the recorded values as plain data
+
+        Returns:
+            {"stages": {stage: {"count", "total", "max"}}, "counters": {name: value}}
+        """
+        with self._lock:
+            return {
+                "stages": {
+                    stage: {
+                        "count": histogram.count,
+                        "total": histogram.total,
+                        "max": histogram.max,
+                    }
+                    for stage, histogram in self._stages.items()
+                },
+                "counters": dict(self._counters),
+            }
+
+    def export(self) -> Dict:
+        """
+        Copy everything recorded, including histogram buckets, as JSON-serializable data
+
+        Returns:
+            {"stages": {stage: {"buckets", "count", "total", "max"}}, "counters": {name: value},
+            "in_flight": requests in flight}, as read by merge()
+        """
+        with self._lock:
+            return {
+                "stages": {
+                    stage: {
+                        "buckets": list(histogram.buckets),
+                        "count": histogram.count,
+                        "total": histogram.total,
+                        "max": histogram.max,
+                    }
+                    for stage, histogram in self._stages.items()
+                },
+                "counters": dict(self._counters),
+                "in_flight": self._in_flight,
+            }
+
+    def merge(self, data: Dict, in_flight: bool = True):
+        """
+        Add the values exported by another registry, e.g. of another worker process
+
+        Args:
+            data: Result of export()
+            in_flight: Whether to add its requests in flight (False for exited processes)
+        """
+        with self._lock:
+            for stage, values in data.get("stages", {}).items():
+                histogram = self._stages.get(stage)
+                if histogram is None:
+                    histogram = self._stages[stage] = _Histogram()
+                for i, count in enumerate(values["buckets"][: len(histogram.buckets)]):
+                    histogram.buckets[i] += count
+                histogram.count += values["count"]
+                histogram.total += values["total"]
+                histogram.max = max(histogram.max, values["max"])
+            for name, value in data.get("counters", {}).items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            if in_flight:
+                self._in_flight += data.get("in_flight", 0)
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            name = f"{METRIC_PREFIX}_stage_seconds"
+            lines.append(f"# HELP {name} Time spent per stage")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, histogram in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram.buckets):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+            for counter, value in sorted(self._counters.items()):
+                name = f"{METRIC_PREFIX}_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {value:g}")
+
+            name = f"{METRIC_PREFIX}_requests_in_flight"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {self._in_flight}")
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self) -> str:
+        """Format a readable summary of the recorded metrics"""
+        with self._lock:
+            result = []
+            result.append("=" * 80)
+            result.append("STATISTICS")
+            result.append("=" * 80)
+            result.append(f"{'Stage':<12}{'Count':>8}{'Total (s)':>12}{'Avg (ms)':>12}{'Max (ms)':>12}")
+            result.append("-" * 56)
+            for stage, histogram in sorted(self._stages.items()):
+                average = histogram.total / histogram.count * 1000
+                result.append(
+                    f"{stage:<12}{histogram.count:>8}{histogram.total:>12.3f}"
+                    f"{average:>12.1f}{histogram.max * 1000:>12.1f}"
+                )
+
+            counters = dict(self._counters)
+            hits = counters.pop("cache_hits", 0)
+            misses = counters.pop("cache_misses", 0)
+            result.append("-" * 56)
+            if hits + misses:
+                result.append(
+                    f"Cache: {hits:g} hits, {misses:g} misses "
+                    f"({hits / (hits + misses):.1%} hit rate)"
+                )
+            for counter, value in sorted(counters.items()):
+                result.append(f"{counter.replace('_', ' ').capitalize()}: {value:g}")
+            result.append("=" * 80)
+        return "\n".join(result)
+
+
+# Process-wide registry used by the fetchers
+METRICS = Metrics()
+
+def write_metrics_file(directory: str):
+    """Export this process's metrics to <directory>/<pid>.json for aggregate_metrics()"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    # Readers never see a partially written file
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(METRICS.export(), f)
+    os.replace(temporary, path)
+
+
+def aggregate_metrics(directory: str) -> Metrics:
+    """
+    Add up the metrics files written by every process into one registry
+
+    Files of processes that have exited are kept in the totals, so counters do
+    not go down when a worker is replaced; only running processes count towards
+    the requests in flight.
+
+    Args:
+        directory: Directory the processes write with write_metrics_file()
+
+    Returns:
+        New Metrics registry holding the sum
+    """
+    combined = Metrics()
+    for name in os.listdir(directory):
+        pid, extension = os.path.splitext(name)
+        if extension != ".json" or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        combined.merge(data, in_flight=_is_running(int(pid)))
+    return combined
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Requests made by the current count_requests() block, seen by the tasks and threads it starts
+_request_count: ContextVar[Optional[List[int]]] = ContextVar("request_count", default=None)
+
+
+def count_request():
+    """Record one HTTP request, also in the enclosing count_requests() block if any"""
+    METRICS.count("requests")
+    counter = _request_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+@contextmanager
+def count_requests() -> Iterator[List[int]]:
+    """
+    Count the HTTP requests made by the enclosed block, e.g. to budget background work
+
+    Requests answered from a cache or by another caller's in-flight fetch are not counted.
+
+    Yields:
+        One-element list holding the number of requests made so far
+    """
+    counter = [0]
+    token = _request_count.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_count.reset(token)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator recording each call of a function or coroutine function as a stage"""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with METRICS.time(stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.time(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def add_stats_arguments(parser: argparse.ArgumentParser):
+    """Add the statistics option shared by the command line tools"""
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print per-stage timings, cache hit rate, bytes transferred and retries to stderr on exit",
+    )
+
+
+def enable_stats_report(enabled: bool):
+    """Print the metrics summary to stderr when the process exits, if enabled"""
+    if enabled:
+        atexit.register(lambda: print(METRICS.format_summary(), file=sys.stderr))
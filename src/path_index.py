@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Persistent index of the latest commit touching every path of chromium/src
+
+Features:
+- SQLite table mapping each file at the indexed HEAD to its latest commit hash and time
+- Built once from the history of a local clone, newest first, stopping as soon
+  as every file in the tree has been seen
+- Updated incrementally by reading only the commits added since the indexed HEAD,
+  from a local clone or from the name-status log of Gitiles
+- Lookups are single primary-key reads, cheap enough for bulk ownership/freshness checks
+
+Command line:
+    python path_index.py update --git-dir ~/chromium/src
+    python path_index.py lookup chrome/browser/ui/browser.cc
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from commit_cache import DEFAULT_CACHE_DIR
+from local_git import GitError, LocalGitBackend, add_git_arguments, open_backend
+
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, "path_index.sqlite3")
+# Rows buffered before each bulk insert while building
+INDEX_BATCH_SIZE = 10000
+
+logger = logging.getLogger(__name__)
+
+
+class PathIndex:
+    """SQLite-backed map of file path to (latest commit hash, commit timestamp)"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        """
+        Args:
+            path: Index database file (its directory is created if missing)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        # WAL lets servers keep reading while an update runs in another process
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS paths (
+                path TEXT PRIMARY KEY,
+                commit_hash TEXT NOT NULL,
+                commit_time INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+
+    @property
+    def indexed_head(self) -> Optional[str]:
+        """Commit the index reflects, or None if it has never been built"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE name = 'head'"
+            ).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, path: str) -> Optional[Tuple[str, int]]:
+        """
+        Get the latest commit of a file
+
+        Args:
+            path: File path with forward slashes
+
+        Returns:
+            Tuple of (commit hash, commit timestamp), or None if the file is not indexed
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT commit_hash, commit_time FROM paths WHERE path = ?", (path,)
+            ).fetchone()
+
+    def lookup_many(self, paths: Iterable[str]) -> Dict[str, Tuple[str, int]]:
+        """Get the latest commits of several files, omitting the ones not indexed"""
+        result = {}
+        with self._lock:
+            for path in paths:
+                row = self._conn.execute(
+                    "SELECT commit_hash, commit_time FROM paths WHERE path = ?", (path,)
+                ).fetchone()
+                if row:
+                    result[path] = row
+        return result
+
+    def build(self, backend: LocalGitBackend, head: Optional[str] = None) -> int:
+        """
+        Rebuild the index from scratch
+
+        History is read newest first and stops once every file of the tree has
+        been attributed, so recently active trees are indexed quickly.
+
+        Args:
+            backend: Local clone to read history from
+            head: Commit to index (the backend's configured revision if None)
+
+        Returns:
+            Number of indexed files
+        """
+        head = head or backend.resolve_revision()
+        pending = set(backend.list_files(head))
+        total = len(pending)
+        rows: List[Tuple[str, str, int]] = []
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM paths")
+                with backend.open_log(head) as commits:
+                    for commit_hash, timestamp, changes in commits:
+                        for _, path in changes:
+                            if path in pending:
+                                pending.discard(path)
+                                rows.append((path, commit_hash, timestamp))
+                        if len(rows) >= INDEX_BATCH_SIZE:
+                            self._insert(rows)
+                            rows = []
+                        if not pending:
+                            break
+                self._insert(rows)
+                self._set_head(head)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return total - len(pending)
+
+    def update(
+        self, backend: LocalGitBackend, head: Optional[str] = None, rebuild: bool = True
+    ) -> int:
+        """
+        Bring the index up to the backend's current revision
+
+        Only commits added since the indexed HEAD are read. The index is rebuilt
+        if it is empty or the indexed HEAD is no longer an ancestor (e.g. after
+        a history rewrite).
+
+        Args:
+            backend: Local clone to read history from
+            head: Commit to bring the index to (the backend's configured revision if None)
+            rebuild: Whether to rebuild when an incremental update is not possible;
+                if False the index is left as is
+
+        Returns:
+            Number of files whose entry changed (all indexed files after a rebuild)
+        """
+        head = head or backend.resolve_revision()
+        old_head = self.indexed_head
+        if old_head == head:
+            return 0
+        if not old_head or not backend.is_ancestor(old_head, head):
+            return self.build(backend, head) if rebuild else 0
+
+        with backend.open_log(f"{old_head}..{head}") as commits:
+            return self.apply_commits(old_head, head, commits)
+
+    def apply_commits(
+        self,
+        old_head: str,
+        head: str,
+        commits: Iterable[Tuple[str, int, List[Tuple[str, str]]]],
+    ) -> int:
+        """
+        Move the index from one HEAD to a newer one
+
+        Args:
+            old_head: Commit the index must currently reflect; nothing is written
+                if another writer has moved it meanwhile
+            head: Commit the index reflects afterwards
+            commits: Every commit of old_head..head, newest first, as
+                (commit hash, commit timestamp, [(status letter, path)]) tuples
+                with renames reported as a delete plus an add
+
+        Returns:
+            Number of files whose entry changed
+        """
+        # Newest first: the first change seen for a path is its latest one
+        seen = set()
+        rows: List[Tuple[str, str, int]] = []
+        deleted: List[Tuple[str]] = []
+        for commit_hash, timestamp, changes in commits:
+            for status, path in changes:
+                if path in seen:
+                    continue
+                seen.add(path)
+                if status == "D":
+                    deleted.append((path,))
+                else:
+                    rows.append((path, commit_hash, timestamp))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value FROM meta WHERE name = 'head'"
+                ).fetchone()
+                if not row or row[0] != old_head:
+                    self._conn.execute("ROLLBACK")
+                    return 0
+                self._conn.executemany("DELETE FROM paths WHERE path = ?", deleted)
+                self._insert(rows)
+                self._set_head(head)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return len(seen)
+
+    def _insert(self, rows: List[Tuple[str, str, int]]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO paths (path, commit_hash, commit_time) VALUES (?, ?, ?)",
+            rows,
+        )
+
+    def _set_head(self, head: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('head', ?)", (head,)
+        )
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def add_index_arguments(parser: argparse.ArgumentParser):
+    """Add path index options shared by the command line tools"""
+    parser.add_argument(
+        "--path-index",
+        default=os.getenv("CHROMIUM_PATH_INDEX"),
+        help="Answer latest-commit lookups from this index built by path_index.py "
+        "(default: $CHROMIUM_PATH_INDEX)",
+    )
+
+
+def open_path_index(path: Optional[str]) -> Optional[PathIndex]:
+    """
+    Open an existing path index, falling back to no index if it is unusable
+
+    The fetchers bring the index up to HEAD themselves as HEAD moves, so it
+    only needs to have been built once.
+
+    Args:
+        path: Index database file, or None/empty to disable the index
+
+    Returns:
+        PathIndex instance, or None if disabled, missing, never built or unreadable
+    """
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logger.warning("Path index disabled, %s does not exist", path)
+        return None
+    try:
+        index = PathIndex(path)
+        if index.indexed_head is None:
+            logger.warning("Path index disabled, %s has not been built", path)
+            index.close()
+            return None
+        return index
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Path index disabled, unable to open %s: %s", path, e)
+        return None
+
+
+def main():
+    """Build, update or query the path index from the command line"""
+    parser = argparse.ArgumentParser(
+        description="Maintain an index of the latest commit touching every file of a local chromium/src clone",
+        epilog="Example: python path_index.py update --git-dir ~/chromium/src",
+    )
+    parser.add_argument("command", choices=("build", "update", "lookup"))
+    parser.add_argument("paths", nargs="*", help="File paths to look up")
+    parser.add_argument(
+        "--index",
+        default=os.getenv("CHROMIUM_PATH_INDEX", DEFAULT_INDEX_PATH),
+        help=f"Index database file (default: {DEFAULT_INDEX_PATH})",
+    )
+    add_git_arguments(parser)
+
+    args = parser.parse_intermixed_args()
+    index = PathIndex(args.index)
+
+    if args.command == "lookup":
+        if not args.paths:
+            print("Error: lookup needs at least one path")
+            sys.exit(1)
+        found = index.lookup_many(args.paths)
+        for path in args.paths:
+            entry = found.get(path)
+            print(f"{path}  {entry[0] if entry else '(not indexed)'}")
+        return
+
+    backend = open_backend(args.git_dir, args.git_revision)
+    if backend is None:
+        print("Error: --git-dir (or CHROMIUM_GIT_DIR) must point to a chromium/src clone")
+        sys.exit(1)
+
+    try:
+        if args.command == "build":
+            count = index.build(backend)
+            print(f"Indexed {count} files at {index.indexed_head}")
+        else:
+            count = index.update(backend)
+            print(f"Updated {count} paths, index is at {index.indexed_head}")
+    except GitError as e:
+        print(f"Git error: {e}")
+        sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Background refresh of frequently requested paths for the MCP server
+
+Features:
+- HotPathTracker: decaying request counts per path, bounded in size
+- PrefetchRefresher: periodically revalidates HEAD, re-checks the latest commit
+  of the hottest paths (one small +log request each, none while HEAD has not
+  moved) and downloads details and diff ahead of time when a path gets a new commit
+- Concurrency and the number of Gitiles requests per cycle are capped; requests
+  answered from the cache do not count
+"""
+
+import asyncio
+import heapq
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+
+from get_chromium_commits import DEFAULT_MAX_DIFF_LINES
+from metrics import count_requests
+
+DEFAULT_PREFETCH_TOP_PATHS = 50
+DEFAULT_PREFETCH_CONCURRENCY = 4
+# Gitiles requests one refresh cycle may issue
+DEFAULT_PREFETCH_BUDGET = 100
+DEFAULT_MAX_TRACKED_PATHS = 1000
+# Request counts are multiplied by this after every cycle so old interest fades
+DEFAULT_DECAY = 0.5
+
+# Most Gitiles requests one latest-commit lookup makes (revalidation, then a full lookup)
+LOOKUP_REQUESTS = 2
+
+
+class HotPath(NamedTuple):
+    """A requested path together with what the requests asked for"""
+
+    path: str
+    # Whether the commit details (changed files) were requested
+    details: bool = True
+    # Whether the diff was requested
+    diff: bool = True
+    # Whether the diff is limited to the path
+    file_diff_only: bool = False
+
+logger = logging.getLogger(__name__)
+
+
+class HotPathTracker:
+    """Count requests per path with exponential decay, keeping the busiest ones"""
+
+    def __init__(
+        self,
+        max_paths: int = DEFAULT_MAX_TRACKED_PATHS,
+        decay: float = DEFAULT_DECAY,
+    ):
+        """
+        Args:
+            max_paths: Maximum number of paths tracked; the least requested are dropped
+            decay: Factor applied to every count by decay()
+        """
+        self.max_paths = max_paths
+        self.decay_factor = decay
+        self._counts: Dict[HotPath, float] = {}
+
+    def record(
+        self,
+        file_path: str,
+        file_diff_only: bool = False,
+        details: bool = True,
+        diff: bool = True,
+    ):
+        """
+        Count one request for a path
+
+        Args:
+            file_path: Requested file path
+            file_diff_only: Whether the diff was limited to the path
+            details: Whether the commit details were requested
+            diff: Whether the diff was requested
+        """
+        key = HotPath(
+            file_path.replace("\\", "/"), details, diff, file_diff_only and diff
+        )
+        self._counts[key] = self._counts.get(key, 0.0) + 1.0
+
+    def hottest(self, n: int) -> List[HotPath]:
+        """Get the n most requested paths, busiest first"""
+        return heapq.nlargest(n, self._counts, key=self._counts.get)
+
+    def decay(self):
+        """Age all counts, forgetting paths that are no longer requested"""
+        self._counts = {
+            key: count * self.decay_factor
+            for key, count in self._counts.items()
+            if count * self.decay_factor >= 0.1
+        }
+        if len(self._counts) > self.max_paths:
+            self._counts = dict(
+                heapq.nlargest(self.max_paths, self._counts.items(), key=lambda kv: kv[1])
+            )
+
+
+class PrefetchRefresher:
+    """Keep the cached commit information of hot paths fresh in the background"""
+
+    def __init__(
+        self,
+        fetcher,
+        tracker: HotPathTracker,
+        interval: Optional[float] = None,
+        top_paths: int = DEFAULT_PREFETCH_TOP_PATHS,
+        concurrency: int = DEFAULT_PREFETCH_CONCURRENCY,
+        budget: int = DEFAULT_PREFETCH_BUDGET,
+    ):
+        """
+        Args:
+            fetcher: AsyncChromiumCommitFetcher whose cache is kept warm
+            tracker: Source of the paths worth refreshing
+            interval: Seconds between refresh cycles (the fetcher's head_ttl if None,
+                so tool calls keep reusing the HEAD each cycle resolves)
+            top_paths: Number of hottest paths refreshed per cycle
+            concurrency: Maximum refreshes running at the same time
+            budget: Maximum Gitiles requests per cycle
+        """
+        self.fetcher = fetcher
+        self.tracker = tracker
+        self.interval = interval or fetcher.head_ttl
+        self.top_paths = top_paths
+        self.concurrency = max(1, concurrency)
+        self.budget = budget
+        # Latest commit hash last seen per path, to detect new commits
+        self._known: Dict[HotPath, str] = {}
+        self._remaining = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the refresh loop on the running event loop, if not running yet"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the refresh loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.warning("Prefetch cycle failed: %s", e)
+
+    async def refresh_once(self) -> int:
+        """
+        Refresh the hottest paths once
+
+        Returns:
+            Number of Gitiles requests the cycle made
+        """
+        paths = self.tracker.hottest(self.top_paths)
+        self.tracker.decay()
+        self._known = {
+            hot_path: self._known[hot_path] for hot_path in paths if hot_path in self._known
+        }
+        self._remaining = self.budget
+        # One HEAD revalidation per cycle; path lookups, including the tool calls
+        # until the next cycle, are then pinned to it
+        if self._reserve(1):
+            with self._spending(1):
+                await self.fetcher.get_head_commit(refresh=True)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(hot_path: HotPath):
+            async with semaphore:
+                await self._refresh(hot_path)
+
+        await asyncio.gather(*(refresh(hot_path) for hot_path in paths))
+        return self.budget - self._remaining
+
+    def _reserve(self, requests: int) -> bool:
+        """Take the most requests a step can make from this cycle's budget, if enough are left"""
+        if self._remaining < requests:
+            return False
+        self._remaining -= requests
+        return True
+
+    @contextmanager
+    def _spending(self, reserved: int):
+        """Charge the enclosed step only for the requests it made, refunding the rest"""
+        with count_requests() as made:
+            try:
+                yield
+            finally:
+                self._remaining += reserved - made[0]
+
+    async def _refresh(self, hot_path: HotPath):
+        if not self._reserve(LOOKUP_REQUESTS):
+            return
+        try:
+            with self._spending(LOOKUP_REQUESTS):
+                commit_info = await self.fetcher.get_file_latest_commit(hot_path.path)
+            commit_hash = commit_info.get("commit") if commit_info else None
+            if not commit_hash or self._known.get(hot_path) == commit_hash:
+                return
+            # Details and diff of a new commit, as far as the tool calls requested them
+            requests = hot_path.details + hot_path.diff
+            if not self._reserve(requests):
+                return
+            self._known[hot_path] = commit_hash
+            parts = []
+            if hot_path.details:
+                parts.append(self.fetcher.get_commit_details(commit_hash))
+            if hot_path.diff:
+                diff_paths = [hot_path.path] if hot_path.file_diff_only else None
+                parts.append(
+                    self.fetcher.get_commit_diff_excerpt(
+                        commit_hash, DEFAULT_MAX_DIFF_LINES, None, diff_paths
+                    )
+                )
+            with self._spending(requests):
+                await asyncio.gather(*parts)
+        except Exception as e:
+            logger.warning("Prefetch of %s failed: %s", hot_path.path, e)
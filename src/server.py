@@ -13,16 +13,160 @@ Features:
 - MCP-compatible for AI agent integration
 """
 
+import asyncio
+import contextlib
+import logging
 import os
-import uvicorn
+import shutil
+import tempfile
 from mcp.server.fastmcp import FastMCP
-from starlette.middleware.cors import CORSMiddleware
-from typing import Optional
-from middleware import SmitheryConfigMiddleware
-from get_chromium_commits import ChromiumCommitFetcher
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from typing import List, Optional, Tuple
+from commit_cache import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_SIZE_MB,
+    DEFAULT_HEAD_TTL,
+    open_cache,
+)
+from memory_cache import (
+    DEFAULT_MEMORY_CACHE_SIZE_MB,
+    DEFAULT_MEMORY_CACHE_TTL,
+    MemoryCache,
+    TieredCache,
+)
+from async_fetcher import AsyncChromiumCommitFetcher
+from batching import DEFAULT_CONCURRENCY
+from commit_model import compact_value
+from commit_records import (
+    CommitRecord,
+    detail_fields,
+    format_record_groups,
+    parse_fields,
+    wants_field,
+)
+from local_git import open_backend
+from metrics import METRICS, aggregate_metrics, write_metrics_file
+from path_index import open_path_index
+from prefetch import (
+    DEFAULT_PREFETCH_BUDGET,
+    DEFAULT_PREFETCH_CONCURRENCY,
+    DEFAULT_PREFETCH_TOP_PATHS,
+    HotPathTracker,
+    PrefetchRefresher,
+)
+from get_chromium_commits import (
+    DEFAULT_HISTORY_LIMIT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POOL_SIZE,
+    GitilesError,
+    format_directory_commits,
+    format_history,
+)
+
+# HTTP serving defaults, overridable with SERVER_WORKERS, WORKER_CONCURRENCY and SHUTDOWN_TIMEOUT
+DEFAULT_WORKERS = 1
+DEFAULT_WORKER_CONCURRENCY = 32
+DEFAULT_SHUTDOWN_TIMEOUT = 30
+# With several workers, each one writes its metrics to METRICS_DIR this often so
+# that /metrics, answered by any worker, adds up all of them
+METRICS_FLUSH_INTERVAL = 5
+# Multi-file tool limits: files per call and diff lines shown per commit
+MAX_BATCH_PATHS = 200
+DEFAULT_BATCH_DIFF_LINES = 200
+
+logger = logging.getLogger(__name__)
 
 mcp = FastMCP("Chromium Latest Commit")
 
+# Single non-blocking fetcher shared by all tool calls so the Gitiles connection
+# pool is reused and slow requests never stall the event loop. It is created on
+# first use rather than on import: stdio clients start a server process per
+# session, and opening the HTTP client and caches up front delays the handshake
+fetcher: Optional[AsyncChromiumCommitFetcher] = None
+
+# Optional background refresh of the most requested paths (PREFETCH_ENABLED=1),
+# so popular files are answered from the cache even after HEAD moves
+hot_paths = HotPathTracker()
+prefetcher: Optional[PrefetchRefresher] = None
+
+
+def get_fetcher() -> AsyncChromiumCommitFetcher:
+    """Get the fetcher shared by all tool calls, creating it (and the prefetcher) on first use"""
+    global fetcher, prefetcher
+    if fetcher is None:
+        fetcher, prefetcher = _create_fetcher()
+    return fetcher
+
+
+def _create_fetcher() -> Tuple[AsyncChromiumCommitFetcher, Optional[PrefetchRefresher]]:
+    """Build the shared fetcher and, if PREFETCH_ENABLED, its prefetcher"""
+    # Answer queries from a local chromium/src clone when CHROMIUM_GIT_DIR is set
+    backend = open_backend(
+        os.getenv("CHROMIUM_GIT_DIR"), os.getenv("CHROMIUM_GIT_REVISION", "HEAD")
+    )
+    shared = AsyncChromiumCommitFetcher(
+        pool_size=int(os.getenv("GITILES_POOL_SIZE", DEFAULT_POOL_SIZE)),
+        max_retries=int(os.getenv("GITILES_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+        rate_limit=float(os.getenv("GITILES_RATE_LIMIT", 0)) or None,
+        head_ttl=float(os.getenv("GITILES_HEAD_TTL", DEFAULT_HEAD_TTL)),
+        # Hot entries are served from memory, then from the on-disk cache.
+        # Set CHROMIUM_COMMITS_CACHE_DIR to an empty string to disable the on-disk cache
+        cache=TieredCache(
+            MemoryCache(
+                float(os.getenv("MEMORY_CACHE_SIZE_MB", DEFAULT_MEMORY_CACHE_SIZE_MB)),
+                float(os.getenv("MEMORY_CACHE_TTL", DEFAULT_MEMORY_CACHE_TTL)),
+                # Commits are held as slotted objects with interned strings
+                compact=compact_value,
+            ),
+            open_cache(
+                os.getenv("CHROMIUM_COMMITS_CACHE_DIR", DEFAULT_CACHE_DIR),
+                float(os.getenv("CHROMIUM_COMMITS_CACHE_SIZE_MB", DEFAULT_CACHE_SIZE_MB)),
+            ),
+        ),
+        backend=backend,
+        # Latest-commit lookups check the index built by `path_index.py build` first;
+        # the fetcher keeps it at HEAD (of the clone if any) as HEAD moves
+        path_index=open_path_index(os.getenv("CHROMIUM_PATH_INDEX")),
+    )
+    refresher = None
+    if os.getenv("PREFETCH_ENABLED", "").lower() in ("1", "true", "yes"):
+        refresher = PrefetchRefresher(
+            shared,
+            hot_paths,
+            # Defaults to GITILES_HEAD_TTL so tool calls reuse the HEAD each cycle resolves
+            interval=float(os.getenv("PREFETCH_INTERVAL", 0)) or None,
+            top_paths=int(os.getenv("PREFETCH_TOP_PATHS", DEFAULT_PREFETCH_TOP_PATHS)),
+            concurrency=int(os.getenv("PREFETCH_CONCURRENCY", DEFAULT_PREFETCH_CONCURRENCY)),
+            budget=int(os.getenv("PREFETCH_BUDGET", DEFAULT_PREFETCH_BUDGET)),
+        )
+    return shared, refresher
+
+
+# Tool calls served at the same time by this process; further calls wait for a slot
+_tool_slots: Optional[asyncio.Semaphore] = None
+
+
+def tool_slot() -> asyncio.Semaphore:
+    """Get the per-process tool call limiter (WORKER_CONCURRENCY)"""
+    global _tool_slots
+    if _tool_slots is None:
+        _tool_slots = asyncio.Semaphore(
+            max(1, int(os.getenv("WORKER_CONCURRENCY", DEFAULT_WORKER_CONCURRENCY)))
+        )
+    return _tool_slots
+
+
+def track_request(
+    file_path: str, file_diff_only: bool = False, details: bool = True, diff: bool = True
+):
+    """Count a request and what it asked for, starting the prefetcher on the first tool call"""
+    get_fetcher()
+    if prefetcher is None:
+        return
+    hot_paths.record(file_path, file_diff_only, details, diff)
+    prefetcher.start()
+
 
 def handle_config(config: dict):
     """Handle configuration from Smithery - for backwards compatibility with stdio mode."""
@@ -68,18 +212,254 @@ def validate_server_access(server_token: Optional[str]) -> bool:
 
 
 @mcp.tool("get_chromium_latest_commit")
-async def get_chromium_latest_commit(file_path: str):
+async def get_chromium_latest_commit(
+    file_path: str,
+    file_diff_only: bool = False,
+    output_format: str = "text",
+    fields: Optional[List[str]] = None,
+):
     """
     MCP handler to get the latest commit information for a specified file in Chromium repository
 
     Args:
         file_path (str): Relative path of the file in Chromium repository (e.g., "components/sync/service/data_type_manager.cc")
+        file_diff_only (bool): Only include the diff of this file instead of the whole commit
+        output_format (str): "text" for a readable report, "json" for a structured record
+        fields (list[str]): With "json", only include these fields (commit, author, committer, time, message, requested_paths, files, diff); omitting files or diff skips downloading them
 
     Returns:
-        str: Formatted commit information including hash, author, message, modified files list, and diff details
+        str | dict: Formatted commit information including hash, author, message, modified files list, and diff details, or the same as a JSON record
     """
-    fetcher = ChromiumCommitFetcher()
-    return fetcher.get_file_commit_info(file_path, detailed=True, show_diff=True)
+    if output_format == "json":
+        try:
+            selected = parse_fields(",".join(fields)) if fields else None
+        except ValueError as e:
+            return f"Invalid fields: {e}"
+        track_request(
+            file_path,
+            file_diff_only,
+            details=wants_field(selected, "files"),
+            diff=wants_field(selected, "diff"),
+        )
+        try:
+            async with tool_slot():
+                record = await get_fetcher().get_file_commit_record(
+                    file_path, selected, file_diff_only=file_diff_only
+                )
+        except GitilesError as e:
+            return f"Error: {e}"
+        return record.to_dict() if record else None
+    track_request(file_path, file_diff_only)
+    try:
+        async with tool_slot():
+            return await get_fetcher().get_file_commit_info(
+                file_path, detailed=True, show_diff=True, file_diff_only=file_diff_only
+            )
+    except GitilesError as e:
+        return f"Error: {e}"
+
+
+@mcp.tool("get_chromium_latest_commits")
+async def get_chromium_latest_commits(
+    file_paths: List[str],
+    detail: str = "summary",
+    show_diff: bool = False,
+    max_diff_lines: int = DEFAULT_BATCH_DIFF_LINES,
+    output_format: str = "text",
+):
+    """
+    MCP handler to get the latest commits of many files in Chromium repository in one call
+
+    Files whose latest change is the same commit are reported together, so
+    every commit appears once.
+
+    Args:
+        file_paths (list[str]): Relative paths of the files in Chromium repository (e.g. all files of a CL)
+        detail (str): "summary" for one line per commit, "files" to add the files each commit changed, "full" to add the whole message and committer
+        show_diff (bool): Include the diff of the requested files for each commit
+        max_diff_lines (int): Maximum diff lines shown per commit with show_diff
+        output_format (str): "text" for a compact report, "json" for structured records
+
+    Returns:
+        str | dict: One block per commit listing the requested files it covers, followed by the files without a commit and the files whose lookup failed, or the same as {"commits": [...], "not_found": [...], "errors": [...]}
+    """
+    if not file_paths:
+        return "No file paths given"
+    if len(file_paths) > MAX_BATCH_PATHS:
+        return f"Too many file paths ({len(file_paths)}); at most {MAX_BATCH_PATHS} per call"
+    try:
+        fields = detail_fields(detail, show_diff)
+    except ValueError as e:
+        return f"Invalid detail: {e}"
+
+    async with tool_slot():
+        groups = await get_fetcher().get_files_commit_records(
+            file_paths,
+            fields,
+            max_diff_lines=max(1, max_diff_lines),
+            concurrency=int(os.getenv("BATCH_TOOL_CONCURRENCY", DEFAULT_CONCURRENCY)),
+        )
+    found = [record for _, record in groups if isinstance(record, CommitRecord)]
+    if detail != "full":
+        for record in found:
+            if record.message:
+                record.message = record.message.split("\n", 1)[0]
+
+    if output_format == "json":
+        return {
+            "commits": [record.to_dict() for record in found],
+            "not_found": [path for paths, record in groups if record is None for path in paths],
+            "errors": [
+                {"paths": paths, "error": str(record)}
+                for paths, record in groups
+                if isinstance(record, GitilesError)
+            ],
+        }
+    return format_record_groups(groups)
+
+
+@mcp.tool("get_chromium_file_history")
+async def get_chromium_file_history(
+    file_path: str, limit: int = DEFAULT_HISTORY_LIMIT, since: Optional[str] = None
+):
+    """
+    MCP handler to list the last commits that touched a file or directory in Chromium repository
+
+    Args:
+        file_path (str): Relative path of the file or directory in Chromium repository (e.g., "components/sync/service/")
+        limit (int): Maximum number of commits to return
+        since (str): Only list commits after this date (YYYY-MM-DD) or commit hash (optional)
+
+    Returns:
+        str: One line per commit with hash, time, author and subject, newest first
+    """
+    try:
+        async with tool_slot():
+            commits = await get_fetcher().get_file_history(file_path, limit, since)
+    except ValueError as e:
+        return f"Invalid since value: {e}"
+    except GitilesError as e:
+        return f"Error: {e}"
+    return format_history(file_path, commits)
+
+
+@mcp.tool("get_chromium_directory_latest_commits")
+async def get_chromium_directory_latest_commits(directory: str):
+    """
+    MCP handler to get the latest commit of every file below a directory in Chromium repository
+
+    Args:
+        directory (str): Relative path of the directory in Chromium repository (e.g., "components/sync/service/")
+
+    Returns:
+        str: One line per file with the hash, time, author and subject of its latest commit
+    """
+    try:
+        async with tool_slot():
+            latest_commits = await get_fetcher().get_directory_latest_commits(directory)
+    except GitilesError as e:
+        return f"Error: {e}"
+    if latest_commits is None:
+        return f"Error: Directory {directory} not found"
+    return format_directory_commits(directory, latest_commits)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Stage timings, cache and request counters in the Prometheus text format (HTTP mode)"""
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir:
+        # Totals of all workers: refresh this worker's file, then add up every file
+        registry = await asyncio.to_thread(collect_worker_metrics, metrics_dir)
+    else:
+        registry = METRICS
+    return PlainTextResponse(
+        registry.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+def collect_worker_metrics(metrics_dir: str):
+    """Write this worker's metrics file and add up the files of all workers"""
+    write_metrics_file(metrics_dir)
+    return aggregate_metrics(metrics_dir)
+
+
+async def flush_metrics(metrics_dir: str):
+    """Keep this worker's metrics file current for the workers answering /metrics"""
+    while True:
+        try:
+            await asyncio.to_thread(write_metrics_file, metrics_dir)
+        except OSError as e:
+            logger.warning("Unable to write metrics to %s: %s", metrics_dir, e)
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+
+
+async def shutdown():
+    """Stop background work and release connections and cache files of this process"""
+    if prefetcher is not None:
+        await prefetcher.stop()
+    # Nothing to release if no tool was ever called
+    if fetcher is None:
+        return
+    await fetcher.aclose()
+    if hasattr(fetcher.cache, "close"):
+        fetcher.cache.close()
+
+
+def create_app():
+    """
+    Build the HTTP mode ASGI application
+
+    Also used as the uvicorn factory by every worker process. With several
+    workers the MCP transport runs stateless, so any worker can answer any
+    request and clients need no sticky sessions; the on-disk cache is shared
+    by all workers.
+    """
+    # HTTP-only dependencies, not needed for stdio sessions
+    from starlette.middleware.cors import CORSMiddleware
+    from middleware import SmitheryConfigMiddleware
+
+    if int(os.getenv("SERVER_WORKERS", DEFAULT_WORKERS)) > 1:
+        mcp.settings.stateless_http = True
+
+    # Setup Starlette app with CORS for cross-origin requests
+    app = mcp.streamable_http_app()
+
+    # IMPORTANT: add CORS middleware for browser based clients
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "OPTIONS"],
+        allow_headers=["*"],
+        expose_headers=["mcp-session-id", "mcp-protocol-version"],
+        max_age=86400,
+    )
+
+    # Release resources once uvicorn has drained in-flight requests
+    session_lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with session_lifespan(app):
+            metrics_dir = os.getenv("METRICS_DIR")
+            flusher = asyncio.create_task(flush_metrics(metrics_dir)) if metrics_dir else None
+            try:
+                yield
+            finally:
+                await shutdown()
+                if flusher is not None:
+                    flusher.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await flusher
+                    # Final totals of this worker stay in the sum after it exits
+                    with contextlib.suppress(OSError):
+                        write_metrics_file(metrics_dir)
+
+    app.router.lifespan_context = lifespan
+
+    # Apply custom middleware for config extraction (per-request API key handling)
+    return SmitheryConfigMiddleware(app)
 
 
 def main():
@@ -87,35 +467,49 @@ def main():
 
     if transport_mode == "http":
         # HTTP mode with config extraction from URL parameters
-        print("Chromium Commits MCP Server starting in HTTP mode...")
-
-        # Setup Starlette app with CORS for cross-origin requests
-        app = mcp.streamable_http_app()
-
-        # IMPORTANT: add CORS middleware for browser based clients
-        app.add_middleware(
-            CORSMiddleware,
-            allow_origins=["*"],
-            allow_credentials=True,
-            allow_methods=["GET", "POST", "OPTIONS"],
-            allow_headers=["*"],
-            expose_headers=["mcp-session-id", "mcp-protocol-version"],
-            max_age=86400,
-        )
-
-        # Apply custom middleware for config extraction (per-request API key handling)
-        app = SmitheryConfigMiddleware(app)
+        logger.info("Chromium Commits MCP Server starting in HTTP mode...")
 
         # Use Smithery-required PORT environment variable
         port = int(os.environ.get("PORT", 8081))
-        print(f"Listening on port {port}")
-
-        uvicorn.run(app, host="0.0.0.0", port=port, log_level="debug")
+        workers = int(os.getenv("SERVER_WORKERS", DEFAULT_WORKERS))
+        logger.info("Listening on port %d with %d worker(s)", port, workers)
+        import uvicorn
+
+        options = dict(
+            host="0.0.0.0",
+            port=port,
+            log_level="debug",
+            # Seconds in-flight requests get to finish after SIGTERM
+            timeout_graceful_shutdown=float(
+                os.getenv("SHUTDOWN_TIMEOUT", DEFAULT_SHUTDOWN_TIMEOUT)
+            ),
+        )
+        if workers > 1:
+            # Workers share their metrics through files so /metrics reports all of them
+            created_metrics_dir = None
+            if not os.getenv("METRICS_DIR"):
+                created_metrics_dir = tempfile.mkdtemp(prefix="chromium-commits-metrics-")
+                os.environ["METRICS_DIR"] = created_metrics_dir
+            try:
+                # Each worker process imports this module and builds its own app
+                uvicorn.run(
+                    "server:create_app",
+                    factory=True,
+                    workers=workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)),
+                    **options,
+                )
+            finally:
+                if created_metrics_dir:
+                    shutil.rmtree(created_metrics_dir, ignore_errors=True)
+        else:
+            uvicorn.run(create_app(), **options)
 
     else:
         # Optional: add stdio transport for backwards compatibility
         # You can publish this to uv for users to run locally
-        print("Chromium Commits MCP Server starting in stdio mode...")
+        # stdout carries the MCP protocol, so nothing else may be written to it
+        logger.info("Chromium Commits MCP Server starting in stdio mode...")
 
         server_token = os.getenv("SERVER_TOKEN")
         # Set the server token for stdio mode (can be None)
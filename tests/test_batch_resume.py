@@ -0,0 +1,177 @@
+"""Tests for batch checkpointing, --resume and lazy commit grouping"""
+
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import batch_get_commits
+from batch_get_commits import checkpoint_path, load_checkpoint
+from batching import group_paths_by_commit, iter_paths_by_commit
+from commit_model import Commit
+from get_chromium_commits import GitilesError
+
+FILES = [f"chrome/browser/file{i}.cc" for i in range(8)]
+
+
+class Interrupted(BaseException):
+    """Stands in for Ctrl-C, which the batch tool does not catch"""
+
+
+class FakeFetcher:
+    """Resolves every file to its own commit, failing on the configured paths"""
+
+    # Paths looked up by any instance, in order
+    lookups = []
+    interrupt_at = None
+    fail_paths = set()
+
+    def __init__(self, **kwargs):
+        pass
+
+    def get_file_latest_commit(self, path):
+        FakeFetcher.lookups.append(path)
+        if path == FakeFetcher.interrupt_at:
+            raise Interrupted()
+        if path in FakeFetcher.fail_paths:
+            raise GitilesError(f"Unable to get the latest commit of {path}: 503")
+        return {"commit": f"{FILES.index(path):040x}", "message": path}
+
+    def get_commit_record(self, commit_info, fields, requested_paths, **options):
+        record = {"commit": commit_info["commit"], "requested_paths": requested_paths}
+        return SimpleNamespace(to_dict=lambda: record)
+
+    def get_formatted_commit_info(self, commit_info, **options):
+        return f"Commit {commit_info['commit']}"
+
+
+@pytest.fixture
+def run_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_get_commits, "ChromiumCommitFetcher", FakeFetcher)
+    FakeFetcher.lookups = []
+    FakeFetcher.interrupt_at = None
+    FakeFetcher.fail_paths = set()
+    file_list = tmp_path / "files.txt"
+    file_list.write_text("\n".join(FILES) + "\n", encoding="utf-8")
+    output = tmp_path / "out.ndjson"
+
+    def run(*options):
+        argv = ["batch_get_commits.py", str(file_list), "-o", str(output)]
+        argv += ["--format", "ndjson", "--no-cache", "--concurrency", "1", *options]
+        monkeypatch.setattr(sys, "argv", argv)
+        batch_get_commits.main()
+        return [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+
+    run.output = output
+    return run
+
+
+def test_resume_skips_completed_files(run_batch):
+    FakeFetcher.interrupt_at = FILES[5]
+    with pytest.raises(Interrupted):
+        run_batch("--no-dedupe")
+    done = load_checkpoint(checkpoint_path(str(run_batch.output)))
+    written = [
+        json.loads(line)["requested_paths"][0]
+        for line in run_batch.output.read_text(encoding="utf-8").splitlines()
+    ]
+    # Results were written while lookups were still running, and only those are done
+    assert written == FILES[: len(written)]
+    assert 0 < len(written) < 5
+    assert done == set(written)
+
+    FakeFetcher.interrupt_at = None
+    FakeFetcher.lookups = []
+    records = run_batch("--no-dedupe", "--resume")
+    assert FakeFetcher.lookups == [path for path in FILES if path not in done]
+    assert [record["requested_paths"] for record in records] == [[path] for path in FILES]
+    assert load_checkpoint(checkpoint_path(str(run_batch.output))) == set(FILES)
+
+
+def test_failed_files_are_not_checkpointed(run_batch):
+    FakeFetcher.fail_paths = {FILES[2]}
+    records = run_batch()
+    assert "error" in records[2] and "503" in records[2]["error"]
+    assert load_checkpoint(checkpoint_path(str(run_batch.output))) == set(FILES) - {FILES[2]}
+
+    FakeFetcher.fail_paths = set()
+    FakeFetcher.lookups = []
+    records = run_batch("--resume")
+    assert FakeFetcher.lookups == [FILES[2]]
+    assert records[-1]["requested_paths"] == [FILES[2]]
+    assert "error" not in records[-1]
+
+
+def test_resume_with_nothing_left(run_batch):
+    run_batch()
+    FakeFetcher.lookups = []
+    run_batch("--resume")
+    assert FakeFetcher.lookups == []
+
+
+def test_text_results_on_stdout_are_kept_apart_from_progress(run_batch, monkeypatch, capsys):
+    file_list = run_batch.output.parent / "files.txt"
+    argv = ["batch_get_commits.py", str(file_list), "--no-cache", "--concurrency", "1"]
+    monkeypatch.setattr(sys, "argv", argv)
+    batch_get_commits.main()
+    captured = capsys.readouterr()
+    results = captured.out.rstrip("\n").split("\n\n")
+    assert results == [f"Commit {i:040x}" for i in range(len(FILES))]
+    assert "Processed file" in captured.err
+
+
+def test_missing_checkpoint_is_empty(tmp_path):
+    assert load_checkpoint(str(tmp_path / "none.done")) == set()
+
+
+def commits(*hashes):
+    return [(f"file{i}", {"commit": h} if h else None) for i, h in enumerate(hashes)]
+
+
+def test_group_paths_by_commit():
+    error = GitilesError("boom")
+    latest = commits("a", "b", "a", None, "b") + [("file5", error)]
+    assert group_paths_by_commit(latest) == [
+        ({"commit": "a"}, ["file0", "file2"]),
+        ({"commit": "b"}, ["file1", "file4"]),
+        (None, ["file3"]),
+        (error, ["file5"]),
+    ]
+
+
+def test_iter_paths_by_commit_is_lazy():
+    consumed = []
+
+    def latest():
+        for path, commit in commits("a", "b", "c", "d"):
+            consumed.append(path)
+            yield path, commit
+
+    groups = iter_paths_by_commit(latest(), window=1)
+    assert next(groups) == ({"commit": "a"}, ["file0"])
+    assert consumed == ["file0", "file1"]
+
+
+def test_iter_paths_by_commit_window_closes_old_groups():
+    groups = list(iter_paths_by_commit(commits("a", "b", "c", "a", "c"), window=2))
+    # "a" left the window before file3, so it gets a group of its own
+    assert groups == [
+        ({"commit": "a"}, ["file0"]),
+        ({"commit": "b"}, ["file1"]),
+        ({"commit": "c"}, ["file2", "file4"]),
+        ({"commit": "a"}, ["file3"]),
+    ]
+
+
+def test_window_closes_groups_of_compact_commits():
+    latest = [
+        (f"file{i}", Commit.from_dict({"commit": h, "message": ""}))
+        for i, h in enumerate("aba")
+    ]
+    groups = list(iter_paths_by_commit(latest, window=1))
+    assert [(group["commit"], paths) for group, paths in groups] == [
+        ("a", ["file0"]),
+        ("b", ["file1"]),
+        ("a", ["file2"]),
+    ]
@@ -0,0 +1,132 @@
+"""Tests for the persistent on-disk response cache (CommitCache)"""
+
+import json
+import os
+import zlib
+
+import pytest
+
+import commit_cache
+from commit_cache import CommitCache, is_immutable_commit, open_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(commit_cache.time, "time", fake)
+    return fake
+
+
+def incompressible(n: int) -> str:
+    return os.urandom(n).hex()
+
+
+def stored_size(value) -> int:
+    return len(zlib.compress(json.dumps(value).encode("utf-8")))
+
+
+def test_round_trip(tmp_path, clock):
+    cache = CommitCache(str(tmp_path))
+    value = {"commit": "a" * 40, "message": "Fix ünïcode", "tree_diff": []}
+    cache.set("details:x", value)
+    assert cache.get("details:x") == value
+    assert cache.get("details:missing") is None
+    assert cache.get_entry("details:x") == (value, None)
+
+
+def test_entries_survive_reopening(tmp_path, clock):
+    cache = CommitCache(str(tmp_path))
+    cache.set("key", [1, 2, 3])
+    cache.close()
+    assert CommitCache(str(tmp_path)).get("key") == [1, 2, 3]
+
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = CommitCache(str(tmp_path))
+    cache.set("log:path", "short", ttl=30)
+    cache.set("details:commit", "forever")
+    clock.now += 29
+    assert cache.get("log:path") == "short"
+    clock.now += 1
+    assert cache.get("log:path") is None
+    clock.now += 10 * 365 * 24 * 3600
+    assert cache.get("details:commit") == "forever"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    values = {key: incompressible(1500) for key in "abcd"}
+    size = max(stored_size(value) for value in values.values())
+    cache = CommitCache(str(tmp_path), max_size_mb=3.5 * size / (1024 * 1024))
+
+    for key in "abc":
+        clock.now += 1
+        cache.set(key, values[key])
+    # Reading "a" makes "b" the least recently used entry
+    clock.now += 1
+    assert cache.get("a") == values["a"]
+    clock.now += 1
+    cache.set("d", values["d"])
+
+    assert cache.get("b") is None
+    for key in "acd":
+        assert cache.get(key) == values[key]
+
+
+def test_expired_entries_are_evicted_first(tmp_path, clock):
+    values = {key: incompressible(1500) for key in "abcd"}
+    size = max(stored_size(value) for value in values.values())
+    cache = CommitCache(str(tmp_path), max_size_mb=3.5 * size / (1024 * 1024))
+
+    cache.set("a", values["a"])
+    clock.now += 1
+    cache.set("b", values["b"], ttl=5)
+    clock.now += 1
+    cache.set("c", values["c"])
+    clock.now += 10
+    cache.set("d", values["d"])
+
+    # "a" is the least recently used, but the expired "b" makes room instead
+    assert cache.get("a") == values["a"]
+    assert cache.get("b") is None
+
+
+def test_size_accounting_survives_overwrites(tmp_path, clock):
+    value = incompressible(1500)
+    cache = CommitCache(str(tmp_path), max_size_mb=3.5 * stored_size(value) / (1024 * 1024))
+    for _ in range(20):
+        clock.now += 1
+        cache.set("same", value)
+    cache.set("other", incompressible(1500))
+    assert cache.get("same") == value
+
+
+def test_oversized_values_are_not_stored(tmp_path, clock):
+    cache = CommitCache(str(tmp_path), max_size_mb=1 / 1024)
+    cache.set("big", incompressible(4096))
+    assert cache.get("big") is None
+
+
+def test_open_cache_can_be_disabled(tmp_path):
+    assert open_cache("") is None
+    assert isinstance(open_cache(str(tmp_path)), CommitCache)
+
+
+@pytest.mark.parametrize(
+    "revision, immutable",
+    [
+        ("0123456789abcdef0123456789abcdef01234567", True),
+        ("HEAD", False),
+        ("0123abc", False),
+        ("", False),
+    ],
+)
+def test_is_immutable_commit(revision, immutable):
+    assert is_immutable_commit(revision) == immutable
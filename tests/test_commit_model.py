@@ -0,0 +1,43 @@
+"""Tests for the compact in-memory commit representation"""
+
+from commit_model import Commit, compact_value
+from get_chromium_commits import format_commit_info
+
+GITILES_COMMIT = {
+    "commit": "a" * 40,
+    "tree": "t" * 40,
+    "parents": ["p" * 40],
+    "author": {"name": "Dev", "email": "dev@chromium.org", "time": "Mon Jan 01 00:00:00 2024"},
+    "committer": {"name": "Bot", "email": "bot@chromium.org", "time": "Mon Jan 01 00:01:00 2024"},
+    "message": "Fix things\n\nBug: 1\n",
+    "tree_diff": [
+        {"type": "modify", "old_path": "a.cc", "new_path": "a.cc", "old_id": "x", "new_id": "y"},
+        {"type": "rename", "old_path": "b.cc", "new_path": "c.cc"},
+    ],
+}
+
+
+def test_compact_commit_reads_like_the_gitiles_dictionary():
+    commit = Commit.from_dict(GITILES_COMMIT)
+    assert commit["author"] == GITILES_COMMIT["author"]
+    assert commit["tree_diff"][1] == {"type": "rename", "old_path": "b.cc", "new_path": "c.cc"}
+    assert "tree" not in commit
+    assert format_commit_info(commit, commit) == format_commit_info(
+        GITILES_COMMIT, GITILES_COMMIT
+    )
+
+
+def test_missing_signature_fields_stay_missing():
+    data = {"commit": "a" * 40, "author": {"email": "dev@chromium.org"}, "message": "m"}
+    commit = Commit.from_dict(data)
+    assert commit["author"] == {"email": "dev@chromium.org"}
+    assert "Author: N/A <dev@chromium.org>" in format_commit_info(commit)
+    assert commit.estimated_size() > 0
+
+
+def test_compact_value_handles_pages_and_pinned_entries():
+    page = compact_value({"log": [GITILES_COMMIT], "next": "n"})
+    assert isinstance(page["log"][0], Commit) and page["next"] == "n"
+    entry = compact_value({"head": "h" * 40, "latest": GITILES_COMMIT})
+    assert isinstance(entry["latest"], Commit) and entry["head"] == "h" * 40
+    assert compact_value({"text": "diff"}) == {"text": "diff"}
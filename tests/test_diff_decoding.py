@@ -0,0 +1,116 @@
+"""Tests for the streaming diff decoder (DiffStreamDecoder)"""
+
+import base64
+
+import pytest
+
+from get_chromium_commits import DiffStreamDecoder
+
+DIFF = (
+    "diff --git a/chrome/browser/a.cc b/chrome/browser/a.cc\n"
+    "--- a/chrome/browser/a.cc\n"
+    "+++ b/chrome/browser/a.cc\n"
+    "@@ -1,2 +1,2 @@\n"
+    "-int a = 1;\n"
+    "+int a = 2;  // ünïcode\n"
+    "diff --git a/components/sync/b.h b/components/sync/b.h\n"
+    "--- a/components/sync/b.h\n"
+    "+++ b/components/sync/b.h\n"
+    "@@ -10 +10 @@\n"
+    "-#define B 1\n"
+    "+#define B 2\n"
+    "diff --git a/chrome/browser/c.cc b/chrome/browser/c.cc\n"
+    "--- a/chrome/browser/c.cc\n"
+    "+++ b/chrome/browser/c.cc\n"
+    "@@ -5 +5 @@\n"
+    "-return false;\n"
+    "+return true;\n"
+)
+ENCODED = base64.b64encode(DIFF.encode("utf-8"))
+
+
+def decode(body: bytes, chunk_size: int, **budget) -> object:
+    decoder = DiffStreamDecoder(**budget)
+    for start in range(0, len(body), chunk_size):
+        if decoder.feed(body[start : start + chunk_size]):
+            break
+    return decoder.finish()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5, 7, 64, 255, 256, 257, 4096])
+def test_base64_chunk_boundaries(chunk_size):
+    excerpt = decode(ENCODED, chunk_size)
+    assert excerpt.text == DIFF
+    assert not excerpt.truncated
+
+
+def test_base64_with_line_breaks():
+    wrapped = b"\n".join(ENCODED[i : i + 76] for i in range(0, len(ENCODED), 76))
+    assert decode(wrapped, 50).text == DIFF
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 4096])
+def test_plain_text_body(chunk_size):
+    excerpt = decode(DIFF.encode("utf-8"), chunk_size)
+    assert excerpt.text == DIFF
+
+
+def test_short_body_decoded_in_finish():
+    body = base64.b64encode(b"diff --git a/x b/x\n+1\n")
+    excerpt = decode(body, 4096)
+    assert excerpt.text == "diff --git a/x b/x\n+1\n"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 6, 4096])
+def test_line_budget_truncates(chunk_size):
+    excerpt = decode(ENCODED, chunk_size, max_lines=3)
+    assert excerpt.text == "\n".join(DIFF.split("\n")[:3])
+    assert excerpt.line_count == 3
+    assert excerpt.truncated
+
+
+def test_line_budget_exactly_filled_is_not_truncated():
+    text = "line 1\nline 2\n"
+    excerpt = decode(base64.b64encode(text.encode()), 5, max_lines=2)
+    assert excerpt.text == "line 1\nline 2"
+    assert not excerpt.truncated
+
+
+@pytest.mark.parametrize("chunk_size", [1, 9, 4096])
+def test_byte_budget_drops_split_character(chunk_size):
+    # Cut inside the two-byte "ü", which must not be returned half decoded
+    cut = DIFF.encode("utf-8").index("ü".encode("utf-8")) + 1
+    excerpt = decode(ENCODED, chunk_size, max_bytes=cut)
+    assert excerpt.truncated
+    assert excerpt.text == DIFF.encode("utf-8")[: cut - 1].decode("utf-8")
+
+
+def test_omitted_bytes_estimated_from_total_size():
+    excerpt = decode(ENCODED, 64, max_lines=2, total_size=len(ENCODED))
+    assert excerpt.truncated
+    omitted = len(DIFF.encode("utf-8")) - len(excerpt.text.encode("utf-8"))
+    # Estimated from base64 sizes, so only approximately exact
+    assert abs(excerpt.omitted_bytes - omitted) <= 4
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_path_filter_keeps_requested_files(chunk_size):
+    excerpt = decode(ENCODED, chunk_size, paths=["chrome/browser/a.cc", "chrome/browser/c.cc"])
+    sections = DIFF.split("diff --git ")
+    expected = "diff --git " + sections[1] + "diff --git " + sections[3]
+    assert excerpt.text == expected
+
+
+def test_path_filter_matches_directories():
+    excerpt = decode(ENCODED, 10, paths=["components/sync"])
+    assert excerpt.text.startswith("diff --git a/components/sync/b.h")
+    assert "chrome/browser" not in excerpt.text
+
+
+def test_path_filter_counts_only_selected_lines():
+    excerpt = decode(ENCODED, 3, paths=["chrome/browser/c.cc"], max_lines=2)
+    assert excerpt.text == (
+        "diff --git a/chrome/browser/c.cc b/chrome/browser/c.cc\n"
+        "--- a/chrome/browser/c.cc"
+    )
+    assert excerpt.truncated
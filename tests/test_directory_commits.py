@@ -0,0 +1,107 @@
+"""Tests for resolving the latest commit of every file in a directory"""
+
+import asyncio
+
+from async_fetcher import AsyncChromiumCommitFetcher
+from get_chromium_commits import DirectoryCommitResolver, GitilesError, format_directory_commits
+
+FILES = ["dir/a.cc", "dir/b.cc", "dir/sub/c.cc", "dir/d.cc"]
+
+
+def log_entry(commit_hash, *paths):
+    return {
+        "commit": commit_hash,
+        "message": f"Change {commit_hash}",
+        "tree_diff": [{"type": "modify", "old_path": p, "new_path": p} for p in paths],
+    }
+
+
+def test_resolver_keeps_newest_commit_per_file():
+    resolver = DirectoryCommitResolver(FILES)
+    assert not resolver.add(log_entry("c3", "dir/a.cc", "other/x.cc"))
+    assert not resolver.add(log_entry("c2", "dir/a.cc", "dir/sub/c.cc"))
+    assert not resolver.add(log_entry("c1", "dir/b.cc"))
+    assert resolver.pending == {"dir/d.cc"}
+
+    results = resolver.results()
+    assert list(results) == FILES
+    assert results["dir/a.cc"]["commit"] == "c3"
+    assert results["dir/sub/c.cc"]["commit"] == "c2"
+    assert results["dir/d.cc"] is None
+    # The changed-file list is only used for matching
+    assert "tree_diff" not in results["dir/a.cc"]
+
+
+def test_resolver_reports_completion():
+    resolver = DirectoryCommitResolver(["dir/a.cc"])
+    assert resolver.add(log_entry("c1", "dir/a.cc"))
+
+
+def test_format_lists_failed_lookups_separately():
+    text = format_directory_commits(
+        "dir",
+        {
+            "dir/a.cc": {"commit": "c" * 40, "message": "Subject\n\nBody"},
+            "dir/b.cc": None,
+            "dir/d.cc": GitilesError("Unable to get the latest commit of dir/d.cc: 503"),
+        },
+    )
+    lines = text.split("\n")
+    assert any(line.startswith("dir/a.cc  cccccccccccc") and "Subject" in line for line in lines)
+    assert "dir/b.cc  (no commit found)" in lines
+    failed = lines.index("Lookup failed:")
+    assert lines[failed + 1] == "  dir/d.cc: Unable to get the latest commit of dir/d.cc: 503"
+
+
+class DirectoryFetcher(AsyncChromiumCommitFetcher):
+    """Serves a fixed listing and log, tracking concurrent per-file lookups"""
+
+    def __init__(self, log, fail_paths=()):
+        super().__init__(cache=None)
+        self.log = log
+        self.fail_paths = set(fail_paths)
+        self.active = 0
+        self.max_active = 0
+
+    async def list_directory_files(self, directory):
+        return list(FILES)
+
+    async def iter_file_history(self, file_path, since=None, page_size=0, name_status=False):
+        for commit in self.log:
+            yield commit
+
+    async def get_file_latest_commit(self, file_path, refresh=False):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if file_path in self.fail_paths:
+                raise GitilesError(f"Unable to get the latest commit of {file_path}: 503")
+            return {"commit": f"single-{file_path}"}
+        finally:
+            self.active -= 1
+
+
+def get_directory(fetcher, **options):
+    async def run():
+        try:
+            return await fetcher.get_directory_latest_commits("dir", **options)
+        finally:
+            await fetcher.aclose()
+
+    return asyncio.run(run())
+
+
+def test_unresolved_files_are_looked_up_with_bounded_concurrency():
+    fetcher = DirectoryFetcher([log_entry("c1", "dir/a.cc")])
+    results = get_directory(fetcher, concurrency=2)
+    assert results["dir/a.cc"]["commit"] == "c1"
+    assert results["dir/d.cc"] == {"commit": "single-dir/d.cc"}
+    assert fetcher.max_active == 2
+
+
+def test_failed_lookup_does_not_fail_the_directory():
+    fetcher = DirectoryFetcher([], fail_paths={"dir/b.cc"})
+    results = get_directory(fetcher)
+    assert isinstance(results["dir/b.cc"], GitilesError)
+    assert results["dir/a.cc"] == {"commit": "single-dir/a.cc"}
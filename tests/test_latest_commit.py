@@ -0,0 +1,134 @@
+"""Tests for HEAD-pinned latest-commit lookups and their revalidation"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import get_chromium_commits
+from commit_model import Commit, compact_value
+from get_chromium_commits import ChromiumCommitFetcher
+from memory_cache import MemoryCache
+
+OLD_HEAD = "a" * 40
+NEW_HEAD = "b" * 40
+FILE_COMMIT = "c" * 40
+
+
+def commit(commit_hash):
+    person = {"name": "Dev", "email": "dev@chromium.org", "time": "Mon Jan 01 00:00:00 2024"}
+    return {"commit": commit_hash, "author": person, "committer": person, "message": "Change"}
+
+
+class FakeGitiles:
+    """Answers +log requests from a table of URL suffix to log entries"""
+
+    def __init__(self, head):
+        self.head = head
+        self.logs = {}
+        self.urls = []
+
+    def get(self, url, timeout=None, stream=False):
+        path = url[len(get_chromium_commits.GITILES_BASE_URL):]
+        self.urls.append(path)
+        if path == "/+log/HEAD?format=JSON&n=1":
+            log = [commit(self.head)]
+        else:
+            log = self.logs.get(path)
+        body = b")]}'" + json.dumps({"log": log or []}).encode("utf-8")
+        return SimpleNamespace(
+            status_code=200 if log is not None else 404,
+            headers={},
+            content=body,
+            raw=SimpleNamespace(retries=None),
+            raise_for_status=lambda: None,
+        )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Drives both the remembered HEAD and the expiry of cached entries
+    monkeypatch.setattr(get_chromium_commits.time, "monotonic", fake)
+    monkeypatch.setattr(get_chromium_commits.time, "time", fake)
+    return fake
+
+
+def test_head_is_remembered_without_a_cache(clock):
+    gitiles = FakeGitiles(OLD_HEAD)
+    gitiles.logs[f"/+log/{OLD_HEAD}/a.cc?format=JSON&n=1"] = [commit(FILE_COMMIT)]
+    gitiles.logs[f"/+log/{OLD_HEAD}/b.cc?format=JSON&n=1"] = [commit(FILE_COMMIT)]
+    fetcher = ChromiumCommitFetcher(session=gitiles, cache=None, head_ttl=30)
+
+    assert fetcher.get_file_latest_commit("a.cc")["commit"] == FILE_COMMIT
+    assert fetcher.get_file_latest_commit("b.cc")["commit"] == FILE_COMMIT
+    assert gitiles.urls.count("/+log/HEAD?format=JSON&n=1") == 1
+
+    clock.now += 30
+    fetcher.get_file_latest_commit("a.cc")
+    assert gitiles.urls.count("/+log/HEAD?format=JSON&n=1") == 2
+
+
+def test_unchanged_path_is_carried_forward_when_head_moves(clock):
+    gitiles = FakeGitiles(OLD_HEAD)
+    gitiles.logs[f"/+log/{OLD_HEAD}/a.cc?format=JSON&n=1"] = [commit(FILE_COMMIT)]
+    cache = MemoryCache(compact=compact_value)
+    fetcher = ChromiumCommitFetcher(session=gitiles, cache=cache, head_ttl=30)
+    fetcher.get_file_latest_commit("a.cc")
+
+    gitiles.head = NEW_HEAD
+    gitiles.logs[f"/+log/{OLD_HEAD}..{NEW_HEAD}/a.cc?format=JSON&n=1"] = []
+    gitiles.urls.clear()
+    clock.now += 30
+
+    assert fetcher.get_file_latest_commit("a.cc")["commit"] == FILE_COMMIT
+    assert gitiles.urls == [
+        "/+log/HEAD?format=JSON&n=1",
+        f"/+log/{OLD_HEAD}..{NEW_HEAD}/a.cc?format=JSON&n=1",
+    ]
+    # The entry now belongs to the new HEAD and is stored compactly in memory
+    entry = cache.get("latest:a.cc")
+    assert entry["head"] == NEW_HEAD
+    assert isinstance(entry["latest"], Commit)
+
+    gitiles.urls.clear()
+    fetcher.get_file_latest_commit("a.cc")
+    assert gitiles.urls == []
+
+
+def test_changed_path_gets_the_newer_commit(clock):
+    gitiles = FakeGitiles(OLD_HEAD)
+    gitiles.logs[f"/+log/{OLD_HEAD}/a.cc?format=JSON&n=1"] = [commit(FILE_COMMIT)]
+    cache = MemoryCache()
+    fetcher = ChromiumCommitFetcher(session=gitiles, cache=cache, head_ttl=30)
+    fetcher.get_file_latest_commit("a.cc")
+
+    gitiles.head = NEW_HEAD
+    gitiles.logs[f"/+log/{OLD_HEAD}..{NEW_HEAD}/a.cc?format=JSON&n=1"] = [commit(NEW_HEAD)]
+    clock.now += 30
+
+    assert fetcher.get_file_latest_commit("a.cc")["commit"] == NEW_HEAD
+    assert cache.get("latest:a.cc") == {"head": NEW_HEAD, "latest": commit(NEW_HEAD)}
+
+
+def test_failed_revalidation_falls_back_to_a_full_lookup(clock):
+    gitiles = FakeGitiles(OLD_HEAD)
+    gitiles.logs[f"/+log/{OLD_HEAD}/a.cc?format=JSON&n=1"] = [commit(FILE_COMMIT)]
+    fetcher = ChromiumCommitFetcher(session=gitiles, cache=MemoryCache(), head_ttl=30)
+    fetcher.get_file_latest_commit("a.cc")
+
+    # The old HEAD is unknown to Gitiles (e.g. after a force push): the range is a 404
+    gitiles.head = NEW_HEAD
+    gitiles.logs[f"/+log/{NEW_HEAD}/a.cc?format=JSON&n=1"] = [commit(NEW_HEAD)]
+    clock.now += 30
+
+    assert fetcher.get_file_latest_commit("a.cc")["commit"] == NEW_HEAD
+    assert gitiles.urls[-1] == f"/+log/{NEW_HEAD}/a.cc?format=JSON&n=1"
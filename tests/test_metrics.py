@@ -0,0 +1,42 @@
+"""Tests for the metrics registry and adding up the metrics of worker processes"""
+
+import json
+
+from get_chromium_commits import DiffStreamDecoder
+from metrics import METRICS, Metrics, aggregate_metrics, write_metrics_file
+
+# No process has this id (above the Linux pid limit)
+EXITED_PID = 99999999
+
+
+def test_decode_is_one_observation_per_diff():
+    METRICS.reset()
+    decoder = DiffStreamDecoder()
+    body = b"diff --git a/a.cc b/a.cc\n" * 100
+    for start in range(0, len(body), 16):
+        decoder.feed(body[start : start + 16])
+    decoder.finish()
+    assert METRICS.snapshot()["stages"]["decode"]["count"] == 1
+
+
+def test_workers_are_added_up(tmp_path):
+    other = Metrics()
+    other.observe("log", 0.02)
+    other.count("requests", 3)
+    with other.in_flight():
+        (tmp_path / f"{EXITED_PID}.json").write_text(json.dumps(other.export()))
+    (tmp_path / "ignored.txt").write_text("not metrics")
+
+    METRICS.reset()
+    METRICS.observe("log", 0.2)
+    METRICS.count("requests")
+    with METRICS.in_flight():
+        write_metrics_file(str(tmp_path))
+
+    combined = aggregate_metrics(str(tmp_path)).export()
+    assert combined["counters"] == {"requests": 4}
+    log = combined["stages"]["log"]
+    assert log["count"] == 2 and log["max"] == 0.2 and sum(log["buckets"]) == 2
+    # The exited worker's request is no longer in flight
+    assert combined["in_flight"] == 1
+    METRICS.reset()
@@ -0,0 +1,143 @@
+"""Tests for keeping the path index at HEAD while a fetcher runs"""
+
+import json
+import os
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+import get_chromium_commits
+from get_chromium_commits import ChromiumCommitFetcher
+from local_git import LocalGitBackend
+from memory_cache import MemoryCache
+from path_index import PathIndex
+
+NEW_HEAD = "f" * 40
+COMMITTER = {"name": "Dev", "email": "dev@chromium.org", "time": "Tue Jan 02 00:00:00 2024"}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / "src"
+    path.mkdir()
+    git(path, "init", "-q")
+    return path
+
+
+def git(repo, *args) -> str:
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "Dev",
+        "GIT_AUTHOR_EMAIL": "dev@chromium.org",
+        "GIT_COMMITTER_NAME": "Dev",
+        "GIT_COMMITTER_EMAIL": "dev@chromium.org",
+    }
+    result = subprocess.run(
+        ["git", "-C", str(repo), *args], check=True, capture_output=True, env=env
+    )
+    return result.stdout.decode().strip()
+
+
+def commit_files(repo, message, write=(), delete=()) -> str:
+    for name in write:
+        (repo / name).write_text(f"{message}\n")
+    for name in delete:
+        git(repo, "rm", "-q", name)
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def indexed_repo(repo, tmp_path):
+    first = commit_files(repo, "First", write=("a.cc", "b.cc"))
+    backend = LocalGitBackend(str(repo))
+    index = PathIndex(str(tmp_path / "index.sqlite3"))
+    index.build(backend)
+    yield repo, backend, index, first
+    index.close()
+
+
+class FakeGitiles:
+    """Serves JSON responses by URL path, 404 for anything else"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.urls = []
+
+    def get(self, url, timeout=None, stream=False):
+        path = url[len(get_chromium_commits.GITILES_BASE_URL):]
+        self.urls.append(path)
+        data = self.responses.get(path)
+        return SimpleNamespace(
+            status_code=200 if data is not None else 404,
+            headers={},
+            content=b")]}'" + json.dumps(data).encode("utf-8"),
+            raw=SimpleNamespace(retries=None),
+            raise_for_status=lambda: None,
+        )
+
+
+def test_index_follows_the_clone_as_it_moves(indexed_repo):
+    repo, backend, index, first = indexed_repo
+    fetcher = ChromiumCommitFetcher(cache=MemoryCache(), backend=backend, path_index=index)
+    assert fetcher.get_file_latest_commit("a.cc")["commit"] == first
+
+    second = commit_files(repo, "Second", write=("a.cc",), delete=("b.cc",))
+    assert fetcher.get_file_latest_commit("a.cc", refresh=True)["commit"] == second
+    assert index.indexed_head == second
+    assert index.lookup("b.cc") is None
+    # Metadata of index hits is served from the cache afterwards
+    assert fetcher.cache.get(f"commit:{second}")["commit"] == second
+
+
+def test_index_is_caught_up_from_the_gitiles_log(indexed_repo):
+    repo, backend, index, first = indexed_repo
+    renamed = {
+        "commit": NEW_HEAD,
+        "committer": COMMITTER,
+        "message": "Rename",
+        "tree_diff": [{"type": "rename", "old_path": "a.cc", "new_path": "c.cc"}],
+    }
+    gitiles = FakeGitiles(
+        {
+            "/+log/HEAD?format=JSON&n=1": {"log": [renamed]},
+            f"/+log/{first}..{NEW_HEAD}/?format=JSON&n=100&name-status=1": {"log": [renamed]},
+            f"/+/{NEW_HEAD}?format=JSON": renamed,
+            f"/+/{first}?format=JSON": {"commit": first, "message": "First"},
+        }
+    )
+    fetcher = ChromiumCommitFetcher(session=gitiles, cache=MemoryCache(), path_index=index)
+
+    assert fetcher.get_file_latest_commit("c.cc")["commit"] == NEW_HEAD
+    assert index.indexed_head == NEW_HEAD
+    assert index.lookup("a.cc") is None
+    assert fetcher.get_file_latest_commit("b.cc")["commit"] == first
+    # Neither lookup needed a per-file +log request
+    assert not any("/c.cc" in url or "/b.cc" in url for url in gitiles.urls)
+
+
+def test_index_that_cannot_catch_up_is_skipped(indexed_repo):
+    repo, backend, index, first = indexed_repo
+    gitiles = FakeGitiles(
+        {
+            "/+log/HEAD?format=JSON&n=1": {"log": [{"commit": NEW_HEAD}]},
+            f"/+log/{NEW_HEAD}/a.cc?format=JSON&n=1": {"log": [{"commit": NEW_HEAD}]},
+            f"/+log/{NEW_HEAD}/b.cc?format=JSON&n=1": {"log": [{"commit": NEW_HEAD}]},
+        }
+    )
+    fetcher = ChromiumCommitFetcher(session=gitiles, cache=None, path_index=index)
+
+    assert fetcher.get_file_latest_commit("a.cc")["commit"] == NEW_HEAD
+    assert fetcher.get_file_latest_commit("b.cc")["commit"] == NEW_HEAD
+    assert index.indexed_head == first
+    # The failed catch-up is not retried for every lookup
+    assert sum("name-status" in url for url in gitiles.urls) == 1
+
+
+def test_apply_commits_skips_an_index_moved_by_another_writer(indexed_repo):
+    repo, backend, index, first = indexed_repo
+    assert index.apply_commits("0" * 40, NEW_HEAD, [(NEW_HEAD, 0, [("M", "a.cc")])]) == 0
+    assert index.indexed_head == first
+    assert index.lookup("a.cc")[0] == first
@@ -0,0 +1,78 @@
+"""Tests for the background refresh of frequently requested paths"""
+
+import asyncio
+
+from metrics import count_request
+from prefetch import HotPath, HotPathTracker, PrefetchRefresher
+
+
+class FakeFetcher:
+    """Answers from a table of latest commits; cached paths make no request"""
+
+    head_ttl = 30
+
+    def __init__(self, latest, cached=()):
+        self.latest = latest
+        self.cached = set(cached)
+        self.calls = []
+
+    async def get_head_commit(self, refresh=False):
+        count_request()
+        return "head"
+
+    async def get_file_latest_commit(self, file_path, refresh=False):
+        if file_path not in self.cached:
+            count_request()
+        return {"commit": self.latest[file_path]}
+
+    async def get_commit_details(self, commit_hash):
+        self.calls.append(("details", commit_hash))
+        count_request()
+
+    async def get_commit_diff_excerpt(self, commit_hash, max_lines, max_bytes, paths):
+        self.calls.append(("diff", commit_hash, paths))
+        count_request()
+
+
+def refresh(fetcher, tracker, **options):
+    return asyncio.run(PrefetchRefresher(fetcher, tracker, **options).refresh_once())
+
+
+def test_interval_follows_head_ttl():
+    refresher = PrefetchRefresher(FakeFetcher({}), HotPathTracker())
+    assert refresher.interval == FakeFetcher.head_ttl
+
+
+def test_only_requested_parts_are_prefetched():
+    tracker = HotPathTracker()
+    tracker.record("a.cc", file_diff_only=True, details=False, diff=True)
+    tracker.record("b.cc", file_diff_only=True, details=True, diff=False)
+    fetcher = FakeFetcher({"a.cc": "1", "b.cc": "2"})
+
+    refresh(fetcher, tracker)
+    assert sorted(fetcher.calls) == [("details", "2"), ("diff", "1", ["a.cc"])]
+    # Without a diff, limiting it to the path does not make a separate entry
+    assert HotPath("b.cc", details=True, diff=False) in tracker.hottest(2)
+
+
+def test_cached_lookups_do_not_use_the_budget():
+    tracker = HotPathTracker()
+    paths = [f"{i}.cc" for i in range(10)]
+    for path in paths:
+        tracker.record(path, details=False, diff=False)
+    fetcher = FakeFetcher({path: path for path in paths}, cached=paths)
+
+    # Only the HEAD revalidation is a real request; every path is still refreshed
+    assert refresh(fetcher, tracker, budget=3, concurrency=1) == 1
+
+
+def test_budget_caps_real_requests():
+    tracker = HotPathTracker()
+    paths = [f"{i}.cc" for i in range(10)]
+    for path in paths:
+        tracker.record(path)
+    fetcher = FakeFetcher({path: path for path in paths})
+
+    made = refresh(fetcher, tracker, budget=8, concurrency=1)
+    assert made <= 8
+    assert len(fetcher.calls) == 4
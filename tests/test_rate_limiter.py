@@ -0,0 +1,171 @@
+"""Tests for the adaptive rate limiter and the handling of 429 responses"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+import get_chromium_commits
+from get_chromium_commits import (
+    DEFAULT_THROTTLED_RATE,
+    MIN_RATE_LIMIT,
+    THROTTLE_BACKOFF,
+    ChromiumCommitFetcher,
+    RateLimiter,
+    parse_retry_after,
+)
+
+HOST = "chromium.googlesource.com"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(get_chromium_commits.time, "monotonic", fake)
+    # Waiting advances the fake clock instead of sleeping
+    monkeypatch.setattr(
+        get_chromium_commits.time, "sleep", lambda seconds: setattr(fake, "now", fake.now + seconds)
+    )
+    return fake
+
+
+def test_uncapped_until_throttled(clock):
+    limiter = RateLimiter()
+    assert all(limiter.reserve(HOST) == 0 for _ in range(100))
+    assert limiter.current_rate(HOST) is None
+
+
+def test_token_bucket_spaces_requests(clock):
+    limiter = RateLimiter(2)
+    # One second's worth of burst, then one request every half second
+    assert limiter.reserve(HOST) == 0
+    assert limiter.reserve(HOST) == 0
+    assert limiter.reserve(HOST) == pytest.approx(0.5)
+    assert limiter.reserve(HOST) == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter.reserve(HOST) == pytest.approx(0.5)
+
+
+def test_throttled_pauses_every_caller_for_retry_after(clock):
+    limiter = RateLimiter()
+    limiter.throttled(HOST, retry_after=3)
+    assert limiter.current_rate(HOST) == DEFAULT_THROTTLED_RATE * THROTTLE_BACKOFF
+    waits = [limiter.reserve(HOST) for _ in range(3)]
+    assert all(wait >= 3 for wait in waits)
+    # Requests queued behind the pause are spaced at the reduced rate
+    assert waits == sorted(waits)
+    # Other hosts are not affected
+    assert limiter.reserve("other.example") == 0
+
+
+def test_throttled_without_retry_after_uses_default_pause(clock):
+    limiter = RateLimiter(4)
+    limiter.throttled(HOST)
+    assert limiter.reserve(HOST) == pytest.approx(
+        get_chromium_commits.DEFAULT_THROTTLE_PAUSE + 1 / limiter.current_rate(HOST)
+    )
+
+
+def test_burst_of_rejections_halves_rate_once(clock):
+    limiter = RateLimiter(8)
+    # Responses to requests already in flight arrive during the pause
+    for _ in range(5):
+        limiter.throttled(HOST, retry_after=1)
+    assert limiter.current_rate(HOST) == 4
+    clock.now += 2
+    limiter.throttled(HOST, retry_after=1)
+    assert limiter.current_rate(HOST) == 2
+
+
+def test_rate_never_drops_below_minimum(clock):
+    limiter = RateLimiter(1)
+    for _ in range(10):
+        limiter.throttled(HOST, retry_after=0)
+        clock.now += 1
+    assert limiter.current_rate(HOST) == MIN_RATE_LIMIT
+
+
+def test_recovers_up_to_configured_rate(clock):
+    limiter = RateLimiter(6)
+    limiter.throttled(HOST, retry_after=0)
+    assert limiter.current_rate(HOST) == 3
+    limiter.succeeded(HOST)
+    assert 3 < limiter.current_rate(HOST) < 6
+    for _ in range(100):
+        limiter.succeeded(HOST)
+    assert limiter.current_rate(HOST) == 6
+
+
+def test_uncapped_host_becomes_uncapped_again(clock):
+    limiter = RateLimiter()
+    limiter.throttled(HOST, retry_after=0)
+    for _ in range(100):
+        limiter.succeeded(HOST)
+    assert limiter.current_rate(HOST) is None
+    clock.now += 1
+    assert limiter.reserve(HOST) == 0
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(None, None), ("", None), ("7", 7.0), (" 0 ", 0.0), ("soon", None)],
+)
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == pytest.approx(30, abs=2)
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0
+
+
+class FakeSession:
+    """Returns the given status codes in order, recording the requests"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = 0
+
+    def get(self, url, timeout=None, stream=False):
+        self.requests += 1
+        status = self.statuses.pop(0)
+        return SimpleNamespace(
+            status_code=status,
+            headers={"Retry-After": "0"} if status == 429 else {},
+            content=b"",
+            raw=SimpleNamespace(retries=None),
+            close=lambda: None,
+        )
+
+
+def test_fetcher_retries_throttled_requests_behind_limiter(clock):
+    session = FakeSession(429, 429, 200)
+    fetcher = ChromiumCommitFetcher(session=session, max_retries=3, cache=None)
+    response = fetcher._get(f"https://{HOST}/chromium/src/+log/HEAD", timeout=1)
+    assert response.status_code == 200
+    assert session.requests == 3
+    assert fetcher.rate_limiter.current_rate(HOST) < DEFAULT_THROTTLED_RATE
+
+
+def test_fetcher_returns_429_once_retries_are_exhausted(clock):
+    session = FakeSession(429, 429, 200)
+    fetcher = ChromiumCommitFetcher(session=session, max_retries=1, cache=None)
+    response = fetcher._get(f"https://{HOST}/chromium/src/+log/HEAD", timeout=1)
+    assert response.status_code == 429
+    assert session.requests == 2
@@ -0,0 +1,87 @@
+"""Tests for coalescing concurrent cache misses into a single fetch"""
+
+import asyncio
+
+from async_fetcher import AsyncChromiumCommitFetcher
+from get_chromium_commits import ChromiumCommitFetcher
+from memory_cache import AsyncSingleFlight
+
+
+class LateFillCache:
+    """Misses on the first lookup, as if another caller stored the value just after"""
+
+    def __init__(self, value):
+        self.value = value
+        self.gets = 0
+        self.sets = []
+
+    def get(self, key):
+        self.gets += 1
+        return self.value if self.gets > 1 else None
+
+    def set(self, key, value, ttl=None):
+        self.sets.append(key)
+
+
+def test_sync_cached_checks_again_before_fetching():
+    cache = LateFillCache("cached")
+    fetcher = ChromiumCommitFetcher(cache=cache)
+    fetches = []
+    value = fetcher._cached("log:path", lambda: fetches.append(1) or "fetched")
+    assert value == "cached"
+    assert fetches == []
+    assert cache.sets == []
+
+
+def test_async_cached_checks_again_before_fetching():
+    cache = LateFillCache("cached")
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        return "fetched"
+
+    async def run():
+        fetcher = AsyncChromiumCommitFetcher(cache=cache)
+        try:
+            return await fetcher._cached("log:path", fetch)
+        finally:
+            await fetcher.aclose()
+
+    assert asyncio.run(run()) == "cached"
+    assert fetches == []
+    assert cache.sets == []
+
+
+def test_async_cached_refresh_skips_the_cache():
+    cache = LateFillCache("cached")
+
+    async def fetch():
+        return "fetched"
+
+    async def run():
+        fetcher = AsyncChromiumCommitFetcher(cache=cache)
+        try:
+            return await fetcher._cached("log:path", fetch, refresh=True)
+        finally:
+            await fetcher.aclose()
+
+    assert asyncio.run(run()) == "fetched"
+    assert cache.gets == 0
+    assert cache.sets == ["log:path"]
+
+
+def test_async_single_flight_runs_once_for_concurrent_callers():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", load) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert calls == [1]